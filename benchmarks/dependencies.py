@@ -0,0 +1,108 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measure how DependencyMap scales on synthetic resource graphs.
+
+Run with::
+
+    python benchmarks/dependencies.py [NODES ...]
+
+Each graph looks like a large workspace: a handful of "account" roots, a layer
+of "vpc"-like nodes hanging off them and a wide fan of leaves (records, rules,
+files) that each depend on a couple of nodes from the layer above.
+"""
+
+from __future__ import print_function
+
+import os
+import random
+import sys
+import time
+
+# Run from a checkout without installing touchdown first
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from touchdown.core.dependencies import DependencyMap  # noqa: E402
+
+
+class Node(object):
+
+    __slots__ = ("name", "dependencies")
+
+    def __init__(self, name):
+        self.name = name
+        self.dependencies = set()
+
+    def __str__(self):
+        return "node '{}'".format(self.name)
+
+
+def build_graph(size, seed=0):
+    rng = random.Random(seed)
+    root = Node("workspace")
+
+    roots = [Node("account-{}".format(i)) for i in range(10)]
+    root.dependencies.update(roots)
+
+    middle = []
+    for i in range(max(size // 100, 1)):
+        node = Node("vpc-{}".format(i))
+        node.dependencies.add(rng.choice(roots))
+        middle.append(node)
+
+    for i in range(size - len(roots) - len(middle) - 1):
+        node = Node("leaf-{}".format(i))
+        node.dependencies.update(rng.sample(middle, min(2, len(middle))))
+        root.dependencies.add(node)
+
+    return root
+
+
+def timed(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def run(size):
+    root = build_graph(size)
+
+    prepare, dep_map = timed(lambda: DependencyMap(root))
+    visit, visited = timed(lambda: len(list(dep_map.all())))
+    assert visited == size, (visited, size)
+
+    dep_map = DependencyMap(root, tips_first=True)
+
+    def drain():
+        # Mimic ParallelMap: pull what is ready, complete it, repeat
+        pending = list(dep_map.get_ready())
+        while pending:
+            pending.extend(dep_map.complete(pending.pop()))
+    schedule, _ = timed(drain)
+    assert dep_map.empty()
+
+    print("{:>8} nodes: prepare {:.3f}s, all() {:.3f}s, get_ready/complete {:.3f}s".format(
+        size, prepare, visit, schedule,
+    ))
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or [10000, 25000, 50000, 100000]
+    for size in sizes:
+        run(size)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,73 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measure the overhead ParallelMap adds on top of the work it schedules.
+
+Run with::
+
+    python benchmarks/scheduler.py [CHAINS] [DEPTH] [TASK_SECONDS]
+
+The graph is CHAINS independent dependency chains of DEPTH nodes each (think
+VPC -> subnet -> route table -> ASG). Every task sleeps for TASK_SECONDS, so
+the ideal makespan is DEPTH * TASK_SECONDS whenever CHAINS <= workers.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+# Run from a checkout without installing touchdown first, and whatever the
+# current directory is
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(HERE), HERE]
+
+from touchdown.core.dependencies import DependencyMap  # noqa: E402
+from touchdown.core.map import ParallelMap  # noqa: E402
+from touchdown.frontends import NonInteractiveFrontend  # noqa: E402
+
+from dependencies import Node  # noqa: E402
+
+
+def build_graph(chains, depth):
+    root = Node("workspace")
+    for c in range(chains):
+        previous = None
+        for d in range(depth):
+            node = Node("chain-{}-{}".format(c, d))
+            if previous:
+                node.dependencies.add(previous)
+            previous = node
+        root.dependencies.add(previous)
+    return root
+
+
+def main(argv):
+    chains = int(argv[0]) if len(argv) > 0 else 8
+    depth = int(argv[1]) if len(argv) > 1 else 20
+    task = float(argv[2]) if len(argv) > 2 else 0.01
+
+    dep_map = DependencyMap(build_graph(chains, depth))
+    m = ParallelMap(NonInteractiveFrontend(), dep_map, lambda node: time.sleep(task))
+    m()
+
+    ideal = (depth + 1) * task
+    print("Ideal makespan {:.3f}s, actual {:.3f}s".format(ideal, m.stats.elapsed))
+    print(m.stats)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,152 @@
+# Copyright 2014 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+def find_identifier(filters, fields):
+    """ Finds the single identifier in a set of describe filters that could
+    be batched. Returns a ``(path, value)`` tuple, or ``None``.
+
+    ``fields`` is keyed by list style parameter names (``LoadBalancerNames``)
+    or by EC2 filter names (``tag:Name``). """
+    for name, values in filters.items():
+        if name in fields and isinstance(values, list) and len(values) == 1:
+            return (name, ), values[0]
+
+    for f in filters.get("Filters", []):
+        if f['Name'] in fields and len(f['Values']) == 1:
+            value = f['Values'][0]
+            # EC2 filters support wildcards, which we can't fan back out
+            if '*' in value or '?' in value:
+                continue
+            return ("Filters", f['Name']), value
+
+
+def with_identifiers(filters, path, values):
+    """ Returns a copy of filters with the identifier at path replaced with a
+    list of identifiers """
+    filters = dict(filters)
+    if len(path) == 1:
+        filters[path[0]] = list(values)
+        return filters
+
+    filters["Filters"] = [
+        dict(f, Values=list(values)) if f['Name'] == path[1] else f
+        for f in filters["Filters"]
+    ]
+    return filters
+
+
+def get_identifier(result, field):
+    if field.startswith("tag:"):
+        for tag in result.get("Tags", []):
+            if tag['Key'] == field[4:]:
+                return tag['Value']
+        return None
+    return result.get(field)
+
+
+class Batch(object):
+
+    def __init__(self):
+        self.values = []
+        self.done = False
+        self.results = None
+        self.error = None
+
+
+class Group(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = None
+
+
+class Batcher(object):
+
+    """ Coalesces describe calls for APIs that accept a list of identifiers.
+
+    Only one call per group is in flight at a time. Requests that arrive
+    while it is are collected into the next batch. Workers rarely ask at
+    exactly the same moment, so the first request for a batch also waits up
+    to ``window`` seconds (or until the batch is full) for others to join
+    it. Running serially nothing else can join, so the window should be 0
+    there, which adds no latency at all. """
+
+    window = 0.05
+
+    def __init__(self, window=window):
+        self.window = window
+        self.lock = threading.Lock()
+        self.filled = threading.Condition(self.lock)
+        self.groups = {}
+        self.requests = 0
+        self.calls = 0
+
+    def get_key(self, client, action, filters, path):
+        rest = with_identifiers(filters, path, [])
+        return (client, action, path, json.dumps(rest, sort_keys=True, default=str))
+
+    def wait_for_batch(self, group, batch, limit):
+        """ Waits for more values to join ``batch``. Must be called with
+        ``self.lock`` held. """
+        deadline = time.time() + self.window
+        while group.pending is batch and len(batch.values) < limit:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            self.filled.wait(remaining)
+
+    def describe(self, key, value, fetcher, limit):
+        """ Returns the results of a call for a batch that includes value.
+        ``fetcher`` is called with the list of values in the batch. """
+        with self.lock:
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = Group()
+            batch = group.pending
+            if batch is None or len(batch.values) >= limit:
+                batch = group.pending = Batch()
+            if value not in batch.values:
+                batch.values.append(value)
+                if len(batch.values) >= limit:
+                    self.filled.notify_all()
+            self.requests += 1
+
+        with group.lock:
+            if not batch.done:
+                with self.lock:
+                    if self.window:
+                        self.wait_for_batch(group, batch, limit)
+                    if group.pending is batch:
+                        group.pending = None
+                    values = list(batch.values)
+                    self.calls += 1
+                logger.debug("Describing {} in a batch of {}".format(key[1], len(values)))
+                try:
+                    batch.results = list(fetcher(values))
+                except Exception as e:
+                    batch.error = e
+                batch.done = True
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results
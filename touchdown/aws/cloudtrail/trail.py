@@ -47,6 +47,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_trails"
     describe_envelope = "trailList"
     key = 'Trail'
+    describe_batch = {"trailNameList": "Name"}
 
     def get_describe_filters(self):
         return {
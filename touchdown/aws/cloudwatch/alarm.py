@@ -103,6 +103,8 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_alarms"
     describe_envelope = "MetricAlarms"
     key = 'MetricAlarm'
+    describe_batch = {"AlarmNames": "AlarmName"}
+    describe_batch_limit = 100
 
     def get_describe_filters(self):
         return {
@@ -14,7 +14,9 @@
 
 import datetime
 from inspect import isgeneratorfunction
+import json
 import logging
+import threading
 import time
 
 from botocore.exceptions import ClientError
@@ -26,6 +28,9 @@ from touchdown.core.action import Action
 from touchdown.core.plan import Present
 from touchdown.core.diff import DiffSet
 
+from .batcher import Batcher, find_identifier, get_identifier, with_identifiers
+from .inventory import Inventory
+
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +51,11 @@ class Waiter(Action):
 
     def poll(self):
         filters = self.plan.get_describe_filters()
+        if filters is None:
+            # The object (or one it depends on) hasn't been described yet, so
+            # there is nothing to poll for
+            logger.debug("Not polling with waiter {} as there are no filters yet".format(self.waiter))
+            return {}
         logger.debug("Polling with waiter {} and filters {}".format(self.waiter, filters))
         return self.waiter._operation_method(**filters)
 
@@ -93,7 +103,9 @@ class Waiter(Action):
         else:
             raise errors.Error("Operation took too long to complete")
 
-        self.plan.object = self.plan.describe_object()
+        # Whatever we were waiting for has changed the remote object
+        self.plan.invalidate()
+        self.plan.object = self.plan.get_object()
 
 
 class GenericAction(Action):
@@ -127,19 +139,21 @@ class GenericAction(Action):
             object = self.func(**params)
         except ClientError as e:
             raise errors.Error("{}: {}".format(self.plan.resource, e))
+        finally:
+            self.plan.invalidate()
 
         if self.is_creation_action:
             if self.plan.create_response == "full-description":
                 self.plan.object = jmespath.search(
                     getattr(self.plan, "create_envelope", self.plan.describe_envelope[:-1]),
                     object,
-                )
+                ) or {}
             else:
                 if self.plan.create_response == "id-only":
                     self.plan.object = {
                         self.plan.key: object[self.plan.key]
                     }
-                self.plan.object = self.plan.describe_object()
+                self.plan.object = self.plan.get_object()
 
 
 class PostCreation(Action):
@@ -147,7 +161,10 @@ class PostCreation(Action):
     description = ["Sanity check created resource"]
 
     def run(self):
-        self.plan.object = self.plan.describe_object()
+        # Check with AWS, rather than any listing fetched before the object
+        # was visible
+        self.plan.invalidate()
+        self.plan.object = self.plan.get_object()
         if not self.plan.object:
             raise errors.Error("Object creation failed")
 
@@ -171,7 +188,7 @@ class RefreshMetadata(Action):
     description = ["Refresh resource metadata"]
 
     def run(self):
-        self.plan.object = self.plan.describe_object()
+        self.plan.object = self.plan.get_object()
 
 
 class SetTags(Action):
@@ -187,6 +204,7 @@ class SetTags(Action):
             yield "{} = {}".format(k, v)
 
     def run(self):
+        self.plan.invalidate()
         self.plan.client.create_tags(
             Resources=[self.plan.resource_id],
             Tags=[{"Key": k, "Value": v} for k, v in self.tags.items()],
@@ -203,9 +221,8 @@ class SimplePlan(object):
 
     @property
     def client(self):
-        session = self.session
         if not self._client:
-            self._client = session.create_client(self.service_name)
+            self._client = self.session.create_client(self.service_name, self.runner.get_pool_size(self.service_name))
         return self._client
 
 
@@ -216,6 +233,18 @@ class SimpleDescribe(SimplePlan):
     describe_filters = None
     describe_notfound_exception = None
 
+    # If describe_filters is static the listing is shared by every plan of
+    # the same type via the goal's inventory. Setting inventory_index to the
+    # field that holds the resource name makes lookups in it O(1).
+    inventory_index = None
+
+    # Maps list style describe parameters (or EC2 filter names) to the field
+    # of each result that holds the same identifier. Describes using one of
+    # them are batched with other plans making the same call at the same
+    # time, up to describe_batch_limit identifiers per call.
+    describe_batch = {}
+    describe_batch_limit = 50
+
     signature = (
         Present('name'),
     )
@@ -223,6 +252,9 @@ class SimpleDescribe(SimplePlan):
     def __init__(self, runner, resource):
         super(SimpleDescribe, self).__init__(runner, resource)
         self.object = {}
+        self.generation = 0
+        self.described = None
+        self.describe_lock = threading.Lock()
 
     def get_describe_filters(self):
         return {
@@ -240,7 +272,7 @@ class SimpleDescribe(SimplePlan):
                     yield result
         except ClientError as e:
             if e.response['Error']['Code'] == self.describe_notfound_exception:
-                raise StopIteration
+                return
             raise errors.Error("{}: {}".format(self.resource, e))
         except Exception as e:
             raise errors.Error("{}: {}".format(self.resource, e))
@@ -262,24 +294,114 @@ class SimpleDescribe(SimplePlan):
             return [results]
         return results
 
+    def _get_matches(self, filters):
+        if self.client.can_paginate(self.describe_action):
+            return self._get_paginated_matches(filters)
+        return self._get_unpaginated_matches(filters)
+
+    @property
+    def inventory(self):
+        return self.runner.get_shared("inventory", Inventory)
+
+    def get_inventory_key(self):
+        return (
+            self.client,
+            self.describe_action,
+            json.dumps(self.describe_filters, sort_keys=True),
+        )
+
+    def _get_inventory_matches(self):
+        listing = self.inventory.get(
+            self.get_inventory_key(),
+            lambda: self._get_matches(self.describe_filters),
+        )
+        if self.inventory_index:
+            results = listing.lookup(self.inventory_index, self.resource.name)
+        else:
+            results = listing.results
+        # Plans are free to modify what they describe, so don't let them
+        # modify the shared listing
+        return [dict(r) for r in results]
+
+    @property
+    def batcher(self):
+        # Running serially, nothing could join a batch while waiting for it
+        window = Batcher.window if self.runner.get_workers() > 1 else 0
+        return self.runner.get_shared("batcher", lambda: Batcher(window))
+
+    def _get_batch_matches(self, filters):
+        # Unlike _get_matches a missing object fails the whole call, so that
+        # the caller can fall back to describing them one at a time.
+        if self.client.can_paginate(self.describe_action):
+            pages = self.client.get_paginator(self.describe_action).paginate(**filters)
+        else:
+            pages = [getattr(self.client, self.describe_action)(**filters)]
+        results = []
+        for page in pages:
+            results.extend(jmespath.search(self.describe_envelope, page) or [])
+        return results
+
+    def _get_batched_matches(self, filters):
+        identifier = find_identifier(filters, self.describe_batch)
+        if not identifier:
+            return self._get_matches(filters)
+        path, value = identifier
+
+        def fetch(values):
+            if len(values) == 1:
+                return self._get_matches(filters)
+            return self._get_batch_matches(with_identifiers(filters, path, values))
+
+        key = self.batcher.get_key(self.client, self.describe_action, filters, path)
+        try:
+            results = self.batcher.describe(key, value, fetch, self.describe_batch_limit)
+        except errors.Error:
+            raise
+        except Exception as e:
+            logger.debug("Batched {} failed ({}), describing {} on its own".format(self.describe_action, e, self.resource))
+            return self._get_matches(filters)
+
+        field = self.describe_batch[path[-1]]
+        return [dict(r) for r in results if get_identifier(r, field) == value]
+
+    def invalidate(self):
+        """ Called when an action has changed the remote object, so that it
+        (and any cached listing containing it) is described again """
+        with self.describe_lock:
+            self.generation += 1
+        if self.describe_action and self.describe_filters is not None:
+            self.inventory.invalidate(self.get_inventory_key())
+
+    def get_object(self):
+        """ Like describe_object, but only describes the remote object again
+        if an action has changed it since it was last described. Polling
+        loops should call describe_object directly. Every run of the goal
+        describes it again. """
+        generation = (self.runner.runs, self.generation)
+        with self.describe_lock:
+            if self.described is None or self.described[0] != generation:
+                self.described = (generation, self.describe_object())
+            object = self.described[1]
+        if object is None:
+            object = {}
+        if isinstance(object, dict):
+            object = dict(object)
+        return object
+
     def describe_object(self):
         logger.debug("Trying to find AWS object for resource {} using {}".format(self.resource, self.describe_action))
 
         if self.describe_filters is not None:
-            filters = self.describe_filters
+            results = self._get_inventory_matches()
         else:
             filters = self.get_describe_filters()
 
-        if filters is None:
-            logger.debug("Could not generate valid filters - this generally means we've determined the object cant exist!")
-            return {}
+            if filters is None:
+                logger.debug("Could not generate valid filters - this generally means we've determined the object cant exist!")
+                return {}
 
-        logger.debug("Filters are: {}".format(filters))
-
-        if self.client.can_paginate(self.describe_action):
-            results = self._get_paginated_matches(filters)
-        else:
-            results = self._get_unpaginated_matches(filters)
+            logger.debug("Filters are: {}".format(filters))
+            results = self._get_batched_matches(filters)
 
         objects = list(filter(self.describe_object_matches, results or []))
 
@@ -305,7 +427,7 @@ class SimpleDescribe(SimplePlan):
         return Waiter(self, description, waiter, eventual_consistency_threshold)
 
     def get_actions(self):
-        self.object = self.describe_object()
+        self.object = self.get_object()
 
         if not self.object:
             raise errors.NotFound("Object '{}' could not be found, and is not scheduled to be created".format(self.resource))
@@ -383,7 +505,7 @@ class SimpleApply(SimpleDescribe):
                 )
 
     def get_actions(self):
-        self.object = self.describe_object()
+        self.object = self.get_object()
 
         for change in self.prepare_to_create():
             yield change
@@ -442,7 +564,7 @@ class SimpleDestroy(SimpleDescribe):
             )
 
     def get_actions(self):
-        self.object = self.describe_object()
+        self.object = self.get_object()
 
         if not self.object:
             logger.debug("Resource '{}' not found - assuming already destroyed".format(self.resource))
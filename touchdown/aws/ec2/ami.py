@@ -184,6 +184,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_images"
     describe_envelope = "Images"
     key = 'ImageId'
+    describe_batch = {'name': 'Name'}
 
     def get_describe_filters(self):
         return {"Filters": [{"Name": "name", "Values": [self.resource.name]}]}
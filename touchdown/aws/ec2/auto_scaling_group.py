@@ -156,7 +156,8 @@ class ReplaceInstances(Action):
 
         # Make sure that our dependents have up to date intel on instances we
         # have just brought into service
-        self.plan.object = self.plan.describe_object()
+        self.plan.invalidate()
+        self.plan.object = self.plan.get_object()
 
 
 class GracefulReplacement(ReplaceInstances):
@@ -203,6 +204,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_auto_scaling_groups"
     describe_envelope = "AutoScalingGroups"
     key = 'AutoScalingGroupName'
+    describe_batch = {"AutoScalingGroupNames": "AutoScalingGroupName"}
 
     def get_describe_filters(self):
         return {"AutoScalingGroupNames": [self.resource.name]}
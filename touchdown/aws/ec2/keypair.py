@@ -38,6 +38,7 @@ class Describe(SimpleDescribe, Plan):
     describe_envelope = "KeyPairs"
     describe_notfound_exception = "InvalidKeyPair.NotFound"
     key = 'KeyName'
+    describe_batch = {"KeyNames": "KeyName"}
 
     def get_describe_filters(self):
         return {"KeyNames": [self.resource.name]}
@@ -80,6 +80,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "list_pipelines"
     describe_envelope = "Pipelines"
     describe_filters = {}
+    inventory_index = 'Name'
     key = 'Id'
 
     def describe_object_matches(self, pipeline):
@@ -126,6 +126,8 @@ class Describe(SimpleDescribe, Plan):
     describe_envelope = "LoadBalancerDescriptions"
     describe_notfound_exception = "LoadBalancerNotFound"
     key = 'LoadBalancerName'
+    describe_batch = {"LoadBalancerNames": "LoadBalancerName"}
+    describe_batch_limit = 20
 
     def get_describe_filters(self):
         return {"LoadBalancerNames": [self.resource.name]}
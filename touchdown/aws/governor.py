@@ -0,0 +1,175 @@
+# Copyright 2014 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import logging
+import random
+import threading
+import time
+
+from touchdown.core.map import feedback
+
+
+logger = logging.getLogger(__name__)
+
+
+THROTTLING_ERRORS = frozenset((
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "RequestLimitExceeded",
+    "RequestThrottled",
+    "TooManyRequestsException",
+    "PriorRequestNotComplete",
+    "ProvisionedThroughputExceededException",
+    "SlowDown",
+))
+
+
+def is_throttled(response):
+    """ Does a parsed botocore response represent a throttling error? """
+    return response.get("Error", {}).get("Code") in THROTTLING_ERRORS
+
+
+class TokenBucket(object):
+
+    """ A rate limiter whose rate adapts to throttling.
+
+    Callers reserve a token and are told how long to wait before they may
+    use it. The balance is allowed to go negative, which queues callers
+    fairly without a background thread. A throttling response halves the
+    rate, and every successful call nudges it back up towards ``maximum``. """
+
+    minimum = 0.5
+    increase = 0.1
+
+    def __init__(self, rate, burst=None, maximum=None):
+        self.lock = threading.Lock()
+        self.rate = float(rate)
+        self.burst = burst or max(1, int(rate))
+        self.maximum = maximum or self.rate * 4
+        self.tokens = float(self.burst)
+        self.last = time.time()
+
+    def reserve(self):
+        """ Take a token, returning the number of seconds to wait before
+        using it """
+        with self.lock:
+            now = time.time()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+    def throttled(self):
+        with self.lock:
+            self.rate = max(self.minimum, self.rate / 2)
+
+    def succeeded(self):
+        with self.lock:
+            self.rate = min(self.maximum, self.rate + self.increase)
+
+
+class Governor(object):
+
+    """ Shares AWS API capacity between every worker thread.
+
+    There is a token bucket for each (account, region, service). Every
+    client created by :class:`touchdown.aws.session.Session` takes a token
+    before each call. Throttled calls are retried with full jitter
+    exponential backoff, and the backoff also waits for a fresh token. """
+
+    # Requests per second to start at. These adapt to throttling.
+    default_rate = 25
+    rates = {
+        "cloudfront": 5,
+        "iam": 10,
+        "route53": 5,
+    }
+
+    max_attempts = 8
+    base_delay = 0.5
+    max_delay = 20
+
+    def __init__(self, feedback=feedback):
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.feedback = feedback
+        self.local = threading.local()
+
+    def get_bucket(self, key):
+        with self.lock:
+            if key not in self.buckets:
+                account, region, service = key
+                self.buckets[key] = TokenBucket(self.rates.get(service, self.default_rate))
+            return self.buckets[key]
+
+    def get_group(self, key):
+        account, region, service = key
+        return "{} ({})".format(service, region)
+
+    def attach(self, client, account, region, service):
+        key = (account, region, service)
+        client.meta.events.register_first("before-call", functools.partial(self.before_call, key))
+        client.meta.events.register_first("needs-retry", functools.partial(self.needs_retry, key))
+
+    def wait(self, key, bucket):
+        delay = bucket.reserve()
+        if delay:
+            self.feedback.record_wait(delay, self.get_group(key))
+        return delay
+
+    def before_call(self, key, params, **kwargs):
+        delay = self.wait(key, self.get_bucket(key))
+        if delay:
+            time.sleep(delay)
+        # needs-retry isn't passed the request on every version of botocore,
+        # but it is always called on the same thread as before-call
+        self.local.started = time.time()
+
+    def get_backoff(self, attempts):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempts)))
+
+    def needs_retry(self, key, attempts, response=None, **kwargs):
+        # Called once per HTTP attempt. Only the first attempt is timed as the
+        # start time isn't reset before a retry.
+        bucket = self.get_bucket(key)
+        started = getattr(self.local, "started", None)
+        self.local.started = None
+        throttled = bool(response) and is_throttled(response[1])
+
+        self.feedback.record_call(
+            latency=time.time() - started if started else None,
+            throttled=throttled,
+            group=self.get_group(key),
+        )
+
+        if not throttled:
+            if response:
+                bucket.succeeded()
+            # Let botocore decide whether to retry other kinds of failure
+            return None
+
+        bucket.throttled()
+        if attempts >= self.max_attempts:
+            logger.debug("Giving up on throttled call to {} after {} attempts".format(key[2], attempts))
+            return None
+
+        return self.get_backoff(attempts) + self.wait(key, bucket)
+
+
+governor = Governor()
@@ -14,11 +14,16 @@
 
 from touchdown.core.resource import Resource
 from touchdown.core.plan import Plan
-from touchdown.core import argument
+from touchdown.core import argument, errors
 
 from ..account import BaseAccount
 from ..common import SimpleDescribe, SimpleApply, SimpleDestroy
-from .role import Role
+from .role import Role, Describe as RoleDescribe, list_roles
+
+
+def get_instance_profiles(role):
+    for instance_profile in role.get('InstanceProfileList', []):
+        yield instance_profile['InstanceProfileName'], instance_profile
 
 
 class InstanceProfile(Resource):
@@ -35,18 +40,48 @@ class Describe(SimpleDescribe, Plan):
 
     resource = InstanceProfile
     service_name = 'iam'
-    describe_action = "list_instance_profiles"
-    describe_envelope = "InstanceProfiles"
-    describe_filters = {}
+
+    # Instance profiles are found in the same account snapshot as roles
+    describe_action = RoleDescribe.describe_action
+    describe_envelope = RoleDescribe.describe_envelope
+    describe_filters = RoleDescribe.describe_filters
     key = 'InstanceProfileName'
 
     def describe_object_matches(self, instance_profile):
         return instance_profile['InstanceProfileName'] == self.resource.name
 
+    def get_fallback_key(self):
+        return (self.client, "list_instance_profiles")
+
+    def _list_instance_profiles(self):
+        try:
+            for page in self.client.get_paginator("list_instance_profiles").paginate():
+                for instance_profile in page['InstanceProfiles']:
+                    yield instance_profile
+        except Exception as e:
+            raise errors.Error("{}: {}".format(self.resource, e))
+
+    def _get_inventory_matches(self):
+        listing = self.inventory.get(self.get_inventory_key(), lambda: list_roles(self.client, self.resource))
+        results = listing.lookup('InstanceProfileName', self.resource.name, get_instance_profiles)
+        if results:
+            # The same profile is listed under each of its roles
+            return [dict(results[0])]
+
+        # An instance profile without any roles isn't in the snapshot, and
+        # none are if the snapshot came from list_roles
+        listing = self.inventory.get(self.get_fallback_key(), self._list_instance_profiles)
+        return [dict(r) for r in listing.lookup('InstanceProfileName', self.resource.name)]
+
+    def invalidate(self):
+        super(Describe, self).invalidate()
+        self.inventory.invalidate(self.get_fallback_key())
+
 
 class Apply(SimpleApply, Describe):
 
     create_action = "create_instance_profile"
+    create_envelope = "InstanceProfile"
 
     def update_object(self):
         # Make sure all roles in the workspace are linked up to the
@@ -13,7 +13,10 @@
 # limitations under the License.
 
 import json
+import logging
+
 import requests
+from botocore.exceptions import ClientError
 
 from touchdown.core.resource import Resource
 from touchdown.core.plan import Plan
@@ -23,6 +26,37 @@ from ..account import BaseAccount
 from ..common import SimpleDescribe, SimpleApply, SimpleDestroy
 
 
+logger = logging.getLogger(__name__)
+
+
+def list_roles(client, resource):
+    """ Returns every role in the account, with its instance profiles and
+    inline policies. Users that can't call GetAccountAuthorizationDetails
+    get the plain ``list_roles`` results instead. """
+    roles = []
+    kwargs = {"Filter": ["Role"]}
+    try:
+        # Not every version of botocore can paginate this call
+        while True:
+            page = client.get_account_authorization_details(**kwargs)
+            roles.extend(page['RoleDetailList'])
+            if not page.get('IsTruncated', False):
+                return roles
+            kwargs['Marker'] = page['Marker']
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'AccessDenied':
+            raise errors.Error("{}: {}".format(resource, e))
+    except Exception as e:
+        raise errors.Error("{}: {}".format(resource, e))
+
+    logger.debug("Not allowed to get account authorization details, falling back to list_roles")
+    try:
+        paginator = client.get_paginator("list_roles")
+        return [role for page in paginator.paginate() for role in page['Roles']]
+    except Exception as e:
+        raise errors.Error("{}: {}".format(resource, e))
+
+
 class Role(Resource):
 
     resource_name = "role"
@@ -58,22 +92,84 @@ class Describe(SimpleDescribe, Plan):
 
     resource = Role
     service_name = 'iam'
-    describe_action = "list_roles"
-    describe_envelope = "Roles"
-    describe_filters = {}
+
+    # Every role in the account, with its instance profiles and inline
+    # policies, is fetched once and shared by every IAM plan in the goal.
+    # See list_roles.
+    describe_action = "get_account_authorization_details"
+    describe_envelope = "RoleDetailList"
+    describe_filters = {"Filter": ["Role"]}
+    inventory_index = 'RoleName'
     key = 'RoleName'
 
     def describe_object_matches(self, role):
         return role['RoleName'] == self.resource.name
 
+    def _get_role(self):
+        """ Describes just this role, in the same shape as the snapshot """
+        try:
+            role = self.client.get_role(RoleName=self.resource.name)['Role']
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchEntity':
+                return None
+            raise errors.Error("{}: {}".format(self.resource, e))
+
+        try:
+            role['RolePolicyList'] = [{
+                'PolicyName': name,
+                'PolicyDocument': self.client.get_role_policy(
+                    RoleName=self.resource.name,
+                    PolicyName=name,
+                )['PolicyDocument'],
+            } for name in self.client.list_role_policies(RoleName=self.resource.name)['PolicyNames']]
+            role['InstanceProfileList'] = self.client.list_instance_profiles_for_role(
+                RoleName=self.resource.name,
+            )['InstanceProfiles']
+        except ClientError as e:
+            raise errors.Error("{}: {}".format(self.resource, e))
+        return role
+
+    def _get_inventory_matches(self):
+        listing = self.inventory.get(self.get_inventory_key(), lambda: list_roles(self.client, self.resource))
+        return [dict(r) for r in listing.lookup(self.inventory_index, self.resource.name)]
+
+    def invalidate(self):
+        """ Swaps the changed role into the account snapshot, rather than
+        fetching the whole snapshot again """
+        with self.describe_lock:
+            self.generation += 1
+        listing = self.inventory.peek(self.get_inventory_key())
+        if listing is None:
+            return
+        try:
+            listing.replace('RoleName', self.resource.name, self._get_role())
+        except Exception as e:
+            logger.debug("Couldn't describe {} again ({}), the snapshot will be fetched again".format(self.resource, e))
+            self.inventory.invalidate(self.get_inventory_key())
+
+    def get_remote_policies(self):
+        if not self.object:
+            return {}
+
+        if 'RolePolicyList' in self.object:
+            return dict(
+                (p['PolicyName'], p['PolicyDocument']) for p in self.object['RolePolicyList']
+            )
+
+        # Roles from the list_roles fallback don't include their policies
+        policy_names = self.client.list_role_policies(RoleName=self.resource.name)['PolicyNames']
+        return dict(
+            (name, self.client.get_role_policy(RoleName=self.resource.name, PolicyName=name)['PolicyDocument'])
+            for name in policy_names
+        )
+
 
 class Apply(SimpleApply, Describe):
 
     create_action = "create_role"
+    create_envelope = "Role"
 
     def update_object(self):
-        policy_names = []
-
         for change in super(Apply, self).update_object():
             yield change
 
@@ -86,33 +182,11 @@ class Apply(SimpleApply, Describe):
                 PolicyDocument=serializers.Json(serializers.Argument("assume_role_policy")),
             )
 
-        # If the object exists then we can look at the roles it has
-        # Otherwise we assume its a new role and it will have no policies
-        if self.object:
-            policy_names = self.client.list_role_policies(
-                RoleName=self.resource.name,
-            )['PolicyNames']
+        # The account snapshot includes the inline policies of every role
+        remote_policies = self.get_remote_policies()
 
         for name, document in self.resource.policies.items():
-            changed = False
-            if name not in policy_names:
-                changed = True
-
-            # We can't do a single API to get all names and documents for all
-            # policies, so for each policy that *might* have changed we have to
-            # call teh API and check.
-            # Save an API call by only doing it for policies that definitely
-            # exist
-            if not changed:
-                policy = self.client.get_role_policy(
-                    RoleName=self.resource.name,
-                    PolicyName=name,
-                )
-
-                if policy['PolicyDocument'] != document:
-                    changed = True
-
-            if changed:
+            if remote_policies.get(name, None) != document:
                 yield self.generic_action(
                     "Put policy {}".format(name),
                     self.client.put_role_policy,
@@ -121,7 +195,7 @@ class Apply(SimpleApply, Describe):
                     PolicyDocument=json.dumps(document),
                 )
 
-        for name in policy_names:
+        for name in remote_policies:
             if name not in self.resource.policies:
                 yield self.generic_action(
                     "Delete policy {}".format(name),
@@ -136,8 +210,7 @@ class Destroy(SimpleDestroy, Describe):
     destroy_action = "delete_role"
 
     def destroy_object(self):
-        result = self.client.list_role_policies(RoleName=self.resource.name)
-        for name in result.get('PolicyNames', []):
+        for name in self.get_remote_policies():
             yield self.generic_action(
                 "Delete policy {}".format(name),
                 self.client.delete_role_policy,
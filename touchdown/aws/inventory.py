@@ -0,0 +1,101 @@
+# Copyright 2014 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class Listing(object):
+
+    """ The results of a single list style API call, optionally indexed by
+    one or more fields """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.results = None
+        self.indexes = {}
+
+    def fetch(self, fetcher):
+        with self.lock:
+            if self.results is None:
+                self.results = list(fetcher())
+            return self.results
+
+    def lookup(self, field, value, get_items=None):
+        """ Returns the results whose ``field`` is ``value``. To look up
+        things nested inside each result, pass ``get_items``, a function that
+        returns the ``(value, item)`` pairs to index a result by. """
+        with self.lock:
+            if field not in self.indexes:
+                index = self.indexes[field] = {}
+                for result in self.results:
+                    items = get_items(result) if get_items else [(result.get(field), result)]
+                    for key, item in items:
+                        index.setdefault(key, []).append(item)
+            return self.indexes[field].get(value, [])
+
+    def replace(self, field, value, result):
+        """ Replaces the results whose ``field`` is ``value`` with ``result``
+        (or removes them if it is ``None``), for when a plan knows exactly
+        which result it has changed. """
+        with self.lock:
+            if self.results is None:
+                # Fetching failed, so the next fetch will include the change
+                return
+            self.results = [r for r in self.results if r.get(field) != value]
+            if result is not None:
+                self.results.append(result)
+            self.indexes = {}
+
+
+class Inventory(object):
+
+    """ Shares the results of account-wide listings (``list_roles``,
+    ``list_topics``, etc) between all the plans in a goal.
+
+    Each listing is fetched at most once. If several plans ask for the same
+    listing at the same time, one of them makes the API calls and the others
+    wait for it. Plans invalidate the listing when they change something
+    that would appear in it. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.listings = {}
+        self.fetches = 0
+        self.hits = 0
+
+    def get(self, key, fetcher):
+        with self.lock:
+            listing = self.listings.get(key)
+            if listing is None:
+                listing = self.listings[key] = Listing()
+                self.fetches += 1
+            else:
+                self.hits += 1
+        listing.fetch(fetcher)
+        return listing
+
+    def peek(self, key):
+        """ Returns the listing for ``key`` if a plan has already asked for
+        it, without fetching it """
+        with self.lock:
+            return self.listings.get(key)
+
+    def invalidate(self, key):
+        with self.lock:
+            if self.listings.pop(key, None):
+                logger.debug("Invalidated inventory for {}".format(key[1:]))
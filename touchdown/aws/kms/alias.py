@@ -39,6 +39,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "list_aliases"
     describe_envelope = "Aliases"
     describe_filters = {}
+    inventory_index = 'AliasName'
     key = 'AliasName'
 
     def describe_object_matches(self, role):
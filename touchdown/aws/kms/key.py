@@ -12,16 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
+
 from botocore.exceptions import ClientError
 
 from touchdown.core.resource import Resource
 from touchdown.core.plan import Plan
-from touchdown.core import argument, serializers
+from touchdown.core import argument, errors, serializers
 
 from ..account import BaseAccount
 from ..common import SimpleDescribe, SimpleApply, SimpleDestroy
 
 
+logger = logging.getLogger(__name__)
+
+
 class Key(Resource):
 
     resource_name = "key"
@@ -42,19 +47,80 @@ class Describe(SimpleDescribe, Plan):
     describe_filters = {}
     key = 'KeyId'
 
-    def describe_object_matches(self, key):
+    # Set when an action has changed this key, so that just this key is
+    # described again instead of every key in the account
+    stale = False
+
+    def get_inventory_key(self):
+        return (self.client, "describe_key")
+
+    def _describe_key(self, key_id):
         try:
-            metadata = self.client.describe_key(KeyId=key['KeyId'])
+            return self.client.describe_key(KeyId=key_id)['KeyMetadata']
         except ClientError as e:
             if e.response['Error']['Code'] == 'AccessDeniedException':
-                return False
+                logger.debug("Not allowed to describe key {}".format(key_id))
+                return None
+            if e.response['Error']['Code'] == 'NotFoundException':
+                return None
             raise
-        return metadata['Description'] == self.resource.description
+
+    def _describe_keys(self):
+        # Keys don't have names, so they are matched on their description.
+        # That means calling describe_key for every key in the account, which
+        # is done once per goal (on the goal's workers) and shared by every
+        # key plan.
+        key_ids = [key['KeyId'] for key in self._get_matches(self.describe_filters)]
+        results = []
+        failures = []
+
+        def describe(key_id):
+            try:
+                metadata = self._describe_key(key_id)
+            except Exception as e:
+                failures.append("{}: {}".format(key_id, e))
+            else:
+                if metadata:
+                    results.append(metadata)
+
+        self.runner.run_tasks(describe, key_ids, self.service_name)
+
+        if failures:
+            raise errors.Error("Unable to describe KMS keys:\n{}".format("\n".join(sorted(failures))))
+
+        logger.debug("Described {} KMS keys".format(len(results)))
+        return results
+
+    def _refresh_key(self, listing):
+        key_id = self.object.get('KeyId', None)
+        if not key_id:
+            # We don't know which key changed (e.g. creating it failed)
+            self.inventory.invalidate(self.get_inventory_key())
+            return self.inventory.get(self.get_inventory_key(), self._describe_keys)
+
+        try:
+            listing.replace('KeyId', key_id, self._describe_key(key_id))
+        except ClientError as e:
+            raise errors.Error("{}: {}".format(self.resource, e))
+        return listing
+
+    def _get_inventory_matches(self):
+        listing = self.inventory.get(self.get_inventory_key(), self._describe_keys)
+        if self.stale:
+            listing = self._refresh_key(listing)
+            self.stale = False
+        return [dict(r) for r in listing.lookup('Description', self.resource.description)]
+
+    def invalidate(self):
+        with self.describe_lock:
+            self.generation += 1
+            self.stale = True
 
 
 class Apply(SimpleApply, Describe):
 
     create_action = "create_key"
+    create_envelope = "KeyMetadata"
 
     signature = []
 
@@ -12,15 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import logging
 import uuid
 
+from botocore.exceptions import ClientError
+
+from touchdown.core.action import Action
 from touchdown.core.plan import Plan
-from touchdown.core import argument, serializers
+from touchdown.core import argument, errors, serializers
 
 from ..account import BaseAccount
 from ..common import Resource, SimpleDescribe, SimpleApply, SimpleDestroy
 from ..vpc import VPC
 from .alias_target import AliasTarget
+from . import zone_file
+
+
+logger = logging.getLogger(__name__)
 
 
 def _normalize(dns_name):
@@ -32,6 +41,16 @@ def _normalize(dns_name):
     return dns_name.rstrip('.') + "."
 
 
+def _get_record_key(name, type, set_identifier):
+    """
+    Route53 only allows one record set with a given name, type and set
+    identifier, so these are enough to pair up local and remote records.
+    """
+    if set_identifier is not None:
+        set_identifier = str(set_identifier)
+    return (name, type, set_identifier)
+
+
 class Record(Resource):
 
     resource_name = "record"
@@ -71,6 +90,9 @@ class HostedZone(Resource):
 
     resource_name = "hosted_zone"
 
+    # The zone file is loaded relative to the (cleaned) zone name
+    field_order = ["name"]
+
     extra_serializers = {
         "CallerReference": serializers.Expression(lambda x, y: str(uuid.uuid4())),
     }
@@ -86,6 +108,10 @@ class HostedZone(Resource):
 
     records = argument.ResourceList(Record)
 
+    zone_file = argument.String()
+    """ A BIND zone file (or a CSV file with name, type, ttl and value
+    columns) of records to manage as well as ``records`` """
+
     shared = argument.Boolean()
     """ If a hosted zone is shared then it won't be destroyed and DNS records will never be deleted """
 
@@ -94,6 +120,9 @@ class HostedZone(Resource):
     def clean_name(self, name):
         return _normalize(name)
 
+    def clean_zone_file(self, path):
+        return zone_file.load(path, self.name)
+
 
 class Describe(SimpleDescribe, Plan):
 
@@ -102,12 +131,66 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "list_hosted_zones"
     describe_envelope = "HostedZones"
     describe_filters = {}
+    inventory_index = 'Name'
     key = 'Id'
 
     def describe_object_matches(self, zone):
         return zone['Name'] == self.resource.name
 
 
+class ChangeRecords(Action):
+
+    """ Sends a list of record changes to Route53. They are split into as
+    few ``change_resource_record_sets`` calls as Route53's per-request limits
+    allow. """
+
+    # Route53 allows up to 1000 ResourceRecord elements and 32000 characters
+    # of values per request, and counts each UPSERT twice against both.
+    max_records = 1000
+    max_characters = 32000
+
+    def __init__(self, plan, description, changes):
+        super(ChangeRecords, self).__init__(plan)
+        self.description = description
+        self.changes = changes
+
+    def get_cost(self, change):
+        values = change['ResourceRecordSet'].get('ResourceRecords', [])
+        records = max(len(values), 1)
+        characters = sum(len(v['Value']) for v in values)
+        if change['Action'] == "UPSERT":
+            return records * 2, characters * 2
+        return records, characters
+
+    def get_batches(self, changes):
+        batch, records, characters = [], 0, 0
+        for change in changes:
+            cost = self.get_cost(change)
+            if batch and (records + cost[0] > self.max_records or characters + cost[1] > self.max_characters):
+                yield batch
+                batch, records, characters = [], 0, 0
+            batch.append(change)
+            records += cost[0]
+            characters += cost[1]
+        if batch:
+            yield batch
+
+    def run(self):
+        changes = [change.render(self.runner, self.resource) for change in self.changes]
+        batches = list(self.get_batches(changes))
+        for i, batch in enumerate(batches, start=1):
+            logger.debug("Sending batch {} of {} ({} changes) to {}".format(i, len(batches), len(batch), self.resource))
+            try:
+                self.plan.client.change_resource_record_sets(
+                    HostedZoneId=self.plan.resource_id,
+                    ChangeBatch={"Changes": batch},
+                )
+            except ClientError as e:
+                raise errors.Error("{}: {}".format(self.resource, e))
+            finally:
+                self.plan.invalidate()
+
+
 class Apply(SimpleApply, Describe):
 
     create_action = "create_hosted_zone"
@@ -120,53 +203,64 @@ class Apply(SimpleApply, Describe):
 
         # Retrieve all DNS records associated with this hosted zone
         # Ignore SOA and NS records for the top level domain
-        if self.resource_id:
-            for record in self.client.list_resource_record_sets(HostedZoneId=self.resource_id)['ResourceRecordSets']:
+        paginator = self.client.get_paginator("list_resource_record_sets")
+        for page in paginator.paginate(HostedZoneId=self.resource_id):
+            for record in page['ResourceRecordSets']:
                 if record['Type'] in ('SOA', 'NS') and record['Name'] == self.resource.name:
                     continue
+                # So that wildcards (returned as \052) match local records
+                record['Name'] = zone_file.unescape(record['Name'])
                 yield record
 
+    def get_zone_file_changes(self, remote_records, local_keys):
+        table = self.resource.zone_file
+        if not table:
+            return
+
+        for key in table:
+            if key in local_keys:
+                raise errors.Error("{} {} is in both the records and the zone_file of {}".format(key[0], key[1], self.resource))
+            local_keys.add(key)
+            remote = remote_records.get(key)
+            if remote and table.matches(key, remote):
+                continue
+            yield key, {"Action": "UPSERT", "ResourceRecordSet": table.get_record_set(key)}
+
     def update_object(self):
         changes = []
         description = ["Update hosted zone records"]
 
-        remote_records = list(self.get_remote_records())
+        remote_records = collections.OrderedDict()
+        for remote in self.get_remote_records():
+            key = _get_record_key(remote["Name"], remote["Type"], remote.get("SetIdentifier", None))
+            remote_records[key] = remote
+
+        local_keys = set()
         for local in self.resource.records:
-            for remote in remote_records:
-                if local.matches(self.runner, remote):
-                    break
-            else:
-                changes.append(serializers.Dict(
-                    Action="UPSERT",
-                    ResourceRecordSet=serializers.Context(serializers.Const(local), serializers.Resource()),
-                ))
-                description.append("Name => {}, Type={}, Action=UPSERT".format(local.name, local.type))
+            key = _get_record_key(local.name, local.type, local.set_identifier)
+            local_keys.add(key)
+            remote = remote_records.get(key)
+            if remote and local.matches(self.runner, remote):
+                continue
+            changes.append(serializers.Dict(
+                Action="UPSERT",
+                ResourceRecordSet=serializers.Context(serializers.Const(local), serializers.Resource()),
+            ))
+            description.append("Name => {}, Type={}, Action=UPSERT".format(local.name, local.type))
+
+        for key, change in self.get_zone_file_changes(remote_records, local_keys):
+            changes.append(serializers.Const(change))
+            description.append("Name => {}, Type={}, Action=UPSERT".format(key[0], key[1]))
 
         if not self.resource.shared:
-            for remote in remote_records:
-                for local in self.resource.records:
-                    if remote["Name"] != local.name:
-                        continue
-                    if remote["Type"] != local.type:
-                        continue
-                    if remote.get("SetIdentifier", None) != local.set_identifier:
-                        continue
-                    break
-                else:
-                    changes.append(serializers.Const({"Action": "DELETE", "ResourceRecordSet": remote}))
-                    description.append("Name => {}, Type={}, Action=DELETE".format(remote["Name"], remote["Type"]))
+            for key, remote in remote_records.items():
+                if key in local_keys:
+                    continue
+                changes.append(serializers.Const({"Action": "DELETE", "ResourceRecordSet": remote}))
+                description.append("Name => {}, Type={}, Action=DELETE".format(remote["Name"], remote["Type"]))
 
         if changes:
-            yield self.generic_action(
-                description,
-                self.client.change_resource_record_sets,
-                serializers.Dict(
-                    HostedZoneId=serializers.Identifier(),
-                    ChangeBatch=serializers.Dict(
-                        Changes=serializers.Context(serializers.Const(changes), serializers.List(serializers.SubSerializer())),
-                    )
-                ),
-            )
+            yield ChangeRecords(self, description, changes)
 
 
 class Destroy(SimpleDestroy, Describe):
@@ -0,0 +1,247 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import csv
+import re
+
+from touchdown.core.errors import InvalidParameter
+
+
+RECORD_TYPES = ("A", "AAAA", "CAA", "CNAME", "MX", "NAPTR", "NS", "PTR", "SOA", "SPF", "SRV", "TXT")
+
+# The position of the domain name in the data of each type that has one, so
+# that relative names can be made absolute
+TARGETS = {
+    "CNAME": 0,
+    "MX": 1,
+    "NS": 0,
+    "PTR": 0,
+    "SRV": 3,
+}
+
+MAX_TTL = 2147483647
+
+TTL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+TOKEN_RE = re.compile(r'"(?:\\.|[^"\\])*"|[()]|[^\s()";]+|;.*')
+
+
+def tokenize(line):
+    """ Splits a line into tokens, keeping quoted strings (with their
+    quotes) together and dropping comments """
+    return [t for t in TOKEN_RE.findall(line) if not t.startswith(";")]
+
+
+def unescape(name):
+    """ Route53 returns some characters in names as octal escapes, for
+    example ``\\052`` for ``*`` """
+    return re.sub(r"\\(\d{3})", lambda m: chr(int(m.group(1), 8)), name)
+
+
+def parse_ttl(value):
+    if value.isdigit():
+        ttl = int(value)
+    else:
+        parts = re.findall(r"(\d+)([smhdw])", value.lower())
+        if not parts or "".join(n + u for n, u in parts) != value.lower():
+            raise InvalidParameter("'{}' is not a valid TTL".format(value))
+        ttl = sum(int(n) * TTL_UNITS[u] for n, u in parts)
+    if ttl > MAX_TTL:
+        raise InvalidParameter("TTL {} is too large".format(value))
+    return ttl
+
+
+def is_ttl(value):
+    return bool(re.match(r"^(\d+|(\d+[smhdwSMHDW])+)$", value))
+
+
+class RecordTable(object):
+
+    """ A compact table of record sets loaded in bulk from a zone file,
+    rather than a :class:`Record` resource for each of them. Each record set
+    is stored as ``[ttl, values]`` keyed by ``(name, type, None)``, the same
+    key the hosted zone uses to index the records in Route53. """
+
+    def __init__(self, zone):
+        self.zone = zone
+        self.origin = zone
+        self.records = collections.OrderedDict()
+
+    def qualify(self, name):
+        if name == "@":
+            return self.origin
+        if name.endswith("."):
+            return name
+        return "{}.{}".format(name, self.origin)
+
+    def add(self, name, type, ttl, data):
+        """ Validates and adds a single value. Values for the same name and
+        type are merged into one record set. """
+        name = self.qualify(name).lower()
+        type = type.upper()
+
+        if type not in RECORD_TYPES:
+            raise InvalidParameter("'{}' is not a record type that Route53 supports".format(type))
+        if name != self.zone and not name.endswith("." + self.zone):
+            raise InvalidParameter("'{}' is not in the zone {}".format(name, self.zone))
+        if ttl is None:
+            raise InvalidParameter("No TTL for {} {} (and no $TTL)".format(name, type))
+        if not data:
+            raise InvalidParameter("No value for {} {}".format(name, type))
+
+        # Route53 manages these itself
+        if type == "SOA" or (type == "NS" and name == self.zone):
+            return
+
+        if type in TARGETS and len(data) > TARGETS[type]:
+            data = list(data)
+            data[TARGETS[type]] = self.qualify(data[TARGETS[type]])
+
+        value = " ".join(data)
+        key = (name, type, None)
+        record = self.records.get(key)
+        if record is None:
+            self.records[key] = [ttl, [value]]
+            return
+        if record[0] != ttl:
+            raise InvalidParameter("All {} records for {} must have the same TTL".format(type, name))
+        if type == "CNAME":
+            raise InvalidParameter("There can only be one CNAME record for {}".format(name))
+        if value not in record[1]:
+            record[1].append(value)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def get_record_set(self, key):
+        ttl, values = self.records[key]
+        return {
+            "Name": key[0],
+            "Type": key[1],
+            "TTL": ttl,
+            "ResourceRecords": [{"Value": value} for value in values],
+        }
+
+    def matches(self, key, remote):
+        ttl, values = self.records[key]
+        if "AliasTarget" in remote or remote.get("TTL") != ttl:
+            return False
+        return sorted(r['Value'] for r in remote.get("ResourceRecords", [])) == sorted(values)
+
+
+def get_lines(fp):
+    """ Yields the line number and tokens of each entry in a zone file,
+    joining entries that are split over several lines with parentheses. The
+    first token is ``None`` if the entry doesn't start with a name. """
+    tokens, start, depth = [], None, 0
+    for i, line in enumerate(fp, start=1):
+        line_tokens = tokenize(line)
+        if not depth:
+            start = i
+            tokens = [None] if line[:1].isspace() else []
+        for token in line_tokens:
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth -= 1
+                if depth < 0:
+                    raise InvalidParameter("line {}: Unexpected ')'".format(i))
+            else:
+                tokens.append(token)
+        if not depth and [t for t in tokens if t is not None]:
+            yield start, tokens
+    if depth:
+        raise InvalidParameter("line {}: Missing ')'".format(start))
+
+
+def get_ttl_and_class(tokens, ttl):
+    """ The TTL and class of a record are both optional, and can be in
+    either order. Returns the TTL and the remaining tokens. """
+    tokens = list(tokens)
+    while tokens and (is_ttl(tokens[0]) or tokens[0].upper() in ("IN", "CH", "HS")):
+        if is_ttl(tokens[0]):
+            ttl = parse_ttl(tokens.pop(0))
+        elif tokens.pop(0).upper() != "IN":
+            raise InvalidParameter("Only the IN class is supported")
+    if not tokens:
+        raise InvalidParameter("No record type")
+    return ttl, tokens
+
+
+def parse_zone_file(fp, origin):
+    """ Parses a BIND style zone file into a :class:`RecordTable` """
+    table = RecordTable(origin)
+    ttl = None
+    name = None
+
+    for lineno, tokens in get_lines(fp):
+        try:
+            if tokens[0] == "$ORIGIN":
+                table.origin = table.qualify(tokens[1]).lower()
+                continue
+            elif tokens[0] == "$TTL":
+                ttl = parse_ttl(tokens[1])
+                continue
+            elif tokens[0] and tokens[0].startswith("$"):
+                raise InvalidParameter("{} is not supported".format(tokens[0]))
+
+            if tokens[0] is not None:
+                name = tokens[0]
+            elif name is None:
+                raise InvalidParameter("The first record must have a name")
+
+            record_ttl, rest = get_ttl_and_class(tokens[1:], ttl)
+            table.add(name, rest[0], record_ttl, rest[1:])
+        except (InvalidParameter, IndexError) as e:
+            raise InvalidParameter("line {}: {}".format(lineno, e.args[0] if isinstance(e, InvalidParameter) else "Incomplete entry"))
+
+    return table
+
+
+def parse_csv(fp, origin):
+    """ Parses a CSV file with ``name``, ``type``, ``ttl`` and ``value``
+    columns into a :class:`RecordTable`. There is a row for each value. """
+    table = RecordTable(origin)
+    reader = csv.DictReader(fp)
+
+    missing = set(("name", "type", "ttl", "value")) - set(reader.fieldnames or [])
+    if missing:
+        raise InvalidParameter("Missing column(s): {}".format(", ".join(sorted(missing))))
+
+    for row in reader:
+        try:
+            table.add(row['name'].strip(), row['type'].strip(), parse_ttl(row['ttl'].strip()), tokenize(row['value']))
+        except InvalidParameter as e:
+            raise InvalidParameter("line {}: {}".format(reader.line_num, e.args[0]))
+
+    return table
+
+
+def load(path, origin):
+    """ Loads a zone file, or a CSV file if ``path`` ends with ``.csv`` """
+    parse = parse_csv if path.lower().endswith(".csv") else parse_zone_file
+    try:
+        with open(path) as fp:
+            return parse(fp, origin)
+    except IOError as e:
+        raise InvalidParameter("Unable to read {}: {}".format(path, e))
+    except InvalidParameter as e:
+        raise InvalidParameter("{}: {}".format(path, e.args[0]))
@@ -19,12 +19,14 @@ from botocore.exceptions import ClientError
 
 from touchdown.core.resource import Resource
 from touchdown.core.plan import Plan
-from touchdown.core import argument
+from touchdown.core.action import Action
+from touchdown.core import argument, errors
 from touchdown.core.errors import InvalidParameter
 
 from ..account import BaseAccount
 from ..common import SimpleDescribe, SimpleApply, SimpleDestroy
 from touchdown.core import serializers
+from .transfer import Transfer
 
 
 class CorsRule(Resource):
@@ -83,6 +85,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "list_buckets"
     describe_envelope = "Buckets"
     describe_filters = {}
+    inventory_index = 'Name'
     key = 'Name'
 
     def describe_object_matches(self, bucket):
@@ -163,6 +166,31 @@ class Apply(SimpleApply, Describe):
             )
 
 
+class EmptyBucket(Action):
+
+    """ Deletes every object in a bucket, including old versions and delete
+    markers if it is (or ever was) versioned. Objects are deleted a page at a
+    time as they are listed rather than listing the whole bucket first. """
+
+    @property
+    def description(self):
+        yield "Delete all objects (and object versions) from {}".format(self.resource.name)
+
+    def get_pages(self):
+        paginator = self.plan.client.get_paginator("list_object_versions")
+        for page in paginator.paginate(Bucket=self.resource.name):
+            yield [
+                {"Key": v['Key'], "VersionId": v['VersionId']}
+                for v in page.get("Versions", []) + page.get("DeleteMarkers", [])
+            ]
+
+    def run(self):
+        try:
+            Transfer(self.plan.client, self.plan.echo).delete_pages(self.resource.name, self.get_pages())
+        except ClientError as e:
+            raise errors.Error("{}: {}".format(self.resource, e))
+
+
 class Destroy(SimpleDestroy, Describe):
 
     destroy_action = "delete_bucket"
@@ -173,20 +201,13 @@ class Destroy(SimpleDestroy, Describe):
             Bucket=self.resource.name,
         )
 
-    def destroy_object(self):
-        keys = []
-        for page in self.client.get_paginator("list_objects").paginate(Bucket=self.resource.name):
-            keys.extend(o['Key'] for o in page.get("Contents", []))
-        keys.sort()
+    def is_empty(self):
+        response = self.client.list_object_versions(Bucket=self.resource.name, MaxKeys=1)
+        return not response.get("Versions") and not response.get("DeleteMarkers")
 
-        for i in range(0, len(keys), 1000):
-            chunk = keys[i:i+1000]
-            yield self.generic_action(
-                "Delete items '{}' through '{}'".format(chunk[0], chunk[-1]),
-                self.client.delete_objects,
-                Bucket=self.resource.name,
-                Delete={"Objects": [{"Key": k} for k in chunk], "Quiet": True},
-            )
+    def destroy_object(self):
+        if not self.is_empty():
+            yield EmptyBucket(self)
 
         for action in super(Destroy, self).destroy_object():
             yield action
@@ -0,0 +1,152 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import logging
+import os
+import shutil
+import threading
+
+from six.moves import queue
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from touchdown.core import errors
+
+from .manifest import get_md5
+
+
+logger = logging.getLogger(__name__)
+
+
+COMPRESSIBLE_TYPES = (
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "application/x-javascript",
+    "image/svg+xml",
+    "image/x-icon",
+)
+
+
+def is_compressible(content_type):
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+def gzip_file(source, destination):
+    with open(source, 'rb') as src:
+        # A fixed mtime means the same input always gives the same output
+        # (and the same ETag)
+        with open(destination, 'wb') as fp:
+            with gzip.GzipFile(filename='', mode='wb', fileobj=fp, mtime=0) as dst:
+                shutil.copyfileobj(src, dst)
+
+
+def brotli_file(source, destination):
+    with open(source, 'rb') as src:
+        data = brotli.compress(src.read())
+    with open(destination, 'wb') as dst:
+        dst.write(data)
+
+
+ENCODINGS = {
+    "gzip": ("gz", gzip_file),
+    "br": ("br", brotli_file),
+}
+
+
+class Compressed(object):
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        with open(path + ".md5") as fp:
+            self.md5 = fp.read().strip()
+
+
+class Compressor(object):
+
+    """ Compresses files with a pool of threads (zlib and brotli release the
+    GIL while they work). The output is kept in ``directory`` by the hash of
+    the input, so each version of a file is only compressed once. """
+
+    workers = 4
+
+    def __init__(self, directory, encoding):
+        if encoding == "br" and not brotli:
+            raise errors.Error("Need to install 'brotli' to use brotli compression")
+
+        self.directory = directory
+        self.encoding = encoding
+        self.extension, self.compress_file = ENCODINGS[encoding]
+        self.compressed = 0
+
+    def get_path(self, md5):
+        return os.path.join(self.directory, "{}.{}".format(md5, self.extension))
+
+    def compress(self, source, md5):
+        path = self.get_path(md5)
+        if not os.path.exists(path + ".md5"):
+            # Write to a temporary file first so that an interrupted run
+            # doesn't leave half a file behind
+            tmp = "{}.{}.tmp".format(path, threading.current_thread().ident)
+            self.compress_file(source, tmp)
+            with open(tmp + ".md5", 'w') as fp:
+                fp.write(get_md5(tmp))
+            os.rename(tmp, path)
+            os.rename(tmp + ".md5", path + ".md5")
+            self.compressed += 1
+        return Compressed(path)
+
+    def worker(self, tasks, results, failures):
+        while True:
+            try:
+                key, path, md5 = tasks.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[key] = self.compress(path, md5)
+            except Exception as e:
+                failures.append("{}: {}".format(key, e))
+
+    def compress_all(self, files):
+        """ Compresses a dict of ``{key: (path, md5)}``, returning a dict of
+        ``{key: Compressed}`` """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        tasks = queue.Queue()
+        for key, (path, md5) in files.items():
+            tasks.put((key, path, md5))
+
+        results = {}
+        failures = []
+
+        threads = [
+            threading.Thread(target=self.worker, args=(tasks, results, failures))
+            for i in range(min(self.workers, len(files)))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if failures:
+            raise errors.Error("Failed to compress files:\n{}".format("\n".join(sorted(failures))))
+
+        logger.debug("Compressed {} of {} files".format(self.compressed, len(files)))
+        return results
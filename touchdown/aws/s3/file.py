@@ -12,13 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
+import posixpath
+
+from botocore.exceptions import ClientError
+
 from touchdown.core.resource import Resource
 from touchdown.core.plan import Plan
 from touchdown.core import argument
 
 from .bucket import Bucket
 from ..common import SimpleDescribe, SimpleApply, SimpleDestroy
-from touchdown.core import serializers
+from touchdown.core import errors, serializers
+
+
+logger = logging.getLogger(__name__)
 
 
 class File(Resource):
@@ -45,6 +53,13 @@ class Describe(SimpleDescribe, Plan):
     describe_envelope = "Contents"
     key = 'Name'
 
+    # Files are found by listing the "directory" they are in (and nothing
+    # below it), which is shared with other files in the same directory.
+    # Directories bigger than a single page fall back to head_object rather
+    # than paging through them. Subdirectories count towards the page size,
+    # so a truncated page can hold far fewer than this many files.
+    listing_page_size = 1000
+
     def get_describe_filters(self):
         if not self.runner.get_plan(self.resource.bucket).resource_id:
             # If the bucket doesn't exist yet, the file can't. So bail out.
@@ -58,6 +73,76 @@ class Describe(SimpleDescribe, Plan):
         if obj['Key'] == self.resource.name:
             return True
 
+    def get_prefix(self):
+        prefix = posixpath.dirname(self.resource.name)
+        return prefix + "/" if prefix else ""
+
+    def get_inventory_key(self):
+        return (
+            self.client,
+            self.describe_action,
+            self.resource.bucket.name,
+            self.get_prefix(),
+        )
+
+    def _get_listing(self):
+        """ Returns the first page of the listing, which is kept whole so
+        that ``IsTruncated`` is remembered along with its contents """
+        try:
+            page = self.client.list_objects(
+                Bucket=self.resource.bucket.name,
+                Prefix=self.get_prefix(),
+                Delimiter="/",
+                MaxKeys=self.listing_page_size,
+            )
+        except ClientError as e:
+            raise errors.Error("{}: {}".format(self.resource, e))
+        return [page]
+
+    def _get_listing_items(self, page):
+        return [(obj['Key'], obj) for obj in page.get(self.describe_envelope, [])]
+
+    def _head_object(self):
+        try:
+            result = self.client.head_object(
+                Bucket=self.resource.bucket.name,
+                Key=self.resource.name,
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return {}
+            raise errors.Error("{}: {}".format(self.resource, e))
+        return {
+            "Key": self.resource.name,
+            "ETag": result.get('ETag'),
+            "Size": result.get('ContentLength'),
+            "LastModified": result.get('LastModified'),
+        }
+
+    def describe_object(self):
+        if self.get_describe_filters() is None:
+            return {}
+
+        listing = self.inventory.get(self.get_inventory_key(), self._get_listing)
+        results = listing.lookup('Key', self.resource.name, self._get_listing_items)
+        if results:
+            return dict(results[0])
+
+        if not listing.results[0].get('IsTruncated', False):
+            return {}
+
+        logger.debug("s3://{}/{} has too many objects to list, using head_object for {}".format(
+            self.resource.bucket.name,
+            self.get_prefix(),
+            self.resource.name,
+        ))
+        return self._head_object()
+
+    def invalidate(self):
+        super(Describe, self).invalidate()
+        if self.get_describe_filters() is not None:
+            self.inventory.invalidate(self.get_inventory_key())
+
 
 class Apply(SimpleApply, Describe):
 
@@ -12,15 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from __future__ import division
+
+import fnmatch
 import os
 import mimetypes
-import hashlib
 
 from touchdown.core.resource import Resource
 from touchdown.core.plan import Plan
+from touchdown.core.action import Action
 from touchdown.core import argument
 
 from .bucket import Bucket
+from .compress import Compressor, is_compressible
+from .manifest import HeaderManifest, Manifest, get_multipart_etag
+from .transfer import Transfer, Upload
 from ..common import SimpleDescribe, SimpleApply
 
 
@@ -37,9 +43,108 @@ class Folder(Resource):
         field="ACL",
     )
 
+    compression = argument.String(
+        choices=["gzip", "br"],
+        help="Compress text, scripts, etc with this Content-Encoding before uploading them",
+    )
+
+    cache_control = argument.Dict(
+        help="The Cache-Control header for files matching each glob, e.g. {'*.css': 'max-age=3600'}. "
+             "Changes are applied to existing objects too.",
+    )
+
     bucket = argument.Resource(Bucket, field="Bucket")
 
 
+def format_size(size):
+    if size < 1024:
+        return "{} bytes".format(size)
+    for unit in ("KB", "MB", "GB"):
+        size /= 1024
+        if size < 1024 or unit == "GB":
+            return "{:.1f} {}".format(size, unit)
+
+
+class SyncFolder(Action):
+
+    """ Brings the remote folder in line with the local one. Rather than an
+    action per file it just keeps lists of paths, so that a plan for a very
+    large tree stays small (and short, unless the frontend is verbose).
+    Objects in ``retags`` have the right contents but the wrong headers, and
+    are copied onto themselves with the new ones. """
+
+    def __init__(self, plan, local, adds, updates, deletes, copies, retags=(), headers=None):
+        super(SyncFolder, self).__init__(plan)
+        self.local = local
+        self.adds = adds
+        self.updates = updates
+        self.deletes = deletes
+        self.copies = copies
+        self.retags = list(retags)
+        self.headers = headers
+
+    def get_size(self, paths):
+        return sum(self.local[path]['Size'] for path in paths if path not in self.copies)
+
+    @property
+    def description(self):
+        yield "Sync {} to s3://{}/{}".format(self.resource.source, self.resource.bucket.name, self.resource.name)
+        if self.adds:
+            yield "Add {} file(s) ({})".format(len(self.adds), format_size(self.get_size(self.adds)))
+        if self.updates:
+            yield "Update {} file(s) ({})".format(len(self.updates), format_size(self.get_size(self.updates)))
+        if self.copies:
+            yield "Copy {} file(s) from existing objects".format(len(self.copies))
+        if self.retags:
+            yield "Update headers of {} file(s)".format(len(self.retags))
+        if self.deletes:
+            yield "Remove {} file(s)".format(len(self.deletes))
+
+        if not self.plan.ui.verbose:
+            return
+
+        for verb, paths in (("Add", self.adds), ("Update", self.updates), ("Update headers of", self.retags)):
+            for path in paths:
+                if path in self.copies:
+                    yield "{} {} (copy of {})".format(verb, path, self.copies[path])
+                else:
+                    yield "{} {}".format(verb, path)
+        for path in self.deletes:
+            yield "Remove {}".format(path)
+
+    def get_uploads(self):
+        uploads = {}
+        for path in self.adds + self.updates:
+            uploads[path] = self.plan.get_upload(path, self.local[path], self.copies.get(path))
+        for path in self.retags:
+            uploads[path] = self.plan.get_upload(path, self.local[path], path)
+        return uploads
+
+    def save_headers(self, uploads, failed):
+        if self.headers is None:
+            return
+        for path, upload in uploads.items():
+            if upload.key not in failed:
+                self.headers.set(path, self.local[path]['Md5'], self.plan.get_headers(path, self.local[path]))
+        self.headers.save()
+
+    def run(self):
+        uploads = self.get_uploads()
+        if uploads:
+            transfer = Transfer(self.plan.client, self.plan.echo)
+            try:
+                transfer.upload(list(uploads.values()))
+            finally:
+                self.save_headers(uploads, set(key for key, error in transfer.failed))
+
+        # Only delete once everything has been uploaded (and copied)
+        if self.deletes:
+            Transfer(self.plan.client, self.plan.echo).delete(
+                self.resource.bucket.name,
+                [os.path.join(self.resource.name, path) for path in self.deletes],
+            )
+
+
 class Describe(SimpleDescribe, Plan):
 
     resource = Folder
@@ -80,55 +185,149 @@ class Apply(SimpleApply, Describe):
     create_response = "not-that-useful"
 
     default_content_type = 'application/octet-stream'
+    default_cache_control = 'max-age=0'
+
+    # Part sizes to try when checking a file against an object that was
+    # uploaded in parts. Ours comes first, then those of other common tools.
+    part_sizes = (Transfer.part_size, 5 * 1024 * 1024, 15 * 1024 * 1024, 16 * 1024 * 1024)
+
+    def is_modified(self, manifest, path, local, remote):
+        etag = remote['ETag'].strip('"')
+        if '-' not in etag:
+            return local['Md5'] != etag
+
+        parts = int(etag.rsplit('-', 1)[1])
+        for part_size in self.part_sizes:
+            if max(1, -(-local['Size'] // part_size)) != parts:
+                continue
+            if 'ContentEncoding' in local:
+                if get_multipart_etag(local['Path'], part_size) == etag:
+                    return False
+            elif manifest.get_multipart_etag(path, part_size) == etag:
+                return False
+        return True
+
+    def get_content_type(self, path):
+        return mimetypes.guess_type(path)[0] or self.default_content_type
+
+    def get_cache_control(self, path):
+        # The most specific (longest) matching glob wins
+        for pattern in sorted(self.resource.cache_control, key=len, reverse=True):
+            if fnmatch.fnmatch(path, pattern):
+                return self.resource.cache_control[pattern]
+        return self.default_cache_control
+
+    def compress(self, local):
+        """ Swaps compressible files for their compressed versions, so that
+        they are compared with (and uploaded as) the compressed bytes """
+        if not self.resource.compression:
+            return
+
+        compressor = Compressor(
+            os.path.join(getattr(self.runner.cache, 'cache_directory', os.path.expanduser('~/.touchdown')), 'compressed'),
+            self.resource.compression,
+        )
+        compressed = compressor.compress_all({
+            path: (local[path]['Path'], local[path]['Md5'])
+            for path in local if is_compressible(self.get_content_type(path))
+        })
+        for path, c in compressed.items():
+            local[path] = {
+                "Path": c.path,
+                "Size": c.size,
+                "Md5": c.md5,
+                "ContentEncoding": self.resource.compression,
+            }
+
+    def get_copy_index(self, remote, changed):
+        """ Index remote objects that will still exist unchanged while we
+        upload, so that files with the same contents can be copied server
+        side. Multipart ETags can only be checked against a local file, so
+        they are indexed by size. """
+        by_md5, by_size = {}, {}
+        for path, r in remote.items():
+            if path in changed or r['Size'] > Transfer.max_copy_size:
+                continue
+            etag = r['ETag'].strip('"')
+            if '-' in etag:
+                by_size.setdefault(r['Size'], []).append((path, r))
+            else:
+                by_md5.setdefault(etag, path)
+        return by_md5, by_size
+
+    def find_copy_source(self, manifest, path, local, by_md5, by_size):
+        """ Returns the path of a remote object with the same contents as a
+        local file, if there is one """
+        if local['Md5'] in by_md5:
+            return by_md5[local['Md5']]
+        for source, remote in by_size.get(local['Size'], []):
+            if not self.is_modified(manifest, path, local, remote):
+                return source
+
+    def get_headers(self, path, local):
+        headers = {
+            "ACL": self.resource.acl,
+            "CacheControl": self.get_cache_control(path),
+            "ContentType": self.get_content_type(path),
+        }
+        if 'ContentEncoding' in local:
+            headers['ContentEncoding'] = local['ContentEncoding']
+        return headers
+
+    def get_upload(self, path, local, copy_source=None):
+        params = self.get_headers(path, local)
+        params['Key'] = os.path.join(self.resource.name, path)
+        params['Bucket'] = self.resource.bucket.name
+
+        upload = Upload(local['Path'], local['Size'], params)
+        if copy_source:
+            upload.copy_source = os.path.join(self.resource.name, copy_source)
+        return upload
 
     def update_object(self):
         remote = {}
-        local = {}
 
         base = self.resource.source
-        for root, dirs, files in os.walk(base):
-            for f in files:
-                path = os.path.join(root, f)
-                with open(path) as fp:
-                    h = hashlib.md5(fp.read())
-                local[os.path.relpath(path, base)] = {
-                    "Md5": h.hexdigest(),
-                }
+        manifest = Manifest(self.runner.cache, base)
+        local = manifest.scan()
+        for path in local:
+            local[path]['Path'] = os.path.join(base, path)
+        self.compress(local)
 
         if self.runner.get_plan(self.resource.bucket).resource_id:
             remote = {k: v for k, v in self.get_folder_contents()}
 
-        for path in local:
-            contenttype = mimetypes.guess_type(path)[0] or self.default_content_type
+        headers = HeaderManifest(self.runner.cache, self.resource.bucket.name, self.resource.name)
+        headers.load()
+        headers.retain(remote)
 
+        adds, updates, retags = [], [], []
+        for path in sorted(local):
             if path not in remote:
-                yield self.generic_action(
-                    "Add {} ({})".format(path, contenttype),
-                    self.client.put_object,
-                    Key=os.path.join(self.resource.name, path),
-                    Body=open(os.path.join(base, path)).read(),
-                    ACL=self.resource.acl,
-                    Bucket=self.resource.bucket.name,
-                    CacheControl="max-age=0",
-                    ContentType=contenttype,
-                )
-            elif local[path]['Md5'] != remote[path]['Md5']:
-                yield self.generic_action(
-                    "Update {} ({})".format(path, contenttype),
-                    self.client.put_object,
-                    Key=os.path.join(self.resource.name, path),
-                    Body=open(os.path.join(base, path)).read(),
-                    ACL=self.resource.acl,
-                    Bucket=self.resource.bucket.name,
-                    CacheControl="max-age=0",
-                    ContentType=contenttype,
-                )
-
-        for path in remote:
-            if path not in local:
-                yield self.generic_action(
-                    "Remove {}".format(path),
-                    self.client.delete_object,
-                    Bucket=self.resource.bucket.name,
-                    Key=os.path.join(self.resource.name, path),
-                )
+                adds.append(path)
+            elif self.is_modified(manifest, path, local[path], remote[path]):
+                updates.append(path)
+            else:
+                wanted = self.get_headers(path, local[path])
+                applied = headers.get(path, local[path]['Md5'])
+                if applied is None:
+                    # Uploaded before we kept track (or by something else), so
+                    # assume it already has the headers it should have
+                    headers.set(path, local[path]['Md5'], wanted)
+                elif applied != wanted:
+                    retags.append(path)
+
+        by_md5, by_size = self.get_copy_index(remote, set(adds + updates))
+        copies = {}
+        for path in adds + updates:
+            source = self.find_copy_source(manifest, path, local[path], by_md5, by_size)
+            if source:
+                copies[path] = source
+
+        manifest.save()
+        headers.save()
+
+        deletes = [path for path in sorted(remote) if path not in local]
+
+        if adds or updates or deletes or retags:
+            yield SyncFolder(self, local, adds, updates, deletes, copies, retags, headers)
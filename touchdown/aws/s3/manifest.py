@@ -0,0 +1,223 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import logging
+import os
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_md5(path, chunk_size=1024 * 1024):
+    h = hashlib.md5()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def get_multipart_etag(path, part_size, chunk_size=1024 * 1024):
+    """ Returns the ETag S3 would give a file uploaded in parts of
+    part_size: the MD5 of the concatenated MD5s of each part, followed by
+    the number of parts """
+    digests = []
+    with open(path, 'rb') as fp:
+        while True:
+            h = hashlib.md5()
+            read = 0
+            while read < part_size:
+                chunk = fp.read(min(chunk_size, part_size - read))
+                if not chunk:
+                    break
+                h.update(chunk)
+                read += len(chunk)
+            if not read and digests:
+                break
+            digests.append(h.digest())
+            if read < part_size:
+                break
+    return "{}-{}".format(hashlib.md5(b''.join(digests)).hexdigest(), len(digests))
+
+
+class Manifest(object):
+
+    """ Remembers the size, mtime, inode and MD5 of every file in a local
+    directory between runs, so that only files that have changed on disk
+    need to be hashed again.
+
+    The contents of each directory are remembered too. Adding, removing or
+    renaming something changes the mtime of its directory, so a directory
+    whose mtime hasn't changed isn't listed again. Its files are still
+    stat'ed, as editing a file in place doesn't touch its directory. """
+
+    # A file modified within this many seconds of being hashed might be
+    # modified again without its mtime changing, so don't trust its hash.
+    granularity = 2
+
+    def __init__(self, cache, base):
+        self.cache = cache
+        self.base = base
+        self.cache_key = "s3-folder-{}".format(
+            hashlib.md5(os.path.abspath(base).encode('utf-8')).hexdigest(),
+        )
+        self.dirs_key = "{}-dirs".format(self.cache_key)
+        self.entries = {}
+        self.dirs = {}
+        self.hashed = 0
+        self.listed = 0
+        self.etags = {}
+
+    def load(self):
+        try:
+            if self.cache_key in self.cache:
+                self.entries = self.cache[self.cache_key]
+            if self.dirs_key in self.cache:
+                self.dirs = self.cache[self.dirs_key]
+        except ValueError:
+            logger.debug("Ignoring corrupt manifest for {}".format(self.base))
+
+    def save(self):
+        self.cache[self.cache_key] = self.entries
+        self.cache[self.dirs_key] = self.dirs
+
+    def get_entry(self, path, st):
+        signature = [st.st_size, st.st_mtime, st.st_ino]
+        entry = self.entries.get(path)
+        if entry and entry[:3] == signature:
+            return entry
+
+        self.hashed += 1
+        return signature + [get_md5(os.path.join(self.base, path)), {}]
+
+    def list_dir(self, root):
+        """ Returns the files and subdirectories of a directory. Like
+        os.walk, symlinks to directories aren't followed. """
+        self.listed += 1
+        files, subdirs = [], []
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if not os.path.isdir(path):
+                files.append(name)
+            elif not os.path.islink(path):
+                subdirs.append(name)
+        return files, subdirs
+
+    def walk(self, recent):
+        """ Yields the path of every directory under base (relative to base)
+        and the files in it, listing only directories that have changed """
+        dirs = {}
+        pending = [os.curdir]
+        while pending:
+            prefix = pending.pop()
+            root = os.path.normpath(os.path.join(self.base, prefix))
+            try:
+                st = os.stat(root)
+                signature = [st.st_mtime, st.st_ino]
+                entry = self.dirs.get(prefix)
+                if entry and entry[:2] == signature:
+                    files, subdirs = entry[2:]
+                else:
+                    files, subdirs = self.list_dir(root)
+            except OSError as e:
+                # os.walk skips directories it can't list too
+                logger.debug("Skipping {}: {}".format(root, e))
+                continue
+
+            if st.st_mtime < recent:
+                dirs[prefix] = signature + [files, subdirs]
+            for d in subdirs:
+                pending.append(d if prefix == os.curdir else os.path.join(prefix, d))
+            yield prefix, root, files
+
+        self.dirs = dirs
+
+    def get_multipart_etag(self, path, part_size):
+        """ Returns the multipart ETag of a file that was found by scan,
+        remembering it for next time """
+        etags = self.etags[path]
+        key = str(part_size)
+        if key not in etags:
+            self.hashed += 1
+            etags[key] = get_multipart_etag(os.path.join(self.base, path), part_size)
+        return etags[key]
+
+    def scan(self):
+        """ Returns a dict of every file under base (relative to base), with
+        its ``Md5`` and ``Size``. Call save once finished with it. """
+        self.load()
+
+        entries = {}
+        local = {}
+        recent = time.time() - self.granularity
+
+        for prefix, root, files in self.walk(recent):
+            for f in files:
+                path = f if prefix == os.curdir else os.path.join(prefix, f)
+                entry = self.get_entry(path, os.stat(os.path.join(root, f)))
+                if len(entry) < 5:
+                    entry.append({})
+                if entry[1] < recent:
+                    entries[path] = entry
+                local[path] = {
+                    "Size": entry[0],
+                    "Md5": entry[3],
+                }
+                self.etags[path] = entry[4]
+
+        logger.debug("Hashed {} of {} files and listed {} directories in {}".format(
+            self.hashed, len(local), self.listed, self.base,
+        ))
+        self.entries = entries
+        return local
+
+
+class HeaderManifest(object):
+
+    """ Remembers the headers (``CacheControl``, ``ContentType`` and so on)
+    last sent with each object in a folder, along with the MD5 of the
+    contents they were sent with. This lets a change to the headers in the
+    Touchdownfile reach objects whose contents haven't changed. """
+
+    def __init__(self, cache, bucket, prefix):
+        self.cache = cache
+        self.cache_key = "s3-headers-{}".format(
+            hashlib.md5("{}/{}".format(bucket, prefix).encode('utf-8')).hexdigest(),
+        )
+        self.entries = {}
+
+    def load(self):
+        try:
+            if self.cache_key in self.cache:
+                self.entries = self.cache[self.cache_key]
+        except ValueError:
+            logger.debug("Ignoring corrupt header manifest for {}".format(self.cache_key))
+
+    def save(self):
+        self.cache[self.cache_key] = self.entries
+
+    def get(self, path, md5):
+        """ Returns the headers last sent with ``path``, or ``None`` if they
+        weren't sent with these contents """
+        entry = self.entries.get(path)
+        if entry and entry[0] == md5:
+            return entry[1]
+
+    def set(self, path, md5, headers):
+        self.entries[path] = [md5, headers]
+
+    def retain(self, paths):
+        """ Forgets objects that are no longer in the folder """
+        self.entries = {path: entry for path, entry in self.entries.items() if path in paths}
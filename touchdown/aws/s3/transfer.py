@@ -0,0 +1,379 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import division
+
+import logging
+import os
+import threading
+import time
+
+from six.moves import queue
+
+from touchdown.core import errors
+
+
+logger = logging.getLogger(__name__)
+
+
+class FileSlice(object):
+
+    """ A read-only, seekable view of part of a file. This lets botocore
+    stream a request body (and rewind it to retry) without us reading the
+    whole file or part into memory. """
+
+    def __init__(self, fp, offset, size):
+        self.fp = fp
+        self.offset = offset
+        self.size = size
+        self.position = 0
+
+    def __len__(self):
+        return self.size
+
+    def read(self, amt=-1):
+        remaining = self.size - self.position
+        if amt is None or amt < 0 or amt > remaining:
+            amt = remaining
+        self.fp.seek(self.offset + self.position)
+        data = self.fp.read(amt)
+        self.position += len(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self.position = max(0, min(offset, self.size))
+
+    def tell(self):
+        return self.position
+
+
+class Upload(object):
+
+    """ A local file to be uploaded to S3. ``params`` are passed to
+    ``put_object`` (or ``create_multipart_upload``) and must include
+    ``Bucket`` and ``Key``. """
+
+    def __init__(self, path, size, params):
+        self.path = path
+        self.size = size
+        self.params = params
+
+        # The key of an object already in the bucket with the same contents,
+        # which can be copied server side instead of uploading the file
+        self.copy_source = None
+
+        self.lock = threading.Lock()
+        self.upload_id = None
+        self.parts = {}
+        self.remaining = 0
+        self.error = None
+
+    @property
+    def key(self):
+        return self.params['Key']
+
+    def open(self):
+        """ Nothing is read from the file until the transfer actually runs,
+        and then it is streamed rather than read into memory. """
+        return open(self.path, 'rb')
+
+
+class Transfer(object):
+
+    """ Uploads (or deletes) files in S3 through a bounded pool of threads.
+
+    Files whose contents are already in the bucket are copied server side
+    with ``copy_object``. Small files are sent with a single ``put_object``. Files larger than
+    ``multipart_threshold`` are sent as a multipart upload, with their parts
+    uploaded in parallel by the same pool. Deletes are sent
+    ``delete_chunk_size`` keys at a time with ``delete_objects``, and can be
+    streamed from a listing as it is paged through. Each
+    request is retried a few times, and a file that still fails doesn't stop
+    the others - they are all reported once the rest of the transfer has
+    finished. """
+
+    workers = 8
+    multipart_threshold = 16 * 1024 * 1024
+    part_size = 8 * 1024 * 1024
+    delete_chunk_size = 1000
+    max_copy_size = 5 * 1024 * 1024 * 1024
+    max_attempts = 3
+    progress_interval = 5
+
+    def __init__(self, client, echo, workers=None):
+        self.client = client
+        self.echo = echo
+        if workers:
+            self.workers = workers
+
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.total = 0
+        self.objects = 0
+        self.bytes = 0
+        self.copied = 0
+        self.failed = []
+        self.started = None
+        self.threads = []
+        self.reported = None
+        self.action = "upload"
+        self.verb = "Uploaded"
+
+    def attempt(self, func, **kwargs):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return func(**kwargs)
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    raise
+                logger.debug("Attempt {} of {} to call {} failed: {}".format(attempt, self.max_attempts, getattr(func, "__name__", func), e))
+                time.sleep(2 ** attempt / 4)
+
+    def worker(self):
+        while True:
+            task = self.queue.get()
+            try:
+                if task is None:
+                    return
+                func, args = task
+                func(*args)
+            finally:
+                self.queue.task_done()
+
+    def start(self, count):
+        self.started = self.reported = time.time()
+        self.threads = []
+        for i in range(max(1, min(self.workers, count))):
+            thread = threading.Thread(target=self.worker)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.queue.join()
+        for thread in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def run(self, tasks):
+        for task in tasks:
+            self.queue.put(task)
+        self.start(len(tasks))
+        self.stop()
+        self.finish()
+
+    def finish(self):
+        self.echo(self.get_progress())
+
+        if self.failed:
+            raise errors.Error("Failed to {} {} of {} files:\n{}".format(
+                self.action,
+                len(self.failed),
+                self.total,
+                "\n".join("{}: {}".format(key, error) for key, error in sorted(self.failed)),
+            ))
+
+    def upload(self, uploads):
+        self.total = len(uploads)
+        self.run([(self.upload_file, (upload, )) for upload in uploads])
+
+    def delete(self, bucket, keys):
+        self.action = "delete"
+        self.verb = "Deleted"
+        self.total = len(keys)
+        objects = [{"Key": key} for key in keys]
+        self.run([
+            (self.delete_chunk, (bucket, objects[i:i + self.delete_chunk_size]))
+            for i in range(0, len(objects), self.delete_chunk_size)
+        ])
+
+    def delete_pages(self, bucket, pages):
+        """ Deletes objects (``{"Key": ..., "VersionId": ...}`` dicts) from
+        an iterable of pages, such as a paginated listing. Each page is
+        deleted as soon as it is listed, and listing pauses while the workers
+        are busy, so only a few pages are ever held in memory. """
+        self.action = "delete"
+        self.verb = "Deleted"
+        slots = threading.BoundedSemaphore(self.workers * 2)
+
+        def delete_chunk(objects):
+            try:
+                self.delete_chunk(bucket, objects)
+            finally:
+                slots.release()
+
+        self.start(self.workers)
+        try:
+            for objects in pages:
+                for i in range(0, len(objects), self.delete_chunk_size):
+                    chunk = objects[i:i + self.delete_chunk_size]
+                    slots.acquire()
+                    with self.lock:
+                        self.total += len(chunk)
+                    self.queue.put((delete_chunk, (chunk, )))
+        finally:
+            self.stop()
+        self.finish()
+
+    def get_progress(self):
+        elapsed = max(time.time() - self.started, 0.001)
+        return "{} {} of {} files{}, {:.1f} MB ({:.1f} files/s, {:.2f} MB/s)".format(
+            self.verb,
+            self.objects,
+            self.total,
+            " ({} copied server side)".format(self.copied) if self.copied else "",
+            self.bytes / 1024 / 1024,
+            self.objects / elapsed,
+            self.bytes / 1024 / 1024 / elapsed,
+        )
+
+    def progress(self, objects, bytes):
+        with self.lock:
+            self.objects += objects
+            self.bytes += bytes
+            now = time.time()
+            if now - self.reported < self.progress_interval:
+                return
+            self.reported = now
+        self.echo(self.get_progress())
+
+    def fail(self, key, error):
+        logger.debug("{} failed: {}".format(key, error))
+        with self.lock:
+            self.failed.append((key, error))
+
+    def delete_chunk(self, bucket, objects):
+        try:
+            response = self.attempt(
+                self.client.delete_objects,
+                Bucket=bucket,
+                Delete={"Objects": objects, "Quiet": True},
+            )
+        except Exception as e:
+            for obj in objects:
+                self.fail(obj['Key'], e)
+            return
+
+        # Quiet mode means only keys that couldn't be deleted are listed
+        failures = response.get("Errors", [])
+        for failure in failures:
+            self.fail(failure['Key'], "{} ({})".format(failure.get('Message', ''), failure.get('Code', '')))
+        self.progress(len(objects) - len(failures), 0)
+
+    def put_object(self, upload, body):
+        # Rewind in case a previous attempt got part way through the file
+        body.seek(0)
+        return self.client.put_object(Body=body, **upload.params)
+
+    def upload_part(self, upload, number, body):
+        body.seek(0)
+        return self.client.upload_part(
+            Bucket=upload.params['Bucket'],
+            Key=upload.key,
+            UploadId=upload.upload_id,
+            PartNumber=number,
+            Body=body,
+        )
+
+    def copy_object(self, upload):
+        return self.client.copy_object(
+            CopySource={"Bucket": upload.params['Bucket'], "Key": upload.copy_source},
+            MetadataDirective="REPLACE",
+            **upload.params
+        )
+
+    def upload_file(self, upload):
+        if upload.copy_source:
+            try:
+                self.attempt(self.copy_object, upload=upload)
+            except Exception as e:
+                logger.debug("Copying {} to {} failed ({}), uploading it instead".format(upload.copy_source, upload.key, e))
+                upload.copy_source = None
+            else:
+                with self.lock:
+                    self.copied += 1
+                self.progress(1, 0)
+                return
+
+        if upload.size < self.multipart_threshold:
+            try:
+                with upload.open() as fp:
+                    self.attempt(self.put_object, upload=upload, body=fp)
+            except Exception as e:
+                self.fail(upload.key, e)
+            else:
+                self.progress(1, upload.size)
+            return
+
+        try:
+            upload.upload_id = self.attempt(self.client.create_multipart_upload, **upload.params)['UploadId']
+        except Exception as e:
+            self.fail(upload.key, e)
+            return
+
+        offsets = range(0, upload.size, self.part_size)
+        upload.remaining = len(offsets)
+        for number, offset in enumerate(offsets, start=1):
+            self.queue.put((self.send_part, (upload, number, offset)))
+
+    def send_part(self, upload, number, offset):
+        if upload.error is None:
+            try:
+                with upload.open() as fp:
+                    body = FileSlice(fp, offset, min(self.part_size, upload.size - offset))
+                    response = self.attempt(self.upload_part, upload=upload, number=number, body=body)
+            except Exception as e:
+                upload.error = e
+            else:
+                upload.parts[number] = response['ETag']
+                self.progress(0, len(body))
+
+        with upload.lock:
+            upload.remaining -= 1
+            if upload.remaining:
+                return
+        self.complete(upload)
+
+    def complete(self, upload):
+        if upload.error is None:
+            try:
+                self.attempt(
+                    self.client.complete_multipart_upload,
+                    Bucket=upload.params['Bucket'],
+                    Key=upload.key,
+                    UploadId=upload.upload_id,
+                    MultipartUpload={
+                        "Parts": [{"ETag": etag, "PartNumber": number} for number, etag in sorted(upload.parts.items())],
+                    },
+                )
+            except Exception as e:
+                upload.error = e
+            else:
+                self.progress(1, 0)
+                return
+
+        self.fail(upload.key, upload.error)
+        try:
+            self.client.abort_multipart_upload(
+                Bucket=upload.params['Bucket'],
+                Key=upload.key,
+                UploadId=upload.upload_id,
+            )
+        except Exception as e:
+            logger.debug("Unable to abort multipart upload of {}: {}".format(upload.key, e))
@@ -12,12 +12,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
 import os
+import threading
 
 from dateutil import parser
 
 from botocore import session
 
+from .governor import governor
+
+try:
+    from botocore.config import Config
+except ImportError:  # pragma: no cover
+    Config = None
+
+
+logger = logging.getLogger(__name__)
 
 session = session.get_session()
 
@@ -29,6 +40,84 @@ session.get_component('data_loader')._search_paths[1:1] = [os.path.join(os.path.
 session.create_client("ec2", "eu-west-1")
 
 
+class ClientPool(object):
+
+    """ Shares botocore clients between plans and worker threads.
+
+    Building a client means parsing its service model and setting up a new
+    HTTP connection pool, so we keep one client per set of credentials,
+    service and region. Botocore clients are safe to share between threads.
+    Each client's connection pool is sized to match the number of resources
+    that can use it at once (see :meth:`touchdown.core.goals.Goal.get_pool_size`). """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = {}
+        self.created = 0
+        self.reused = 0
+
+    def get_config(self, pool_size):
+        # Older botocore can't size the pool when creating a client, and its
+        # Config accepts (and ignores) options it doesn't know about
+        if 'max_pool_connections' not in getattr(Config, 'OPTION_DEFAULTS', {}):
+            return None
+        return Config(max_pool_connections=pool_size)
+
+    def resize_pool(self, client, pool_size):
+        # For botocore versions that make their HTTP requests with requests
+        http_session = getattr(client._endpoint, 'http_session', None)
+        for adapter in getattr(http_session, 'adapters', {}).values():
+            if hasattr(adapter, 'init_poolmanager'):
+                adapter.init_poolmanager(adapter._pool_connections, pool_size, block=adapter._pool_block)
+
+    def create_client(self, aws_session, service, pool_size=10):
+        pool_size = max(10, pool_size)
+        key = (
+            aws_session.access_key_id,
+            aws_session.secret_access_key,
+            aws_session.session_token,
+            service,
+            aws_session.region,
+            pool_size,
+        )
+
+        with self.lock:
+            if key in self.clients:
+                self.reused += 1
+                return self.clients[key]
+
+            kwargs = {}
+            config = self.get_config(pool_size)
+            if config:
+                kwargs['config'] = config
+
+            client = self.clients[key] = session.create_client(
+                service_name=service,
+                region_name=aws_session.region,
+                aws_access_key_id=aws_session.access_key_id,
+                aws_secret_access_key=aws_session.secret_access_key,
+                aws_session_token=aws_session.session_token,
+                **kwargs
+            )
+            if not config:
+                self.resize_pool(client, pool_size)
+            governor.attach(client, aws_session.access_key_id or "default", aws_session.region, service)
+            self.created += 1
+
+            logger.debug("Created {} client for {} ({})".format(service, aws_session.region, self))
+            return client
+
+    def clear(self):
+        with self.lock:
+            self.clients.clear()
+
+    def __str__(self):
+        return "{} clients created, {} reused".format(self.created, self.reused)
+
+
+clients = ClientPool()
+
+
 class Session(object):
 
     def __init__(self, access_key_id, secret_access_key, session_token, expiration, region):
@@ -38,14 +127,8 @@ class Session(object):
         self.expiration = expiration
         self.region = region
 
-    def create_client(self, service):
-        return session.create_client(
-            service_name=service,
-            region_name=self.region,
-            aws_access_key_id=self.access_key_id,
-            aws_secret_access_key=self.secret_access_key,
-            aws_session_token=self.session_token,
-        )
+    def create_client(self, service, pool_size=10):
+        return clients.create_client(self, service, pool_size)
 
     def tojson(self):
         return {
@@ -39,6 +39,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_customer_gateways"
     describe_envelope = "CustomerGateways"
     key = "CustomerGatewayId"
+    describe_batch = {"customer-gateway-id": "CustomerGatewayId", "tag:Name": "tag:Name"}
 
     def get_describe_filters(self):
         vpc = self.runner.get_plan(self.resource.vpc)
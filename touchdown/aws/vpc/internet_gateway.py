@@ -36,6 +36,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_internet_gateways"
     describe_envelope = "InternetGateways"
     key = "InternetGatewayId"
+    describe_batch = {"internet-gateway-id": "InternetGatewayId", "tag:Name": "tag:Name"}
 
     def get_describe_filters(self):
         vpc = self.runner.get_plan(self.resource.vpc)
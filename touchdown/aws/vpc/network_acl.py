@@ -17,6 +17,7 @@ from touchdown.core.plan import Plan
 from touchdown.core import argument
 
 from .vpc import VPC
+from .rules import RuleDiff, RuleIndex
 from touchdown.core import serializers
 from ..common import SimpleDescribe, SimpleApply, SimpleDestroy
 
@@ -80,6 +81,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_network_acls"
     describe_envelope = "NetworkAcls"
     key = 'NetworkAclId'
+    describe_batch = {'network-acl-id': 'NetworkAclId', 'tag:Name': 'tag:Name'}
 
     def get_describe_filters(self):
         vpc = self.runner.get_plan(self.resource.vpc)
@@ -119,7 +121,7 @@ class Apply(SimpleApply, Describe):
             return '-1'
 
     def _get_local_rules(self):
-        local_rules = {}
+        local_rules = RuleIndex()
         for i, rule in enumerate(self.resource.inbound, start=1):
             rule = serializers.Resource().render(self.runner, rule)
             rule['Protocol'] = self._fix_protocol(rule['Protocol'])
@@ -136,53 +138,65 @@ class Apply(SimpleApply, Describe):
         return local_rules
 
     def _get_remote_rules(self):
-        remote_rules = {}
+        remote_rules = RuleIndex()
         for rule in self.object.get("Entries", []):
             if rule['RuleNumber'] > 32766:
                 continue
             remote_rules[(rule['Egress'], rule['RuleNumber'])] = rule
         return remote_rules
 
+    def _describe_rule(self, verb, rule):
+        protocol = {
+            '1': 'ICMP',
+            '6': 'TCP',
+            '17': 'UDP',
+        }[rule['Protocol']]
+        direction = 'egress' if rule['Egress'] else 'ingress'
+        if protocol == 'ICMP':
+            return "{3} rule: {0[RuleAction]} {2} from {0[CidrBlock]}, {1} {0[IcmpTypeCode][Type]}:{0[IcmpTypeCode][Code]}".format(
+                rule, protocol, direction, verb,
+            )
+        return "{3} rule: {0[RuleAction]} {2} from {0[CidrBlock]}, {1} port {0[PortRange][From]} to {0[PortRange][To]}".format(
+            rule, protocol, direction, verb,
+        )
+
     def update_object(self):
         for action in super(Apply, self).update_object():
             yield action
 
         local_rules = self._get_local_rules()
         remote_rules = self._get_remote_rules()
-
-        for key, rule in remote_rules.items():
-            if key not in local_rules or local_rules[key] != rule:
-                yield self.generic_action(
-                    "Remove rule {} ({})".format(rule['RuleNumber'], 'egress' if rule['Egress'] else 'ingress'),
-                    self.client.delete_network_acl_entry,
-                    NetworkAclId=serializers.Identifier(),
-                    RuleNumber=rule['RuleNumber'],
-                    Egress=rule['Egress'],
-                )
-
-        for key, rule in local_rules.items():
-            if key not in remote_rules or remote_rules[key] != rule:
-                protocol = {
-                    '1': 'ICMP',
-                    '6': 'TCP',
-                    '17': 'UDP',
-                }[rule['Protocol']]
-                direction = 'egress' if rule['Egress'] else 'ingress'
-                if protocol == 'ICMP':
-                    desc = "Add rule: {0[RuleAction]} {2} from {0[CidrBlock]}, {1} {0[IcmpTypeCode][Type]}:{0[IcmpTypeCode][Code]}".format(
-                        rule, protocol, direction
-                    )
-                else:
-                    desc = "Add rule: {0[RuleAction]} {2} from {0[CidrBlock]}, {1} port {0[PortRange][From]} to {0[PortRange][To]}".format(
-                        rule, protocol, direction
-                    )
-
-                yield self.generic_action(
-                    desc,
-                    self.client.create_network_acl_entry,
-                    NetworkAclId=serializers.Identifier(),
-                    **rule
-                )
+        diff = RuleDiff(local_rules, remote_rules)
+
+        for key in diff.removed:
+            rule = remote_rules[key]
+            yield self.generic_action(
+                "Remove rule {} ({})".format(rule['RuleNumber'], 'egress' if rule['Egress'] else 'ingress'),
+                self.client.delete_network_acl_entry,
+                NetworkAclId=serializers.Identifier(),
+                RuleNumber=rule['RuleNumber'],
+                Egress=rule['Egress'],
+            )
+
+        # A rule number that is already in use is changed in place, rather
+        # than deleted and created again
+        for key in diff.changed:
+            rule = local_rules[key]
+            yield self.generic_action(
+                self._describe_rule("Replace", rule),
+                self.client.replace_network_acl_entry,
+                NetworkAclId=serializers.Identifier(),
+                **rule
+            )
+
+        for key in diff.added:
+            rule = local_rules[key]
+            yield self.generic_action(
+                self._describe_rule("Add", rule),
+                self.client.create_network_acl_entry,
+                NetworkAclId=serializers.Identifier(),
+                **rule
+            )
 
 
 class Destroy(SimpleDestroy, Describe):
@@ -18,6 +18,7 @@ from touchdown.core import argument, serializers
 from .vpc import VPC
 from .internet_gateway import InternetGateway
 from .vpn_gateway import VpnGateway
+from .rules import RuleDiff, RuleIndex, get_network
 from ..common import Resource, SimpleDescribe, SimpleApply, SimpleDestroy
 
 
@@ -57,6 +58,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_route_tables"
     describe_envelope = "RouteTables"
     key = "RouteTableId"
+    describe_batch = {"route-table-id": "RouteTableId", "tag:Name": "tag:Name"}
 
     def get_describe_filters(self):
         vpc = self.runner.get_plan(self.resource.vpc)
@@ -110,7 +112,8 @@ class Apply(SimpleApply, Describe):
         """
         Compare the individual routes listed in the RouteTable to the ones
         defined in the current workspace, creating and removing routes as
-        needed.
+        needed. Routes are paired up by destination, and a route whose
+        target has changed is replaced in place.
 
         Old routes are removed *before* new routes are added. This may cause
         connection glitches when applied, but it avoids route collisions.
@@ -118,35 +121,29 @@ class Apply(SimpleApply, Describe):
         remote_routes = list(d for d in self.object.get("Routes", []) if d.get("GatewayId", "") != "local")
         remote_routes = list(d for d in remote_routes if d["Origin"] != "EnableVgwRoutePropagation")
 
-        if remote_routes:
-            for remote in remote_routes:
-                for local in self.resource.routes:
-                    if local.matches(self.runner, remote):
-                        break
-                else:
-                    yield self.generic_action(
-                        "Remove route for {}".format(remote['DestinationCidrBlock']),
-                        self.client.delete_route,
-                        RouteTableId=serializers.Identifier(),
-                        DestinationCidrBlock=remote['DestinationCidrBlock'],
-                    )
-
-        if self.resource.routes:
-            for local in self.resource.routes:
-                if local.ignore:
-                    continue
+        local = RuleIndex(self.resource.routes, lambda route: (get_network(route.destination_cidr), ))
+        remote = RuleIndex(remote_routes, lambda route: (get_network(route['DestinationCidrBlock']), ))
+        diff = RuleDiff(local, remote, lambda local_route, remote_route: local_route.matches(self.runner, remote_route))
+
+        for key in diff.removed:
+            yield self.generic_action(
+                "Remove route for {}".format(remote[key]['DestinationCidrBlock']),
+                self.client.delete_route,
+                RouteTableId=serializers.Identifier(),
+                DestinationCidrBlock=remote[key]['DestinationCidrBlock'],
+            )
 
-                for remote in remote_routes:
-                    if local.matches(self.runner, remote):
-                        break
-                else:
-                    yield self.generic_action(
-                        "Adding route for {}".format(local.destination_cidr),
-                        self.client.create_route,
-                        serializers.Context(serializers.Const(local), serializers.Resource(
-                            RouteTableId=serializers.Identifier(serializers.Const(self.resource)),
-                        ))
-                    )
+        for verb, keys, func in (("Replacing", diff.changed, self.client.replace_route), ("Adding", diff.added, self.client.create_route)):
+            for key in keys:
+                if local[key].ignore:
+                    continue
+                yield self.generic_action(
+                    "{} route for {}".format(verb, local[key].destination_cidr),
+                    func,
+                    serializers.Context(serializers.Const(local[key]), serializers.Resource(
+                        RouteTableId=serializers.Identifier(serializers.Const(self.resource)),
+                    ))
+                )
 
     def update_object(self):
         for action in super(Apply, self).update_object():
@@ -0,0 +1,78 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import operator
+
+import netaddr
+
+
+# EC2 returns protocols by name or by number depending on the API
+PROTOCOLS = {
+    "1": "icmp",
+    "6": "tcp",
+    "17": "udp",
+    "all": "-1",
+}
+
+
+def get_protocol(protocol):
+    protocol = str(protocol).lower()
+    return PROTOCOLS.get(protocol, protocol)
+
+
+def get_network(network):
+    if not network:
+        return None
+    return str(netaddr.IPNetwork(network))
+
+
+class RuleIndex(collections.OrderedDict):
+
+    """ Rules (or routes, or ACL entries) keyed by a canonical tuple, so that
+    local and remote rules can be paired up with a dict lookup rather than by
+    comparing every local rule with every remote one. """
+
+    def __init__(self, rules=(), get_key=None):
+        super(RuleIndex, self).__init__()
+        for rule in rules:
+            for key in get_key(rule):
+                self[key] = rule
+
+
+class RuleDiff(object):
+
+    """ The difference between a local and a remote :class:`RuleIndex`.
+    ``added`` and ``removed`` are the keys only on one side, and ``changed``
+    the keys on both sides where ``matches(local, remote)`` is False. """
+
+    def __init__(self, local, remote, matches=operator.eq):
+        self.added = []
+        self.changed = []
+        self.removed = []
+
+        for key, rule in local.items():
+            if key not in remote:
+                self.added.append(key)
+            elif not matches(rule, remote[key]):
+                self.changed.append(key)
+
+        for key in remote:
+            if key not in local:
+                self.removed.append(key)
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    __nonzero__ = __bool__
@@ -17,6 +17,7 @@ from touchdown.core.plan import Plan, Present
 from touchdown.core import argument
 
 from .vpc import VPC
+from .rules import RuleDiff, RuleIndex, get_network, get_protocol
 from touchdown.core import serializers
 from ..common import SimpleDescribe, SimpleApply, SimpleDestroy
 
@@ -74,6 +75,15 @@ class Rule(Resource):
                     return True
         return False
 
+    def get_keys(self, runner):
+        """ The canonical key of this rule, to be looked up in the keys of
+        the remote rules (see :func:`get_permission_keys`) """
+        if self.network:
+            source = ("cidr", get_network(self.network))
+        else:
+            source = ("group", runner.get_plan(self.security_group).resource_id)
+        return ((get_protocol(self.protocol), self.from_port, self.to_port) + source, )
+
     def matches(self, runner, rule):
         if not self.exists(runner):
             return False
@@ -95,6 +105,16 @@ class Rule(Resource):
         return "{}: {} {} from {}".format(name, self.protocol, ports, self.network if self.network else self.security_group)
 
 
+def get_permission_keys(permission):
+    """ An IpPermission from the EC2 API can cover several networks and
+    groups. Each of them gets its own key. """
+    prefix = (get_protocol(permission['IpProtocol']), permission.get('FromPort', None), permission.get('ToPort', None))
+    for network in permission.get('IpRanges', []):
+        yield prefix + ("cidr", get_network(network['CidrIp']))
+    for group in permission.get('UserIdGroupPairs', []):
+        yield prefix + ("group", group['GroupId'])
+
+
 class SecurityGroup(Resource):
 
     resource_name = "security_group"
@@ -119,6 +139,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_security_groups"
     describe_envelope = "SecurityGroups"
     key = 'GroupId'
+    describe_batch = {'group-id': 'GroupId', 'group-name': 'GroupName'}
 
     def get_describe_filters(self):
         vpc = self.runner.get_plan(self.resource.vpc)
@@ -151,32 +172,41 @@ class Apply(SimpleApply, Describe):
         Present("description"),
     )
 
+    def authorize_rules(self, direction, rules, permissions, func):
+        local = RuleIndex(rules, lambda rule: rule.get_keys(self.runner))
+        remote = RuleIndex(permissions, get_permission_keys)
+        diff = RuleDiff(local, remote, lambda local_rule, remote_rule: True)
+        if not diff.added:
+            return
+
+        # A single call can authorize any number of rules
+        rules = [local[key] for key in diff.added]
+        yield self.generic_action(
+            ["Authorize {}".format(direction)] + ["{}".format(rule) for rule in rules],
+            func,
+            GroupId=serializers.Identifier(),
+            IpPermissions=serializers.Context(
+                serializers.Const([serializers.Context(serializers.Const(rule), serializers.Resource()) for rule in rules]),
+                serializers.List(serializers.SubSerializer()),
+            ),
+        )
+
     def update_object(self):
-        for local_rule in self.resource.ingress:
-            for remote_rule in self.object.get("IpPermissions", []):
-                if local_rule.matches(self.runner, remote_rule):
-                    break
-            else:
-                yield self.generic_action(
-                    "Authorize ingress {}".format(local_rule),
-                    self.client.authorize_security_group_ingress,
-                    GroupId=serializers.Identifier(),
-                    IpPermissions=serializers.ListOfOne(serializers.Context(serializers.Const(local_rule), serializers.Resource())),
-                )
+        for action in self.authorize_rules(
+                "ingress",
+                self.resource.ingress,
+                self.object.get("IpPermissions", []),
+                self.client.authorize_security_group_ingress):
+            yield action
 
         return
 
-        for local_rule in self.resource.egress:
-            for remote_rule in self.object.get("IpPermissionsEgress", []):
-                if local_rule.matches(self.runner, remote_rule):
-                    break
-            else:
-                yield self.generic_action(
-                    "Authorize egress {}".format(local_rule),
-                    self.client.authorize_security_group_egress,
-                    GroupId=serializers.Identifier(),
-                    IpPermissions=serializers.ListOfOne(serializers.Context(serializers.Const(local_rule), serializers.Resource())),
-                )
+        for action in self.authorize_rules(
+                "egress",
+                self.resource.egress,
+                self.object.get("IpPermissionsEgress", []),
+                self.client.authorize_security_group_egress):
+            yield action
 
 
 class Destroy(SimpleDestroy, Describe):
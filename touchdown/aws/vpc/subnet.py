@@ -49,6 +49,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_subnets"
     describe_envelope = "Subnets"
     key = 'SubnetId'
+    describe_batch = {'subnet-id': 'SubnetId', 'cidrBlock': 'CidrBlock'}
 
     def get_describe_filters(self):
         vpc = self.runner.get_plan(self.resource.vpc)
@@ -40,6 +40,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_vpcs"
     describe_envelope = "Vpcs"
     key = 'VpcId'
+    describe_batch = {'vpc-id': 'VpcId', 'tag:Name': 'tag:Name'}
 
     def get_describe_filters(self):
         if self.key in self.object:
@@ -51,6 +51,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_vpn_connections"
     describe_envelope = "VpnConnections"
     key = "VpnConnectionId"
+    describe_batch = {"vpn-connection-id": "VpnConnectionId", "tag:Name": "tag:Name"}
 
     def get_describe_filters(self):
         vpc = self.runner.get_plan(self.resource.vpc)
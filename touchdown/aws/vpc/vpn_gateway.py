@@ -69,6 +69,7 @@ class Describe(SimpleDescribe, Plan):
     describe_action = "describe_vpn_gateways"
     describe_envelope = "VpnGateways"
     key = "VpnGatewayId"
+    describe_batch = {"vpn-gateway-id": "VpnGatewayId", "tag:Name": "tag:Name"}
 
     def get_describe_filters(self):
         vpc = self.runner.get_plan(self.resource.vpc)
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+
 from . import errors
 
 
@@ -24,71 +26,165 @@ class DependencyMap(object):
     If ``tips_first`` is False then the most dependended upon nodes will be
     visited first. This is the default, and is used when creating and apply
     changes - a VPC needs to exist before you can create a subnet in it.
+
+    The graph is stored twice: ``map`` holds the outstanding dependencies of
+    each node and ``dependents`` holds the reverse edges. When a node is
+    completed only the nodes that were waiting on it are touched, and any that
+    have nothing left to wait for are moved into the ``ready`` set. Building
+    the map and visiting every node is therefore O(V + E).
     """
 
     def __init__(self, node, tips_first=False):
         self.node = node
         self.tips_first = tips_first
         self.map = {}
+        self.dependents = {}
+        self.ready = set()
+        self.sort_keys = {}
+        self.weights = {}
         self._prepare()
 
     def _add_dependency(self, node, dep):
         if self.tips_first:
-            self.map.setdefault(dep, set()).add(node)
-        else:
-            self.map.setdefault(node, set()).add(dep)
+            node, dep = dep, node
+        self.map[node].add(dep)
+        self.dependents[dep].add(node)
+
+    def _add_node(self, node):
+        self.map[node] = set()
+        self.dependents[node] = set()
+        # str() of a resource is relatively expensive, so compute the sort key
+        # once up front. The index breaks ties between identically named
+        # resources in a stable way.
+        self.sort_keys[node] = (str(node), len(self.sort_keys))
 
     def _prepare(self):
-        queue = [self.node]
-        visiting = set()
-        visited = set()
+        queue = collections.deque([self.node])
+        self._add_node(self.node)
 
         while queue:
-            node = queue.pop(0)
-            visiting.add(node)
-
-            self.map.setdefault(node, set())
-
+            node = queue.popleft()
             for dep in node.dependencies:
-                if dep in visiting:
-                    raise errors.CycleError(
-                        'Circular reference between %s and %s' % (node, dep)
-                    )
-                self._add_dependency(node, dep)
-                if dep not in visited and dep not in queue:
+                if dep not in self.map:
+                    self._add_node(dep)
                     queue.append(dep)
+                self._add_dependency(node, dep)
 
-            visiting.remove(node)
-            visited.add(node)
+        self.ready.update(node for node, deps in self.map.items() if not deps)
+        self._check_for_cycles()
+
+    def _topological_order(self):
+        # Kahn's algorithm - if we can't visit every node by repeatedly
+        # removing nodes with no outstanding dependencies there is a cycle.
+        indegree = dict((node, len(deps)) for node, deps in self.map.items())
+        pending = list(self.ready)
+        order = []
+        while pending:
+            node = pending.pop()
+            order.append(node)
+            for dependent in self.dependents[node]:
+                indegree[dependent] -= 1
+                if not indegree[dependent]:
+                    pending.append(dependent)
+
+        if len(order) != len(self.map):
+            stuck = sorted((n for n, count in indegree.items() if count), key=self.sort_keys.get)
+            raise errors.CycleError(
+                'Circular reference between {}'.format(', '.join(str(n) for n in stuck[:5]))
+            )
+
+        return order
+
+    def _check_for_cycles(self):
+        self._topological_order()
+
+    def prioritise(self, cost):
+        """ Weights each remaining node by the longest chain of work that
+        can't start until it is complete (including itself). ``cost`` is a
+        callable returning the expected duration of a node.
+
+        Returns the length of the critical path, which is the best possible
+        makespan with an unlimited number of workers. """
+        self.weights = {}
+        for node in reversed(self._topological_order()):
+            downstream = [self.weights[d] for d in self.dependents[node]]
+            self.weights[node] = cost(node) + max(downstream or [0])
+        return max(list(self.weights.values()) or [0])
+
+    def priority(self, node):
+        """ A sort key that puts the start of the longest chains first """
+        return (-self.weights.get(node, 0), self.sort_keys[node])
 
     def items(self):
         return self.map.items()
 
     def get_ready(self):
         """ Yields resources that are ready to be applied """
-        for node, deps in self.map.items():
-            if not deps:
-                yield node
+        return iter(list(self.ready))
 
     def complete(self, node):
-        """ Marks a node as complete - it's dependents may proceed """
+        """ Marks a node as complete - it's dependents may proceed
+
+        Returns a list of the nodes that became ready as a result. """
         del self.map[node]
-        for deps in self.map.values():
-            deps.difference_update((node,))
+        self.ready.discard(node)
+
+        released = []
+        for dependent in self.dependents.pop(node):
+            deps = self.map[dependent]
+            deps.discard(node)
+            if not deps:
+                self.ready.add(dependent)
+                released.append(dependent)
+        return released
+
+    def in_order(self, nodes):
+        return sorted(nodes, key=self.sort_keys.__getitem__)
 
     def all(self):
         """ Visits all remaining nodes in order immediately """
-        while self.map:
-            ready = sorted(list(self.get_ready()))
-            if not ready:
-                return
-
+        ready = self.in_order(self.ready)
+        while ready:
+            released = []
             for node in ready:
                 yield node
-                self.complete(node)
+                released.extend(self.complete(node))
+            ready = self.in_order(released)
 
     def empty(self):
         return len(self) == 0
 
     def __len__(self):
         return len(self.map)
+
+
+class TaskList(object):
+
+    """ Independent pieces of work (rather than resources) that can be
+    visited by a ``Map`` in the same way as a :class:`DependencyMap`. The
+    tasks must be hashable. """
+
+    def __init__(self, tasks):
+        self.sort_keys = dict((task, i) for i, task in enumerate(tasks))
+        self.remaining = set(self.sort_keys)
+
+    def priority(self, task):
+        return self.sort_keys[task]
+
+    def get_ready(self):
+        return iter(sorted(self.remaining, key=self.priority))
+
+    def complete(self, task):
+        self.remaining.discard(task)
+        return []
+
+    def all(self):
+        for task in list(self.get_ready()):
+            yield task
+            self.complete(task)
+
+    def empty(self):
+        return len(self) == 0
+
+    def __len__(self):
+        return len(self.remaining)
@@ -13,10 +13,43 @@
 # limitations under the License.
 
 from __future__ import division
+import functools
+import logging
 import os
+import threading
+import time
 
 from . import dependencies, plan, map, errors
 from .cache import JSONFileCache
+from .history import History
+
+
+logger = logging.getLogger(__name__)
+
+
+class PlanFuture(object):
+
+    """ A plan that is being built by another thread """
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.event = threading.Event()
+        self.plan = None
+        self.error = None
+
+    def set_result(self, plan):
+        self.plan = plan
+        self.event.set()
+
+    def set_error(self, error):
+        self.error = error
+        self.event.set()
+
+    def result(self):
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.plan
 
 
 class GoalFactory(object):
@@ -30,12 +63,12 @@ class GoalFactory(object):
     def registered(self):
         return self.goals.items()
 
-    def create(self, name, workspace, ui, map=map.ParallelMap):
+    def create(self, name, workspace, ui, map=map.ParallelMap, cache=None):
         try:
             goal_class = self.goals[name]
         except KeyError:
             raise errors.Error("No such goal '{}'".format(name))
-        return goal_class(workspace, ui, map=map)
+        return goal_class(workspace, ui, map=map, cache=cache)
 
 
 class Goal(object):
@@ -50,12 +83,36 @@ class Goal(object):
             self.cache = JSONFileCache(os.path.expanduser('~/.touchdown'))
         self.workspace = workspace
         self.resources = {}
+        self.building = {}
+        self.plans_lock = threading.Lock()
+        self.duplicate_plans_avoided = 0
+        self.history = History(self.cache)
+        self.shared = {}
+        self.shared_lock = threading.Lock()
+        self.runs = 0
         self.Map = map
 
     @classmethod
     def setup_argparse(cls, parser):
         pass
 
+    def get_shared(self, name, factory):
+        """ Returns an object shared by every plan in this goal run, such as a
+        cache of API results. It is created by calling ``factory`` on first
+        use. """
+        with self.shared_lock:
+            if name not in self.shared:
+                self.shared[name] = factory()
+            return self.shared[name]
+
+    def start_run(self):
+        """ Called before planning. Anything described by an earlier run of
+        this goal may be out of date, so shared objects are thrown away and
+        plans describe themselves again """
+        with self.shared_lock:
+            self.runs += 1
+            self.shared = {}
+
     def get_plan_order(self):
         return dependencies.DependencyMap(self.workspace, tips_first=False)
 
@@ -63,20 +120,117 @@ class Goal(object):
         raise NotImplementedError(self.get_plan_class)
 
     def get_plan(self, resource):
-        if resource not in self.resources:
+        """ Returns the plan for a resource, building it on first use.
+
+        If another thread is already building it then wait for that thread
+        rather than building (and later describing) a duplicate. """
+        plan = self.resources.get(resource)
+        if plan is not None:
+            return plan
+
+        with self.plans_lock:
+            if resource in self.resources:
+                return self.resources[resource]
+            future = self.building.get(resource)
+            if future is None:
+                future = self.building[resource] = PlanFuture()
+                building = True
+            else:
+                if future.thread is threading.current_thread():
+                    raise errors.Error("Plan for {} depends on itself".format(resource))
+                self.duplicate_plans_avoided += 1
+                building = False
+
+        if not building:
+            return future.result()
+
+        try:
             klass = self.get_plan_class(resource)
             plan = klass(self, resource)
             plan.validate()
+        except Exception as e:
+            with self.plans_lock:
+                del self.building[resource]
+            future.set_error(e)
+            raise
+
+        with self.plans_lock:
             self.resources[resource] = plan
-        return self.resources[resource]
+            del self.building[resource]
+        future.set_result(plan)
+        return plan
 
     def get_execution_order(self):
         return dependencies.DependencyMap(self.workspace, tips_first=self.execute_in_reverse)
 
-    def visit(self, message, dep_map, callable):
-        with self.ui.progressbar(max_value=len(dep_map)) as pb:
-            for status in self.Map(self.ui, dep_map, callable):
-                pb.update(status)
+    def get_concurrency_group(self, resource):
+        return getattr(self.get_plan_class(resource), "service_name", None)
+
+    def get_workers(self):
+        """ The most tasks ``Map`` will run at once, so that things like
+        connection pools can be sized to match """
+        if isinstance(self.Map, functools.partial):
+            return self.Map.keywords.get("workers") or self.Map.func.workers
+        return self.Map.workers
+
+    def get_pool_size(self, service):
+        """ The most resources that can use a client for ``service`` at once.
+        This is the same for every plan in the workspace, so it doesn't matter
+        which of them creates the client """
+        workers = self.get_workers()
+        limit = self.workspace.concurrency.get(service)
+        return min(workers, limit) if limit else workers
+
+    def get_concurrency(self):
+        return map.Concurrency(self.workspace.concurrency, self.get_concurrency_group)
+
+    def run_tasks(self, callable, tasks, group=None):
+        """ Calls ``callable`` for each of ``tasks`` using this goal's
+        ``Map``, so that plans doing lots of independent API calls share the
+        same worker and concurrency limits as everything else. Exceptions
+        should be handled by ``callable``. """
+        tasks = dependencies.TaskList(tasks)
+        if not tasks:
+            return
+        limits = {}
+        if group in self.workspace.concurrency:
+            limits[group] = self.workspace.concurrency[group]
+        list(self.Map(self.ui, tasks, callable, concurrency=map.Concurrency(limits, lambda task: group)))
+
+    def visit(self, message, dep_map, callable, phase="plan"):
+        history = self.history.get_phase(self.name, phase)
+        has_history = bool(history.durations)
+        predicted = dep_map.prioritise(history.estimate)
+
+        def _(resource):
+            start = time.time()
+            callable(resource)
+            history.record(resource, time.time() - start)
+
+        throttling = map.feedback.group_snapshot()
+        start = time.time()
+        try:
+            with self.ui.progressbar(max_value=len(dep_map)) as pb:
+                for status in self.Map(self.ui, dep_map, _, concurrency=self.get_concurrency()):
+                    pb.update(status)
+        finally:
+            self.history.save()
+        actual = time.time() - start
+
+        # Goals that don't change anything (like get-signin-url) often write
+        # their result to stdout, so keep their timings out of the way
+        report = self.ui.echo if self.mutator else logger.debug
+
+        if has_history:
+            report("{} took {:.1f}s (predicted {:.1f}s)".format(message, actual, predicted))
+        else:
+            report("{} took {:.1f}s".format(message, actual))
+
+        for line in map.feedback.throttling_summary(throttling):
+            report("Throttling: {}".format(line))
+
+        if self.duplicate_plans_avoided:
+            logger.debug("{} duplicate plans (and describes) avoided so far".format(self.duplicate_plans_avoided))
 
     def collect_as_iterable(self, plan_name):
         collected = []
@@ -0,0 +1,71 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseHistory(object):
+
+    """ The durations recorded for one phase (e.g. planning) of one goal """
+
+    # Used for resources we have never timed when nothing else is known
+    default_duration = 1.0
+
+    def __init__(self, durations):
+        self.durations = durations
+        self.lock = threading.Lock()
+        if durations:
+            self.fallback = sum(durations.values()) / float(len(durations))
+        else:
+            self.fallback = self.default_duration
+
+    def estimate(self, resource):
+        return self.durations.get(str(resource), self.fallback)
+
+    def record(self, resource, duration):
+        with self.lock:
+            self.durations[str(resource)] = duration
+
+
+class History(object):
+
+    """ Remembers how long each resource took to plan and apply in previous
+    runs so that the slowest chains of work can be started first """
+
+    cache_key = "durations"
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.data = None
+
+    def load(self):
+        if self.data is None:
+            self.data = {}
+            try:
+                if self.cache_key in self.cache:
+                    self.data = self.cache[self.cache_key]
+            except ValueError:
+                logger.debug("Ignoring corrupt duration history")
+        return self.data
+
+    def get_phase(self, goal, phase):
+        return PhaseHistory(self.load().setdefault(goal, {}).setdefault(phase, {}))
+
+    def save(self):
+        if self.data is not None:
+            self.cache[self.cache_key] = self.data
@@ -15,6 +15,7 @@
 from __future__ import print_function
 
 import argparse
+import functools
 import inspect
 import logging
 import sys
@@ -45,10 +46,14 @@ class SubCommand(object):
     def __call__(self, args):
         self.workspace.load()
         try:
+            if args.serial:
+                Map = map.SerialMap
+            else:
+                Map = functools.partial(map.ParallelMap, workers=args.workers, adaptive=args.adaptive)
             g = self.goal(
                 self.workspace,
                 self.console,
-                map.ParallelMap if not args.serial else map.SerialMap
+                Map,
             )
             self.console.start(self, g)
             args, kwargs = self.get_args_and_kwargs(g.execute, args)
@@ -60,10 +65,20 @@ class SubCommand(object):
             self.console.finish()
 
 
+def positive_integer(value):
+    value = int(value)
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return value
+
+
 def configure_parser(parser, workspace, console):
     parser.add_argument("--debug", default=False, action="store_true")
     parser.add_argument("--serial", default=False, action="store_true")
+    parser.add_argument("--workers", default=map.ParallelMap.workers, type=positive_integer)
+    parser.add_argument("--adaptive", default=False, action="store_true")
     parser.add_argument("--unattended", default=False, action="store_true")
+    parser.add_argument("--verbose", default=False, action="store_true")
 
     sub = parser.add_subparsers()
     for name, goal in goals.registered():
@@ -86,6 +101,7 @@ def main():
         logging.basicConfig(level=logging.DEBUG, format="%(name)s: %(message)s")
 
     console.interactive = not args.unattended
+    console.verbose = args.verbose
 
     args.func(args)
 
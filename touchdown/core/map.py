@@ -14,10 +14,11 @@
 
 from __future__ import division
 
+import collections
+import heapq
 import logging
 import time
 import threading
-from six.moves import queue
 
 from . import errors
 
@@ -27,7 +28,9 @@ logger = logging.getLogger(__name__)
 
 class SerialMap(object):
 
-    def __init__(self, ui, resources, callable):
+    workers = 1
+
+    def __init__(self, ui, resources, callable, concurrency=None):
         self.ui = ui
         self.resources = resources
         self.callable = callable
@@ -40,114 +43,365 @@ class SerialMap(object):
             yield current
 
 
-class InteruptibleQueue(queue.Queue):
+class Feedback(object):
+
+    """ Collects signals about how remote APIs are coping with the load we
+    are putting on them. Plugins (such as the AWS session) record every API
+    call here, and an adaptive ParallelMap uses it to decide how many tasks
+    to run at once.
 
-    def _init(self, maxsize):
-        queue.Queue._init(self, maxsize)
-        self.stopped = False
+    Calls can be attributed to a group (such as an AWS service and region)
+    so that a summary of throttling can be shown at the end of a run. """
 
-    def stop(self):
-        self.stopped = True
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.latency = 0.0
+        self.throttles = 0
+        self.groups = {}
 
-    def __iter__(self):
-        while not self.stopped:
-            try:
-                yield self.get(timeout=1)
-                self.task_done()
-            except queue.Empty:
-                pass
+    def _get_group(self, group):
+        return self.groups.setdefault(group, {"calls": 0, "throttles": 0, "waited": 0.0})
 
+    def record_call(self, latency=None, throttled=False, group=None):
+        with self.lock:
+            stats = self._get_group(group)
+            self.calls += 1
+            stats["calls"] += 1
+            if latency is not None:
+                self.latency += latency
+            if throttled:
+                self.throttles += 1
+                stats["throttles"] += 1
+
+    def record_wait(self, seconds, group=None):
+        """ Record time spent waiting for a rate limiter """
+        with self.lock:
+            self._get_group(group)["waited"] += seconds
+
+    def snapshot(self):
+        with self.lock:
+            return self.calls, self.latency, self.throttles
+
+    def group_snapshot(self):
+        with self.lock:
+            return dict((group, dict(stats)) for group, stats in self.groups.items())
+
+    def throttling_summary(self, since=None):
+        """ Yields a line for each group that was throttled or rate limited
+        since ``since`` (a previous ``group_snapshot()``) """
+        since = since or {}
+        for group, stats in sorted(self.group_snapshot().items(), key=lambda item: str(item[0])):
+            before = since.get(group, {})
+            calls = stats["calls"] - before.get("calls", 0)
+            throttles = stats["throttles"] - before.get("throttles", 0)
+            waited = stats["waited"] - before.get("waited", 0.0)
+            if throttles or waited >= 0.1:
+                yield "{}: {} of {} calls throttled, {:.1f}s spent waiting for capacity".format(
+                    group, throttles, calls, waited,
+                )
+
+
+feedback = Feedback()
+
+
+class Concurrency(object):
+
+    """ Caps how many resources in the same group can be processed at the
+    same time. ``get_group`` maps a resource to a group name and ``limits``
+    maps a group name to the maximum number of concurrent tasks. Groups
+    without a limit are only constrained by the number of workers. """
+
+    def __init__(self, limits=None, get_group=None):
+        self.limits = limits or {}
+        for group, limit in self.limits.items():
+            if limit < 1:
+                raise errors.InvalidParameter("The concurrency limit for {} must be at least 1".format(group))
+        self.get_group = get_group
+        self.groups = {}
+        self.active = collections.defaultdict(int)
+
+    def group(self, resource):
+        if resource not in self.groups:
+            self.groups[resource] = self.get_group(resource) if self.get_group else None
+        return self.groups[resource]
+
+    def available(self, resource):
+        group = self.group(resource)
+        limit = self.limits.get(group)
+        return limit is None or self.active[group] < limit
+
+    def acquire(self, resource):
+        self.active[self.group(resource)] += 1
+
+    def release(self, resource):
+        self.active[self.group(resource)] -= 1
+
+
+class FixedLimit(object):
+
+    def __init__(self, maximum):
+        self.maximum = maximum
+        self.limit = maximum
+
+    def update(self):
+        pass
+
+
+class AdaptiveLimit(FixedLimit):
+
+    """ Adjusts the number of tasks that can run at once using additive
+    increase and multiplicative decrease.
+
+    Any throttling halves the limit straight away. Otherwise, once a full
+    round of tasks has completed, the limit grows by one unless the mean API
+    latency for that round has more than doubled compared to the best round
+    seen so far, in which case it shrinks by one. """
+
+    def __init__(self, maximum, feedback=feedback):
+        super(AdaptiveLimit, self).__init__(maximum)
+        self.limit = max(1, maximum // 2)
+        self.feedback = feedback
+        self.last = feedback.snapshot()
+        self.completed = 0
+        self.baseline = None
+
+    def update(self):
+        self.completed += 1
+        calls, latency, throttles = current = self.feedback.snapshot()
+        last_calls, last_latency, last_throttles = self.last
+
+        if throttles > last_throttles:
+            self.limit = max(1, self.limit // 2)
+        elif self.completed < self.limit:
+            return
+        elif calls > last_calls:
+            mean = (latency - last_latency) / (calls - last_calls)
+            if self.baseline is None or mean < self.baseline:
+                self.baseline = mean
+            if mean > self.baseline * 2:
+                self.limit = max(1, self.limit - 1)
+            else:
+                self.limit = min(self.maximum, self.limit + 1)
+        else:
+            self.limit = min(self.maximum, self.limit + 1)
+
+        logger.debug("Concurrency limit is now {}".format(self.limit))
+        self.completed = 0
+        self.last = current
+
+
+class SchedulerStats(object):
+
+    """ Records how much time a ParallelMap spends on scheduling rather than
+    doing useful work.
+
+    ``dispatch_latency`` is the time between a resource becoming ready and a
+    worker picking it up. ``bookkeeping`` is the time spent updating the
+    dependency map. Together they are the overhead the scheduler adds to a
+    goal run. """
+
+    def __init__(self):
+        self.started = time.time()
+        self.finished = None
+        self.dispatched = 0
+        self.dispatch_latency = 0.0
+        self.max_dispatch_latency = 0.0
+        self.bookkeeping = 0.0
+        self.busy = 0.0
+
+    def record_dispatch(self, latency):
+        self.dispatched += 1
+        self.dispatch_latency += latency
+        self.max_dispatch_latency = max(self.max_dispatch_latency, latency)
+
+    def finish(self):
+        self.finished = time.time()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def overhead(self):
+        return self.dispatch_latency + self.bookkeeping
+
+    def __str__(self):
+        return (
+            "{s.dispatched} tasks in {s.elapsed:.3f}s ({s.busy:.3f}s of work); "
+            "scheduler overhead {s.overhead:.3f}s "
+            "(dispatch {s.dispatch_latency:.3f}s, max {s.max_dispatch_latency:.3f}s, "
+            "bookkeeping {s.bookkeeping:.3f}s)"
+        ).format(s=self)
 
-class QueueOnce(InteruptibleQueue):
 
-    def _init(self, maxsize):
-        InteruptibleQueue._init(self, maxsize)
-        self._items = set()
+class ParallelMap(object):
 
-    def _put(self, item):
-        if item not in self._items:
-            InteruptibleQueue._put(self, item)
-            self._items.add(item)
+    """ Visits every node of a DependencyMap using a pool of threads.
 
+    All state is guarded by a single condition variable. When a worker
+    finishes a resource it marks it complete in the dependency map and
+    queues anything that was released straight away, so there is no
+    polling between a resource finishing and its dependents starting.
 
-class ParallelMap(object):
+    Ready resources are handed out in ``DependencyMap.priority`` order, so if
+    the map has been prioritised the longest chains of work start first.
+    Resources whose concurrency group is already at its limit are skipped
+    until a task in that group finishes.
+
+    If ``adaptive`` is set, ``workers`` is the upper bound and the number of
+    tasks allowed to run at once is adjusted by an :class:`AdaptiveLimit`. """
 
     workers = 8
-    ABORT = object()
 
-    def __init__(self, ui, resources, callable):
+    # Untimed waits can't be interrupted by Ctrl+C on Python 2, so the main
+    # thread wakes up periodically. Workers are always woken by notify().
+    interrupt_interval = 1
+
+    def __init__(self, ui, resources, callable, concurrency=None, workers=None, adaptive=False):
         self.ui = ui
         self.resources = resources
         self.callable = callable
-
-        self.ready = QueueOnce()
-        self.done = InteruptibleQueue()
+        self.concurrency = concurrency or Concurrency()
+
+        if workers is not None:
+            self.workers = workers
+        if self.workers < 1:
+            raise errors.InvalidParameter("There must be at least one worker")
+        if adaptive:
+            self.limit = AdaptiveLimit(self.workers)
+        else:
+            self.limit = FixedLimit(self.workers)
+
+        self.condition = threading.Condition()
+        self.pending = []
         self.active = set()
+        self.error = None
+        self.stopped = False
+        self.threads = []
+        self.stats = SchedulerStats()
 
         self.total = len(self.resources)
         self.current = 0
 
+    def schedule(self, resources):
+        now = time.time()
+        for resource in resources:
+            heapq.heappush(self.pending, (self.resources.priority(resource), now, resource))
+        self.condition.notify_all()
+
+    def pop_available(self):
+        skipped = []
+        found = None
+        while self.pending:
+            item = heapq.heappop(self.pending)
+            if self.concurrency.available(item[2]):
+                found = item
+                break
+            skipped.append(item)
+        for item in skipped:
+            heapq.heappush(self.pending, item)
+        return found
+
+    def next_resource(self):
+        with self.condition:
+            item = None
+            while not self.stopped and not item:
+                if len(self.active) < self.limit.limit:
+                    item = self.pop_available()
+                if not item:
+                    self.condition.wait()
+
+            if self.stopped:
+                return None
+
+            priority, ready_at, resource = item
+            self.stats.record_dispatch(time.time() - ready_at)
+            self.active.add(resource)
+            self.concurrency.acquire(resource)
+            return resource
+
+    def finished(self, resource, error, duration):
+        with self.condition:
+            self.active.remove(resource)
+            self.concurrency.release(resource)
+            self.stats.busy += duration
+
+            if error:
+                if not self.error:
+                    self.error = error
+                self.condition.notify_all()
+                return
+
+            start = time.time()
+            self.current += 1
+            self.limit.update()
+            released = self.resources.complete(resource)
+            self.stats.bookkeeping += time.time() - start
+            self.schedule(released)
+
     def worker(self):
-        for resource in self.ready:
+        while True:
+            resource = self.next_resource()
+            if resource is None:
+                return
+
+            start = time.time()
             try:
-                self.active.add(resource)
-                try:
-                    self.callable(resource)
-                finally:
-                    self.active.remove(resource)
-                self.done.put(resource)
+                self.callable(resource)
             except BaseException as e:
-                self.done.put(e)
-                continue
-
-    def pump_once(self):
-        try:
-            resource = self.done.get(timeout=1)
-        except queue.Empty:
-            return
-
-        if isinstance(resource, BaseException):
-            raise resource
-
-        self.current += 1
-
-        self.resources.complete(resource)
-        for resource in self.resources.get_ready():
-            self.ready.put(resource)
-        self.done.task_done()
+                self.finished(resource, e, time.time() - start)
+            else:
+                self.finished(resource, None, time.time() - start)
+
+    def wait(self, predicate):
+        """ Block the main thread until predicate() is true or the number of
+        completed tasks changes. Returns the number of completed tasks. """
+        with self.condition:
+            current = self.current
+            while not predicate() and current == self.current:
+                self.condition.wait(self.interrupt_interval)
+            return self.current
 
     def pump(self):
-        # Now we block on the "done" queue. Resources put in the queue are
-        # complete - so we can inform the dep solver and ask for any new work
-        # that this might unblock.
+        # Block until workers report progress. Resources are released by the
+        # workers themselves - we just need to report status and surface any
+        # errors.
         while not self.resources.empty():
-            self.pump_once()
-            yield self.current
+            current = self.wait(lambda: self.error or self.resources.empty())
+            if self.error:
+                raise self.error
+            yield current
 
     def wait_for_remaining(self):
-        # No more dependencies to process - we just need to wait for any
+        # No more work will be scheduled - we just need to wait for any
         # remaining tasks to complete
-        remaining = None
-        while len(self.active) > 0:
-            if len(self.active) != remaining:
-                remaining = len(self.active)
-                self.current = self.total - remaining
-            time.sleep(1)
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+        while self.active:
+            self.wait(lambda: not self.active)
+            with self.condition:
+                self.current = self.total - len(self.active)
             yield self.current
 
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self.worker, name="worker{}".format(i))
+            t.daemon = True
+            t.start()
+            self.threads.append(t)
+
+        # Seed the workers with the initial batch of work
+        # These are all the tasks that have no dependencies
+        with self.condition:
+            self.schedule(self.resources.get_ready())
+
     def __iter__(self):
         caught_error = None
         try:
-            # Start up as many workers as requested.
-            for i in range(self.workers):
-                t = threading.Thread(target=self.worker, name="worker{}".format(i))
-                t.start()
-
-            # Seed the workers with the initial batch of work
-            # These are all the tasks that have no dependencies
-            for resource in self.resources.get_ready():
-                self.ready.put(resource)
-
+            self.start()
             for current in self.pump():
                 yield current
 
@@ -166,7 +420,12 @@ class ParallelMap(object):
         finally:
             for current in self.wait_for_remaining():
                 yield current
-            self.ready.stop()
+
+            for t in self.threads:
+                t.join()
+
+            self.stats.finish()
+            logger.debug("Scheduler: {}".format(self.stats))
 
             if caught_error:
                 raise caught_error
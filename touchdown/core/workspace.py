@@ -12,17 +12,43 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from . import argument, errors
 from .resource import Resource
 
 
+# These services are far more sensitive to throttling than the rest of AWS,
+# so by default we don't let more than a couple of resources talk to them at
+# once.
+DEFAULT_CONCURRENCY = {
+    "cloudfront": 2,
+    "iam": 2,
+    "route53": 2,
+}
+
+
 class Workspace(Resource):
 
     resource_name = "workspace"
     dot_ignore = True
 
+    concurrency = argument.Dict(
+        default=lambda instance: dict(DEFAULT_CONCURRENCY),
+        help="The maximum number of resources per service that will be processed at once",
+    )
+
     def __init__(self):
         super(Workspace, self).__init__(None)
 
+    def clean_concurrency(self, concurrency):
+        for service, limit in concurrency.items():
+            if not isinstance(limit, int) or limit < 1:
+                raise errors.InvalidParameter("The limit for {} must be a whole number of at least 1".format(service))
+        # Setting the limit for one service shouldn't lift the default limits
+        # for the others
+        limits = dict(DEFAULT_CONCURRENCY)
+        limits.update(concurrency)
+        return limits
+
     @property
     def workspace(self):
         return self
@@ -19,6 +19,9 @@ import threading
 
 class BaseFrontend(object):
 
+    # Show more detail in plans, such as every file a folder sync will touch
+    verbose = False
+
     def failure(self, text):
         self.echo(text)
 
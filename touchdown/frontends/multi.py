@@ -22,6 +22,10 @@ class MultiFrontend(BaseFrontend):
     def __init__(self, frontends):
         self.frontends = frontends
 
+    @property
+    def verbose(self):
+        return self.frontends[0].verbose
+
     def failure(self, text):
         for fe in self.frontends:
             fe.failure(text)
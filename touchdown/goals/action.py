@@ -36,6 +36,7 @@ class ActionGoalMixin(object):
 
     def plan(self):
         self.reset_changes()
+        self.start_run()
         self.visit(
             "Building plan...",
             self.get_plan_order(),
@@ -55,10 +56,12 @@ class ActionGoalMixin(object):
             change.run()
 
     def apply_resources(self):
-        dep_map = self.get_execution_order()
-        with self.ui.progressbar(max_value=len(dep_map)) as pb:
-            for status in self.Map(self.ui, dep_map, self.apply_resource):
-                pb.update(status)
+        self.visit(
+            "Applying changes...",
+            self.get_execution_order(),
+            self.apply_resource,
+            phase="apply",
+        )
 
     def is_stale(self):
         return len(self.changes) != 0
@@ -13,6 +13,8 @@
 # limitations under the License.
 
 import os
+import shutil
+import tempfile
 import unittest
 import mock
 import six
@@ -24,8 +26,10 @@ except ImportError:
 
 import vcr
 
+from touchdown.aws.session import clients
 from touchdown.core import workspace, errors, goals
-from touchdown.frontends import ConsoleFrontend
+from touchdown.core.cache import JSONFileCache
+from touchdown.frontends import ConsoleFrontend, NonInteractiveFrontend
 from touchdown.core.map import SerialMap
 from touchdown.core.utils import force_bytes
 
@@ -145,6 +149,10 @@ class TestCase(unittest.TestCase):
 
         self._patcher = mock.patch('botocore.endpoint.Endpoint', TestEndpoint)
         self._patcher.start()
+        clients.clear()
+
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
 
         self.workspace = workspace.Workspace()
         self.aws = self.workspace.add_aws(access_key_id='dummy', secret_access_key='dummy', region='eu-west-1')
@@ -152,13 +160,45 @@ class TestCase(unittest.TestCase):
             "apply",
             self.workspace,
             ConsoleFrontend(interactive=False),
-            map=SerialMap
+            map=SerialMap,
+            cache=JSONFileCache(self.cache_directory),
         )
 
     def tearDown(self):
         self._patcher.stop()
 
 
+class MockClientTestCase(unittest.TestCase):
+
+    """ Drives plans directly against a mock botocore client. Use this to
+    test which API calls a plan makes (and how often), and :class:`TestCase`
+    to test how it handles real responses. """
+
+    goal_name = "apply"
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+
+        self.workspace = workspace.Workspace()
+        self.aws = self.workspace.add_aws(access_key_id='dummy', secret_access_key='dummy', region='eu-west-1')
+        self.goal = goals.create(
+            self.goal_name,
+            self.workspace,
+            NonInteractiveFrontend(),
+            map=SerialMap,
+            cache=JSONFileCache(self.cache_directory),
+        )
+        self.client = mock.Mock()
+
+    def get_plan(self, resource, object=None):
+        plan = self.goal.get_plan(resource)
+        plan._client = self.client
+        if object is not None:
+            plan.object = object
+        return plan
+
+
 class TestBasicUsage(TestCase):
 
     def setUp(self):
@@ -221,6 +261,10 @@ class RecordedBotoCoreTest(unittest.TestCase):
             'botocore.vendored.requests.packages.urllib3.connectionpool.is_connection_dropped',
         ))
         is_conn_dropped.return_value = True
+        clients.clear()
+
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
 
         self.workspace = workspace.Workspace()
         self.aws = self.workspace.add_aws(region='eu-west-1')
@@ -229,11 +273,23 @@ class RecordedBotoCoreTest(unittest.TestCase):
         self.stack.close()
 
     def apply(self):
-        self.apply_runner = goals.create("apply", self.workspace, ConsoleFrontend(interactive=False), map=SerialMap)
+        self.apply_runner = goals.create(
+            "apply",
+            self.workspace,
+            ConsoleFrontend(interactive=False),
+            map=SerialMap,
+            cache=JSONFileCache(self.cache_directory),
+        )
         self.apply_runner.execute()
         self.assertRaises(errors.NothingChanged, self.apply_runner.execute)
 
     def destroy(self):
-        self.destroy_runner = goals.create("destroy", self.workspace, ConsoleFrontend(interactive=False), map=SerialMap)
+        self.destroy_runner = goals.create(
+            "destroy",
+            self.workspace,
+            ConsoleFrontend(interactive=False),
+            map=SerialMap,
+            cache=JSONFileCache(self.cache_directory),
+        )
         self.destroy_runner.execute()
         self.assertRaises(errors.NothingChanged, self.destroy_runner.execute)
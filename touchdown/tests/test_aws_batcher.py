@@ -0,0 +1,159 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import threading
+import time
+import unittest
+
+from botocore.exceptions import ClientError
+
+from touchdown.aws.batcher import find_identifier, with_identifiers
+from touchdown.core.map import ParallelMap, SerialMap
+
+from . import aws
+
+
+class TestIdentifiers(unittest.TestCase):
+
+    def test_list_parameter(self):
+        filters = {"LoadBalancerNames": ["foo"]}
+        path, value = find_identifier(filters, {"LoadBalancerNames": "LoadBalancerName"})
+        self.assertEqual(value, "foo")
+        self.assertEqual(with_identifiers(filters, path, ["foo", "bar"]), {"LoadBalancerNames": ["foo", "bar"]})
+
+    def test_ec2_filter(self):
+        filters = {"Filters": [
+            {"Name": "tag:Name", "Values": ["foo"]},
+            {"Name": "vpc-id", "Values": ["vpc-1"]},
+        ]}
+        path, value = find_identifier(filters, {"tag:Name": "tag:Name"})
+        self.assertEqual(value, "foo")
+        self.assertEqual(with_identifiers(filters, path, ["foo", "bar"]), {"Filters": [
+            {"Name": "tag:Name", "Values": ["foo", "bar"]},
+            {"Name": "vpc-id", "Values": ["vpc-1"]},
+        ]})
+
+    def test_ec2_wildcard(self):
+        filters = {"Filters": [{"Name": "tag:Name", "Values": ["foo*"]}]}
+        self.assertEqual(find_identifier(filters, {"tag:Name": "tag:Name"}), None)
+
+
+class TestBatchedDescribe(aws.MockClientTestCase):
+
+    def setUp(self):
+        super(TestBatchedDescribe, self).setUp()
+
+        self.client.can_paginate.return_value = True
+        self.client.get_paginator.return_value.paginate.side_effect = self.paginate
+
+        self.plans = [self.get_plan(self.aws.add_load_balancer(
+            name="balancer{}".format(i),
+            listeners=[{"port": 80, "protocol": "http", "instance_port": 8080, "instance_protocol": "http"}],
+        )) for i in range(10)]
+
+        self.calls = []
+
+    def paginate(self, LoadBalancerNames):
+        self.calls.append(LoadBalancerNames)
+        # Hold the first call open until every plan has asked for something
+        batcher = self.goal.get_shared("batcher", None)
+        while len(self.calls) == 1 and batcher.requests < len(self.plans):
+            time.sleep(0.01)
+        if len(LoadBalancerNames) > 1 and "balancer9" in LoadBalancerNames:
+            raise ClientError({"Error": {"Code": "LoadBalancerNotFound", "Message": ""}}, "DescribeLoadBalancers")
+        return [{"LoadBalancerDescriptions": [
+            {"LoadBalancerName": name} for name in LoadBalancerNames if name != "balancer9"
+        ]}]
+
+    def describe_all(self):
+        results = {}
+
+        def describe(plan):
+            results[plan.resource.name] = plan.describe_object()
+
+        threads = []
+        for plan in self.plans:
+            thread = threading.Thread(target=describe, args=(plan, ))
+            thread.start()
+            threads.append(thread)
+            # Make sure the first plan starts the first call
+            while not self.calls:
+                time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_describes_batched(self):
+        self.plans.pop()
+        results = self.describe_all()
+        for i in range(9):
+            self.assertEqual(results["balancer{}".format(i)], {"LoadBalancerName": "balancer{}".format(i)})
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(len(self.calls[1]), 8)
+
+    def test_batch_error_falls_back(self):
+        results = self.describe_all()
+        self.assertEqual(results["balancer1"], {"LoadBalancerName": "balancer1"})
+        self.assertEqual(results["balancer9"], {})
+        # One on its own, one failed batch, then one each for the rest
+        self.assertEqual(len(self.calls), 11)
+
+
+class TestBatchWindow(aws.MockClientTestCase):
+
+    def setUp(self):
+        super(TestBatchWindow, self).setUp()
+
+        self.goal.Map = functools.partial(ParallelMap, workers=8)
+        self.client.can_paginate.return_value = True
+        self.client.get_paginator.return_value.paginate.side_effect = self.paginate
+
+        self.plans = [self.get_plan(self.aws.add_load_balancer(
+            name="balancer{}".format(i),
+            listeners=[{"port": 80, "protocol": "http", "instance_port": 8080, "instance_protocol": "http"}],
+        )) for i in range(8)]
+
+        self.lock = threading.Lock()
+        self.calls = []
+
+    def paginate(self, LoadBalancerNames):
+        with self.lock:
+            self.calls.append(LoadBalancerNames)
+        return [{"LoadBalancerDescriptions": [{"LoadBalancerName": name} for name in LoadBalancerNames]}]
+
+    def test_concurrent_describes_batched(self):
+        start = threading.Event()
+        results = {}
+
+        def describe(plan):
+            start.wait()
+            results[plan.resource.name] = plan.describe_object()
+
+        threads = [threading.Thread(target=describe, args=(plan, )) for plan in self.plans]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+
+        for i in range(8):
+            self.assertEqual(results["balancer{}".format(i)], {"LoadBalancerName": "balancer{}".format(i)})
+        self.assertLess(len(self.calls), len(self.plans))
+
+    def test_no_window_when_serial(self):
+        self.assertEqual(self.plans[0].batcher.window, 0.05)
+        self.goal.Map = SerialMap
+        self.goal.shared = {}
+        self.assertEqual(self.plans[0].batcher.window, 0)
@@ -0,0 +1,69 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+from touchdown.aws.session import ClientPool, Session
+
+
+class TestClientPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ClientPool()
+        self.session = Session("dummy", "dummy", None, None, "eu-west-1")
+
+    def test_reuses_clients(self):
+        client = self.pool.create_client(self.session, "sqs")
+        self.assertIs(self.pool.create_client(self.session, "sqs"), client)
+        self.assertEqual((self.pool.created, self.pool.reused), (1, 1))
+
+    def test_keyed_by_credentials_and_region(self):
+        other = Session("other", "dummy", None, None, "eu-west-1")
+        elsewhere = Session("dummy", "dummy", None, None, "us-east-1")
+        client = self.pool.create_client(self.session, "sqs")
+        self.assertIsNot(self.pool.create_client(other, "sqs"), client)
+        self.assertIsNot(self.pool.create_client(elsewhere, "sqs"), client)
+        self.assertIsNot(self.pool.create_client(self.session, "sns"), client)
+        self.assertEqual(self.pool.created, 4)
+
+    def get_pool_size(self, client):
+        config = getattr(client.meta, "config", None)
+        if hasattr(config, "max_pool_connections"):
+            return config.max_pool_connections
+        return client._endpoint.http_session.adapters["https://"]._pool_maxsize
+
+    def test_pool_sized_to_workers(self):
+        client = self.pool.create_client(self.session, "sqs", 32)
+        self.assertEqual(self.get_pool_size(client), 32)
+
+    def test_keyed_by_pool_size(self):
+        client = self.pool.create_client(self.session, "sqs", 32)
+        self.assertIs(self.pool.create_client(self.session, "sqs", 32), client)
+        self.assertEqual(self.get_pool_size(self.pool.create_client(self.session, "sqs", 16)), 16)
+
+    def test_threads_share_one_client(self):
+        results = []
+
+        def create():
+            results.append(self.pool.create_client(self.session, "sqs"))
+
+        threads = [threading.Thread(target=create) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(set(id(c) for c in results)), 1)
+        self.assertEqual(self.pool.created, 1)
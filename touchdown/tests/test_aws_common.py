@@ -23,6 +23,8 @@ from touchdown.core import serializers
 from touchdown.aws import common
 from touchdown.aws.elasticache import CacheCluster
 
+from . import aws
+
 
 class TestGenericAction(unittest.TestCase):
 
@@ -42,6 +44,42 @@ class TestGenericAction(unittest.TestCase):
         )
 
 
+class TestDescribeMemoization(aws.MockClientTestCase):
+
+    def setUp(self):
+        super(TestDescribeMemoization, self).setUp()
+        self.client.can_paginate.return_value = False
+        self.client.describe_key_pairs.return_value = {"KeyPairs": [{"KeyName": "foo"}]}
+        self.plan = self.get_plan(self.aws.add_keypair(name="foo", public_key="ssh-rsa AAAA"))
+
+    def test_get_object_memoized(self):
+        self.assertEqual(self.plan.get_object(), {"KeyName": "foo"})
+        self.assertEqual(self.plan.get_object(), {"KeyName": "foo"})
+        self.assertEqual(self.client.describe_key_pairs.call_count, 1)
+
+    def test_get_object_returns_copy(self):
+        self.plan.get_object()["KeyName"] = "bar"
+        self.assertEqual(self.plan.get_object(), {"KeyName": "foo"})
+
+    def test_invalidate(self):
+        self.plan.get_object()
+        self.plan.invalidate()
+        self.plan.get_object()
+        self.assertEqual(self.client.describe_key_pairs.call_count, 2)
+
+    def test_action_invalidates(self):
+        self.plan.get_object()
+        self.plan.generic_action("Change", self.client.delete_key_pair, KeyName="foo").run()
+        self.plan.get_object()
+        self.assertEqual(self.client.describe_key_pairs.call_count, 2)
+
+    def test_new_run_describes_again(self):
+        self.plan.get_object()
+        self.goal.start_run()
+        self.plan.get_object()
+        self.assertEqual(self.client.describe_key_pairs.call_count, 2)
+
+
 class TestSimpleDescribeImplementations(unittest.TestCase):
 
     ignore = (
@@ -67,3 +105,16 @@ class TestSimpleDescribeImplementations(unittest.TestCase):
                     impl.describe_envelope in operation.output_shape.members,
                     True
                 )
+
+
+class TestWaiter(aws.MockClientTestCase):
+
+    def test_parent_not_described(self):
+        vpc = self.aws.add_vpc(name="test-vpc", cidr_block="10.0.0.0/16")
+        self.get_plan(vpc)
+        plan = self.get_plan(vpc.add_subnet(name="test-subnet", cidr_block="10.0.0.0/24"))
+        self.client.get_waiter.return_value.config.acceptors = []
+
+        waiter = plan.get_waiter(["Waiting for subnet"], "subnet_available")
+        self.assertFalse(waiter.ready())
+        self.assertFalse(self.client.get_waiter.return_value._operation_method.called)
@@ -0,0 +1,86 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import mock
+
+from touchdown.aws.governor import Governor, TokenBucket
+from touchdown.core.map import Feedback
+
+
+THROTTLED = (None, {"Error": {"Code": "Throttling", "Message": "Rate exceeded"}})
+OK = (None, {"ResponseMetadata": {}})
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertGreater(bucket.reserve(), 0)
+
+    def test_adapts_rate(self):
+        bucket = TokenBucket(rate=10)
+        bucket.throttled()
+        self.assertEqual(bucket.rate, 5)
+        bucket.succeeded()
+        self.assertAlmostEqual(bucket.rate, 5.1)
+
+
+class TestGovernor(unittest.TestCase):
+
+    key = ("dummy", "eu-west-1", "route53")
+
+    def setUp(self):
+        self.feedback = Feedback()
+        self.governor = Governor(self.feedback)
+
+    def test_retries_throttling(self):
+        delay = self.governor.needs_retry(self.key, attempts=1, response=THROTTLED)
+        self.assertIsNotNone(delay)
+        self.assertEqual(self.governor.get_bucket(self.key).rate, 2.5)
+        self.assertEqual(self.feedback.snapshot()[2], 1)
+
+    def test_gives_up_eventually(self):
+        delay = self.governor.needs_retry(
+            self.key, attempts=self.governor.max_attempts, response=THROTTLED)
+        self.assertIsNone(delay)
+
+    def test_success_is_not_retried(self):
+        self.assertIsNone(self.governor.needs_retry(self.key, attempts=1, response=OK))
+        self.assertEqual(self.feedback.snapshot()[0], 1)
+
+    def test_throttling_summary(self):
+        self.governor.needs_retry(self.key, attempts=1, response=THROTTLED)
+        self.governor.needs_retry(self.key, attempts=2, response=OK)
+        self.assertEqual(
+            list(self.feedback.throttling_summary()),
+            ["route53 (eu-west-1): 1 of 2 calls throttled, 0.0s spent waiting for capacity"],
+        )
+
+    def test_botocore_events(self):
+        # The arguments botocore 1.0 sends with each event
+        self.governor.before_call(self.key, params={}, model=mock.Mock(), request_signer=mock.Mock())
+        delay = self.governor.needs_retry(
+            self.key,
+            response=THROTTLED,
+            endpoint=mock.Mock(),
+            operation=mock.Mock(),
+            attempts=1,
+            caught_exception=None,
+        )
+        self.assertIsNotNone(delay)
+        self.assertEqual(self.feedback.snapshot()[2], 1)
@@ -12,12 +12,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from six.moves.urllib.parse import parse_qs
+
+from touchdown.core import errors, goals
+from touchdown.core.utils import force_str
+
 from . import aws
 
 
-class TestRole(aws.RecordedBotoCoreTest):
+def action(name):
+    def match(request, m):
+        return parse_qs(force_str(request.body)).get("Action") == [name]
+    return match
+
+
+class TestRole(aws.TestCase):
+
+    def setUp(self):
+        super(TestRole, self).setUp()
 
-    def test_create_and_delete_role(self):
         self.aws.add_role(
             name="my-test-role",
             assume_role_policy={
@@ -28,5 +41,42 @@ class TestRole(aws.RecordedBotoCoreTest):
                 }],
             },
         )
-        self.apply()
-        self.destroy()
+
+    def add_fixture(self, name, fixture, expires=None):
+        self.responses.add_fixture("POST", action(name), fixture, expires=expires)
+
+    def get_actions(self):
+        return [parse_qs(force_str(request.body))["Action"][0] for request, response in self.responses.calls]
+
+    def test_create_and_delete_role(self):
+        self.add_fixture("GetAccountAuthorizationDetails", "aws_role_describe_404", expires=1)
+        self.add_fixture("CreateRole", "aws_role_create", expires=1)
+        self.add_fixture("GetRole", "aws_role_get", expires=1)
+        self.add_fixture("ListRolePolicies", "aws_role_list_role_policies", expires=1)
+        self.add_fixture("ListInstanceProfilesForRole", "aws_role_list_instance_profiles_for_role", expires=1)
+        self.add_fixture("GetAccountAuthorizationDetails", "aws_role_describe", expires=2)
+        self.add_fixture("DeleteRole", "aws_role_delete", expires=1)
+        self.add_fixture("GetRole", "aws_role_get_404", expires=1)
+        self.add_fixture("GetAccountAuthorizationDetails", "aws_role_describe_404")
+
+        self.goal.execute()
+        self.assertRaises(errors.NothingChanged, self.goal.execute)
+
+        destroy = goals.create("destroy", self.workspace, self.goal.ui, map=self.goal.Map, cache=self.goal.cache)
+        destroy.execute()
+        self.assertRaises(errors.NothingChanged, destroy.execute)
+
+        # Each change refreshes just the role, and each run fetches the
+        # account snapshot once
+        self.assertEqual(self.get_actions(), [
+            "GetAccountAuthorizationDetails",
+            "CreateRole",
+            "GetRole",
+            "ListRolePolicies",
+            "ListInstanceProfilesForRole",
+            "GetAccountAuthorizationDetails",
+            "GetAccountAuthorizationDetails",
+            "DeleteRole",
+            "GetRole",
+            "GetAccountAuthorizationDetails",
+        ])
@@ -0,0 +1,211 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+from botocore.exceptions import ClientError
+
+from touchdown.core import errors
+
+from . import aws
+
+
+class TestInventory(aws.MockClientTestCase):
+
+    def setUp(self):
+        super(TestInventory, self).setUp()
+
+        self.client.can_paginate.return_value = True
+        self.client.get_paginator.return_value.paginate.return_value = [
+            {"Topics": [{"TopicArn": "arn:aws:sns:eu-west-1:000000000000:topic{}".format(i)} for i in range(50)]},
+            {"Topics": [{"TopicArn": "arn:aws:sns:eu-west-1:000000000000:topic{}".format(i)} for i in range(50, 100)]},
+        ]
+
+        self.plans = [self.get_plan(self.aws.add_topic(name="topic{}".format(i))) for i in range(0, 100, 10)]
+
+    def test_listing_shared(self):
+        for i, plan in enumerate(self.plans):
+            self.assertEqual(plan.describe_object(), {
+                "TopicArn": "arn:aws:sns:eu-west-1:000000000000:topic{}".format(i * 10),
+            })
+        self.assertEqual(self.client.get_paginator.call_count, 1)
+
+    def test_invalidate(self):
+        self.plans[0].describe_object()
+        self.plans[0].invalidate()
+        self.plans[1].describe_object()
+        self.assertEqual(self.client.get_paginator.call_count, 2)
+
+    def test_describe_returns_copy(self):
+        self.plans[0].describe_object()["TopicArn"] = "changed"
+        self.assertEqual(self.plans[0].describe_object(), {
+            "TopicArn": "arn:aws:sns:eu-west-1:000000000000:topic0",
+        })
+
+
+class TestIamSnapshot(aws.MockClientTestCase):
+
+    def setUp(self):
+        super(TestIamSnapshot, self).setUp()
+
+        self.client.can_paginate.return_value = True
+        self.paginators = {
+            "list_instance_profiles": mock.Mock(),
+            "list_roles": mock.Mock(),
+        }
+        self.client.get_paginator.side_effect = lambda name: self.paginators[name]
+        self.client.get_account_authorization_details.return_value = {"RoleDetailList": [{
+            "RoleName": "role1",
+            "InstanceProfileList": [{"InstanceProfileName": "profile1", "Roles": [{"RoleName": "role1"}]}],
+            "RolePolicyList": [
+                {"PolicyName": "same", "PolicyDocument": {"Statement": []}},
+                {"PolicyName": "old", "PolicyDocument": {"Statement": []}},
+            ],
+        }], "IsTruncated": False}
+        self.paginators["list_instance_profiles"].paginate.return_value = [{"InstanceProfiles": [
+            {"InstanceProfileName": "profile2", "Roles": []},
+        ]}]
+
+        self.role = self.aws.add_role(name="role1", policies={
+            "same": {"Statement": []},
+            "new": {"Statement": []},
+        })
+
+    def test_role_policies(self):
+        plan = self.get_plan(self.role)
+        plan.object = plan.get_object()
+        descriptions = [action.description[0] for action in plan.update_object()]
+        self.assertEqual(sorted(descriptions), ["Delete policy old", "Put policy new"])
+        self.assertFalse(self.client.list_role_policies.called)
+        self.assertFalse(self.client.get_role_policy.called)
+
+    def test_instance_profile_from_snapshot(self):
+        self.get_plan(self.role).describe_object()
+        plan = self.get_plan(self.aws.add_instance_profile(name="profile1", roles=[self.role]))
+        self.assertEqual(plan.describe_object()["Roles"], [{"RoleName": "role1"}])
+        self.assertEqual(self.client.get_account_authorization_details.call_count, 1)
+        self.assertFalse(self.paginators["list_instance_profiles"].paginate.called)
+
+    def test_instance_profile_without_roles(self):
+        plan = self.get_plan(self.aws.add_instance_profile(name="profile2"))
+        self.assertEqual(plan.describe_object(), {"InstanceProfileName": "profile2", "Roles": []})
+        self.assertEqual(self.get_plan(self.aws.add_instance_profile(name="profile3")).describe_object(), {})
+        self.assertEqual(self.paginators["list_instance_profiles"].paginate.call_count, 1)
+
+    def test_access_denied_falls_back_to_list_roles(self):
+        self.client.get_account_authorization_details.side_effect = ClientError(
+            {"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "GetAccountAuthorizationDetails",
+        )
+        self.paginators["list_roles"].paginate.return_value = [{"Roles": [{"RoleName": "role1"}]}]
+        self.client.list_role_policies.return_value = {"PolicyNames": ["same", "old"]}
+        self.client.get_role_policy.return_value = {"PolicyDocument": {"Statement": []}}
+
+        plan = self.get_plan(self.role)
+        plan.object = plan.get_object()
+        self.assertEqual(plan.object, {"RoleName": "role1"})
+        descriptions = [action.description[0] for action in plan.update_object()]
+        self.assertEqual(sorted(descriptions), ["Delete policy old", "Put policy new"])
+
+        plan = self.get_plan(self.aws.add_instance_profile(name="profile2"))
+        self.assertEqual(plan.describe_object(), {"InstanceProfileName": "profile2", "Roles": []})
+        self.assertEqual(self.paginators["list_roles"].paginate.call_count, 1)
+
+    def test_other_errors_not_hidden(self):
+        self.client.get_account_authorization_details.side_effect = ClientError(
+            {"Error": {"Code": "Throttling", "Message": "Rate exceeded"}}, "GetAccountAuthorizationDetails",
+        )
+        self.assertRaises(errors.Error, self.get_plan(self.role).describe_object)
+        self.assertFalse(self.paginators["list_roles"].paginate.called)
+
+    def test_pages_followed(self):
+        self.client.get_account_authorization_details.side_effect = [
+            {"RoleDetailList": [{"RoleName": "role0"}], "IsTruncated": True, "Marker": "page2"},
+            {"RoleDetailList": [{"RoleName": "role1"}], "IsTruncated": False},
+        ]
+        self.assertEqual(self.get_plan(self.role).describe_object(), {"RoleName": "role1"})
+        self.client.get_account_authorization_details.assert_called_with(Filter=["Role"], Marker="page2")
+
+    def test_changed_role_replaced_in_snapshot(self):
+        plan = self.get_plan(self.role)
+        plan.get_object()
+
+        self.client.get_role.return_value = {"Role": {"RoleName": "role1", "Path": "/new/"}}
+        self.client.list_role_policies.return_value = {"PolicyNames": ["same"]}
+        self.client.get_role_policy.return_value = {"PolicyDocument": {"Statement": []}}
+        self.client.list_instance_profiles_for_role.return_value = {"InstanceProfiles": []}
+        plan.invalidate()
+
+        self.assertEqual(plan.get_object(), {
+            "RoleName": "role1",
+            "Path": "/new/",
+            "RolePolicyList": [{"PolicyName": "same", "PolicyDocument": {"Statement": []}}],
+            "InstanceProfileList": [],
+        })
+        self.assertEqual(self.client.get_account_authorization_details.call_count, 1)
+
+        # Other plans see the change without fetching the snapshot again
+        profile = self.get_plan(self.aws.add_instance_profile(name="profile1", roles=[self.role]))
+        self.assertEqual(profile.describe_object(), {})
+        self.assertEqual(self.client.get_account_authorization_details.call_count, 1)
+
+    def test_deleted_role_removed_from_snapshot(self):
+        plan = self.get_plan(self.role)
+        plan.get_object()
+        self.client.get_role.side_effect = ClientError(
+            {"Error": {"Code": "NoSuchEntity", "Message": "Role not found"}}, "GetRole",
+        )
+        plan.invalidate()
+        self.assertEqual(plan.get_object(), {})
+        self.assertEqual(self.client.get_account_authorization_details.call_count, 1)
+
+    def test_refresh_failure_fetches_snapshot_again(self):
+        plan = self.get_plan(self.role)
+        plan.get_object()
+        self.client.get_role.side_effect = ClientError(
+            {"Error": {"Code": "Throttling", "Message": "Rate exceeded"}}, "GetRole",
+        )
+        plan.invalidate()
+        plan.get_object()
+        self.assertEqual(self.client.get_account_authorization_details.call_count, 2)
+
+    def test_snapshot_not_fetched_to_refresh(self):
+        self.get_plan(self.role).invalidate()
+        self.assertFalse(self.client.get_role.called)
+        self.assertFalse(self.client.get_account_authorization_details.called)
+
+
+class TestInventoryRuns(aws.MockClientTestCase):
+
+    goal_name = "destroy"
+
+    def setUp(self):
+        super(TestInventoryRuns, self).setUp()
+
+        self.client.can_paginate.return_value = True
+        self.paginate = self.client.get_paginator.return_value.paginate
+        self.paginate.return_value = [{"Topics": [{"TopicArn": "arn:aws:sns:eu-west-1:000000000000:topic1"}]}]
+
+        self.plan = self.get_plan(self.aws.add_topic(name="topic1"))
+
+    def test_new_run_fetches_again(self):
+        self.plan.describe_object()
+        self.goal.start_run()
+        self.plan.describe_object()
+        self.assertEqual(self.paginate.call_count, 2)
+
+    def test_delete_invalidates(self):
+        action, = self.plan.get_actions()
+        self.paginate.return_value = [{"Topics": []}]
+        action.run()
+        self.assertEqual(self.plan.get_object(), {})
+        self.assertEqual(self.paginate.call_count, 2)
@@ -0,0 +1,103 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from touchdown.core import errors
+from touchdown.core.map import ParallelMap
+
+from . import aws
+
+
+class TestKeyDescribe(aws.MockClientTestCase):
+
+    def setUp(self):
+        super(TestKeyDescribe, self).setUp()
+
+        self.client.can_paginate.return_value = True
+        self.client.get_paginator.return_value.paginate.return_value = [
+            {"Keys": [{"KeyId": "key{}".format(i)} for i in range(20)]},
+        ]
+        self.client.describe_key.side_effect = self.describe_key
+
+        self.plans = [self.get_plan(self.aws.add_key(description="key {}".format(i))) for i in range(0, 20, 5)]
+
+    def describe_key(self, KeyId):
+        if KeyId == "key19":
+            raise ClientError({"Error": {"Code": "AccessDeniedException", "Message": "Access denied"}}, "DescribeKey")
+        return {"KeyMetadata": {"KeyId": KeyId, "Description": "key {}".format(KeyId[3:])}}
+
+    def test_keys_described_once(self):
+        for i, plan in enumerate(self.plans):
+            self.assertEqual(plan.describe_object()["KeyId"], "key{}".format(i * 5))
+        self.assertEqual(self.client.get_paginator.call_count, 1)
+        self.assertEqual(self.client.describe_key.call_count, 20)
+
+    def test_missing(self):
+        plan = self.get_plan(self.aws.add_key(description="key 19"))
+        self.assertEqual(plan.describe_object(), {})
+
+    def test_invalidate(self):
+        self.plans[0].object = self.plans[0].describe_object()
+        self.plans[0].invalidate()
+        self.assertEqual(self.plans[0].describe_object()["KeyId"], "key0")
+        self.plans[1].describe_object()
+        self.assertEqual(self.client.describe_key.call_count, 21)
+
+    def test_invalidate_after_create(self):
+        plan = self.get_plan(self.aws.add_key(description="key 20"))
+        self.assertEqual(plan.describe_object(), {})
+        plan.invalidate()
+        plan.object = {"KeyId": "key20"}
+        self.assertEqual(plan.describe_object()["Description"], "key 20")
+        self.assertEqual(self.plans[1].describe_object()["KeyId"], "key5")
+        self.assertEqual(self.client.describe_key.call_count, 21)
+
+    def test_invalidate_unknown_key(self):
+        self.plans[0].describe_object()
+        self.plans[0].invalidate()
+        self.plans[1].describe_object()
+        self.plans[0].describe_object()
+        self.assertEqual(self.client.describe_key.call_count, 40)
+
+    def test_failure(self):
+        self.client.describe_key.side_effect = ClientError({"Error": {"Code": "Throttling", "Message": "Rate exceeded"}}, "DescribeKey")
+        self.assertRaises(errors.Error, self.plans[0].describe_object)
+
+    def test_concurrency_limit(self):
+        self.workspace.concurrency = {"kms": 2}
+        self.goal.Map = functools.partial(ParallelMap, workers=8)
+        lock = threading.Lock()
+        active = []
+        peak = []
+        described = []
+
+        def describe_key(KeyId):
+            with lock:
+                described.append(KeyId)
+                active.append(KeyId)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(KeyId)
+            return self.describe_key(KeyId)
+
+        self.client.describe_key.side_effect = describe_key
+        self.assertEqual(self.plans[1].describe_object()["KeyId"], "key5")
+        self.assertEqual(len(described), 20)
+        self.assertEqual(max(peak), 2)
@@ -12,7 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import tempfile
+
+from touchdown.aws.route53 import HostedZone
 from touchdown.core import errors
+from touchdown.core.utils import force_bytes
 
 from . import aws
 
@@ -163,3 +168,144 @@ class TestHostedZone(aws.TestCase):
         self.responses.add_fixture("GET", "https://route53.amazonaws.com/2013-04-01/hostedzone", self.fixture_found)
         self.goal.execute()
         self.assertEqual(self.plan.resource_id, self.expected_resource_id)
+
+
+class TestHostedZoneRecordPages(aws.TestCase):
+
+    rrset_url = "https://route53.amazonaws.com/2013-04-01/hostedzone/Z111111QQQQQQQ/rrset"
+
+    def setUp(self):
+        super(TestHostedZoneRecordPages, self).setUp()
+        self.responses.add_fixture("GET", "https://route53.amazonaws.com/2013-04-01/hostedzone", "aws_hosted_zone_describe")
+        self.responses.add_fixture("POST", self.rrset_url + "/", "aws_hosted_zone_rrset_change")
+
+    def match_list(self, request, m):
+        return request.method == "GET" and request.url.split("?")[0] == self.rrset_url
+
+    def add_hosted_zone(self, count):
+        self.aws.add_hosted_zone(name="example.com", records=[
+            {"name": "host{}.example.com".format(i), "type": "A", "ttl": 900, "values": ["127.0.0.1"]}
+            for i in range(count)
+        ])
+
+    def get_batch_sizes(self):
+        return [
+            force_bytes(request.body).count(b"<Change>")
+            for request, response in self.responses.calls
+            if request.method == "POST"
+        ]
+
+    def test_paginated(self):
+        self.add_hosted_zone(4)
+        self.responses.add_fixture("GET", self.match_list, "aws_hosted_zone_rrset_page_1", expires=1)
+        self.responses.add_fixture("GET", self.match_list, "aws_hosted_zone_rrset_page_2", expires=1)
+        self.assertRaises(errors.NothingChanged, self.goal.execute)
+
+        urls = [request.url for request, response in self.responses.calls if request.url.startswith(self.rrset_url)]
+        self.assertEqual(len(urls), 2)
+        self.assertIn("name=host2.example.com.", urls[1])
+        self.assertIn("type=A", urls[1])
+
+    def test_deletes_batched(self):
+        self.aws.add_hosted_zone(name="example.com")
+        self.responses.add("GET", self.match_list, content_type="text/xml", headers={}, body="".join([
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<ListResourceRecordSetsResponse xmlns="https://route53.amazonaws.com/doc/2013-04-01/">',
+            '<ResourceRecordSets>',
+        ] + [
+            '<ResourceRecordSet><Name>host{}.example.com.</Name><Type>A</Type><TTL>900</TTL>'
+            '<ResourceRecords><ResourceRecord><Value>127.0.0.1</Value></ResourceRecord></ResourceRecords>'
+            '</ResourceRecordSet>'.format(i)
+            for i in range(1200)
+        ] + [
+            '</ResourceRecordSets>',
+            '<IsTruncated>false</IsTruncated>',
+            '<MaxItems>1200</MaxItems>',
+            '</ListResourceRecordSetsResponse>',
+        ]))
+        self.goal.execute()
+        self.assertEqual(self.get_batch_sizes(), [1000, 200])
+
+    def test_upserts_count_twice(self):
+        self.add_hosted_zone(600)
+        self.responses.add_fixture("GET", self.match_list, "aws_hosted_zone_rrset_0")
+        self.goal.execute()
+        self.assertEqual(self.get_batch_sizes(), [500, 100])
+
+
+class TestHostedZoneRecords(aws.MockClientTestCase):
+
+    def get_zone_plan(self, records, pages, **kwargs):
+        self.client.get_paginator.return_value.paginate.return_value = [
+            {"ResourceRecordSets": page} for page in pages
+        ]
+        return self.get_plan(
+            self.aws.add_hosted_zone(name="example.com", records=records, **kwargs),
+            {"Id": "/hostedzone/Z111111QQQQQQQ", "Name": "example.com."},
+        )
+
+    def get_record(self, i, value="127.0.0.1"):
+        return {
+            "Name": "host{}.example.com.".format(i),
+            "Type": "A",
+            "TTL": 900,
+            "ResourceRecords": [{"Value": value}],
+        }
+
+    def test_changes(self):
+        plan = self.get_zone_plan(
+            [
+                {"name": "host0.example.com", "type": "A", "ttl": 900, "values": ["127.0.0.1"]},
+                {"name": "host1.example.com", "type": "A", "ttl": 900, "values": ["127.0.0.2"]},
+                {"name": "host2.example.com", "type": "A", "ttl": 900, "values": ["127.0.0.1"]},
+            ],
+            [[
+                {"Name": "example.com.", "Type": "SOA", "TTL": 900, "ResourceRecords": [{"Value": "soa"}]},
+                self.get_record(0),
+                self.get_record(1),
+                self.get_record(3),
+            ]],
+        )
+        action, = plan.update_object()
+        self.assertEqual(action.description, [
+            "Update hosted zone records",
+            "Name => host1.example.com., Type=A, Action=UPSERT",
+            "Name => host2.example.com., Type=A, Action=UPSERT",
+            "Name => host3.example.com., Type=A, Action=DELETE",
+        ])
+
+    def get_zone_file(self, contents):
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.unlink, path)
+        with os.fdopen(fd, "w") as fp:
+            fp.write(contents)
+        return path
+
+    def test_zone_file(self):
+        path = self.get_zone_file("$TTL 900\nhost0 A 127.0.0.1\nhost1 A 127.0.0.2\n* A 127.0.0.1\n")
+        wildcard = self.get_record(0)
+        wildcard["Name"] = "\\052.example.com."
+        plan = self.get_zone_plan([], [[self.get_record(0), self.get_record(1), wildcard]], zone_file=path)
+
+        action, = plan.update_object()
+        self.assertEqual(action.description, [
+            "Update hosted zone records",
+            "Name => host1.example.com., Type=A, Action=UPSERT",
+        ])
+
+    def test_zone_file_and_records_conflict(self):
+        path = self.get_zone_file("host0 900 A 127.0.0.1\n")
+        plan = self.get_zone_plan(
+            [{"name": "host0.example.com", "type": "A", "ttl": 900, "values": ["127.0.0.1"]}],
+            [],
+            zone_file=path,
+        )
+        self.assertRaises(errors.Error, list, plan.update_object())
+
+    def test_zone_file_cleaned_after_name(self):
+        fields = HostedZone.meta.field_order
+        self.assertLess(fields.index("name"), fields.index("zone_file"))
+
+        path = self.get_zone_file("$TTL 900\nhost0 A 127.0.0.1\n")
+        zone = self.aws.add_hosted_zone(zone_file=path, name="example.com")
+        self.assertEqual(list(zone.zone_file.records), [("host0.example.com.", "A", None)])
@@ -0,0 +1,139 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+import six
+
+from touchdown.aws.route53.zone_file import load, parse_csv, parse_zone_file, unescape
+from touchdown.core.errors import InvalidParameter
+
+
+ZONE = """
+$TTL 1h
+@       IN  SOA ns1.example.com. hostmaster.example.com. (
+                2015090701 ; serial
+                3600       ; refresh
+                600        ; retry
+                86400      ; expire
+                300 )      ; minimum
+        IN  NS  ns1.example.com.
+        IN  MX  10 mail
+        IN  MX  20 mail.example.net.
+www     300 IN  A   192.168.0.1
+            300 A   192.168.0.2
+*       IN  300 CNAME www
+txt         TXT "v=spf1 include:example.net ~all" ; a comment
+
+$ORIGIN sub.example.com.
+host        A   10.0.0.1
+"""
+
+
+class TestZoneFile(unittest.TestCase):
+
+    def parse(self, contents):
+        return parse_zone_file(six.StringIO(contents), "example.com.")
+
+    def test_parse(self):
+        table = self.parse(ZONE)
+        self.assertEqual([table.get_record_set(key) for key in table], [{
+            "Name": "example.com.",
+            "Type": "MX",
+            "TTL": 3600,
+            "ResourceRecords": [{"Value": "10 mail.example.com."}, {"Value": "20 mail.example.net."}],
+        }, {
+            "Name": "www.example.com.",
+            "Type": "A",
+            "TTL": 300,
+            "ResourceRecords": [{"Value": "192.168.0.1"}, {"Value": "192.168.0.2"}],
+        }, {
+            "Name": "*.example.com.",
+            "Type": "CNAME",
+            "TTL": 300,
+            "ResourceRecords": [{"Value": "www.example.com."}],
+        }, {
+            "Name": "txt.example.com.",
+            "Type": "TXT",
+            "TTL": 3600,
+            "ResourceRecords": [{"Value": '"v=spf1 include:example.net ~all"'}],
+        }, {
+            "Name": "host.sub.example.com.",
+            "Type": "A",
+            "TTL": 3600,
+            "ResourceRecords": [{"Value": "10.0.0.1"}],
+        }])
+
+    def test_matches(self):
+        table = self.parse("www 300 A 192.168.0.1\nwww 300 A 192.168.0.2\n")
+        key = ("www.example.com.", "A", None)
+        remote = {"Name": "www.example.com.", "Type": "A", "TTL": 300, "ResourceRecords": [
+            {"Value": "192.168.0.2"}, {"Value": "192.168.0.1"},
+        ]}
+        self.assertTrue(table.matches(key, remote))
+        remote["TTL"] = 900
+        self.assertFalse(table.matches(key, remote))
+
+    def test_no_ttl(self):
+        self.assertRaises(InvalidParameter, self.parse, "www A 192.168.0.1\n")
+
+    def test_bad_type(self):
+        self.assertRaises(InvalidParameter, self.parse, "www 300 XX 192.168.0.1\n")
+
+    def test_outside_zone(self):
+        self.assertRaises(InvalidParameter, self.parse, "www.example.net. 300 A 192.168.0.1\n")
+
+    def test_mismatched_ttl(self):
+        self.assertRaises(InvalidParameter, self.parse, "www 300 A 192.168.0.1\nwww 600 A 192.168.0.2\n")
+
+    def test_unclosed_parenthesis(self):
+        self.assertRaises(InvalidParameter, self.parse, "www 300 A ( 192.168.0.1\n")
+
+    def test_error_has_line_number(self):
+        try:
+            self.parse("$TTL 300\nwww A 192.168.0.1\nwww2 XX 1\n")
+        except InvalidParameter as e:
+            self.assertTrue(e.args[0].startswith("line 3:"))
+        else:
+            self.fail("InvalidParameter not raised")
+
+    def test_unescape(self):
+        self.assertEqual(unescape("\\052.example.com."), "*.example.com.")
+
+
+class TestCsv(unittest.TestCase):
+
+    def test_parse(self):
+        table = parse_csv(six.StringIO(
+            "name,type,ttl,value\n"
+            "www,A,300,192.168.0.1\n"
+            "www,A,300,192.168.0.2\n"
+            "@,MX,3600,10 mail\n"
+        ), "example.com.")
+        self.assertEqual(table.records, {
+            ("www.example.com.", "A", None): [300, ["192.168.0.1", "192.168.0.2"]],
+            ("example.com.", "MX", None): [3600, ["10 mail.example.com."]],
+        })
+
+    def test_missing_column(self):
+        self.assertRaises(InvalidParameter, parse_csv, six.StringIO("name,type,value\n"), "example.com.")
+
+    def test_load(self):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        self.addCleanup(os.unlink, path)
+        with os.fdopen(fd, "w") as fp:
+            fp.write("name,type,ttl,value\nwww,A,300,192.168.0.1\n")
+        self.assertEqual(len(load(path, "example.com.")), 1)
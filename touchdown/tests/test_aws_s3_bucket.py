@@ -38,3 +38,35 @@ class TestBucketValidation(aws.RecordedBotoCoreTest):
 
     def test_upper(self):
         self.assertRaises(InvalidParameter, self.aws.add_bucket, name="FOO")
+
+
+class TestBucketDestroy(aws.MockClientTestCase):
+
+    goal_name = "destroy"
+
+    def setUp(self):
+        super(TestBucketDestroy, self).setUp()
+        self.bucket = self.aws.add_bucket(name="my-bucket")
+        self.client.delete_objects.return_value = {}
+        self.plan = self.get_plan(self.bucket, {"Name": "my-bucket"})
+
+    def test_empty_bucket(self):
+        self.client.list_object_versions.return_value = {}
+        actions = list(self.plan.destroy_object())
+        self.assertEqual(len(actions), 1)
+        self.assertEqual(list(actions[0].description), ["Destroy bucket 'my-bucket'"])
+
+    def test_deletes_versions_and_markers(self):
+        self.client.list_object_versions.return_value = {"Versions": [{"Key": "a", "VersionId": "1"}]}
+        self.client.get_paginator.return_value.paginate.return_value = [
+            {"Versions": [{"Key": "a", "VersionId": "1"}, {"Key": "a", "VersionId": "2"}]},
+            {"DeleteMarkers": [{"Key": "b", "VersionId": "3"}]},
+        ]
+
+        actions = list(self.plan.destroy_object())
+        self.assertEqual(len(actions), 2)
+        actions[0].run()
+
+        self.client.get_paginator.assert_called_with("list_object_versions")
+        objects = [o for c in self.client.delete_objects.call_args_list for o in c[1]["Delete"]["Objects"]]
+        self.assertEqual(sorted(o["VersionId"] for o in objects), ["1", "2", "3"])
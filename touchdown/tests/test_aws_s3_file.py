@@ -0,0 +1,88 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from botocore.exceptions import ClientError
+
+from . import aws
+
+
+class TestFileDescribe(aws.MockClientTestCase):
+
+    def setUp(self):
+        super(TestFileDescribe, self).setUp()
+        self.bucket = self.aws.add_bucket(name="my-bucket")
+        self.get_plan(self.bucket, {"Name": "my-bucket"})
+
+        self.client.list_objects.return_value = {"Contents": [
+            {"Key": "config/{}.json".format(i), "ETag": '"{}"'.format(i), "Size": i} for i in range(5)
+        ]}
+
+    def get_file_plan(self, name):
+        return self.get_plan(self.bucket.add_file(name=name, contents="{}"))
+
+    def test_listing_shared(self):
+        for i in range(5):
+            self.assertEqual(self.get_file_plan("config/{}.json".format(i)).describe_object()["Size"], i)
+        self.client.list_objects.assert_called_once_with(
+            Bucket="my-bucket",
+            Prefix="config/",
+            Delimiter="/",
+            MaxKeys=1000,
+        )
+
+    def test_missing(self):
+        self.assertEqual(self.get_file_plan("config/missing.json").describe_object(), {})
+        self.assertFalse(self.client.head_object.called)
+
+    def test_root(self):
+        self.client.list_objects.return_value = {}
+        self.assertEqual(self.get_file_plan("robots.txt").describe_object(), {})
+        self.assertEqual(self.client.list_objects.call_args[1]["Prefix"], "")
+
+    def test_invalidate(self):
+        plan = self.get_file_plan("config/0.json")
+        plan.describe_object()
+        plan.invalidate()
+        self.get_file_plan("config/1.json").describe_object()
+        self.assertEqual(self.client.list_objects.call_count, 2)
+
+    def test_big_directory_uses_head_object(self):
+        self.client.list_objects.return_value["IsTruncated"] = True
+        plan = self.get_file_plan("config/missing.json")
+        self.client.head_object.return_value = {"ETag": '"abc"', "ContentLength": 3}
+        self.assertEqual(plan.describe_object()["Size"], 3)
+        self.client.head_object.assert_called_with(Bucket="my-bucket", Key="config/missing.json")
+
+    def test_big_directory_missing(self):
+        self.client.list_objects.return_value["IsTruncated"] = True
+        plan = self.get_file_plan("config/missing.json")
+        self.client.head_object.side_effect = ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        self.assertEqual(plan.describe_object(), {})
+
+    def test_truncated_by_subdirectories(self):
+        # Subdirectories count towards MaxKeys, so this page is truncated
+        # even though it holds far fewer than 1000 files
+        self.client.list_objects.return_value = {
+            "Contents": [{"Key": "config/{}.json".format(i), "ETag": '"{}"'.format(i), "Size": i} for i in range(100)],
+            "CommonPrefixes": [{"Prefix": "config/{}/".format(i)} for i in range(900)],
+            "IsTruncated": True,
+        }
+        self.client.head_object.return_value = {"ETag": '"abc"', "ContentLength": 3}
+        self.assertEqual(self.get_file_plan("config/later.json").describe_object()["Size"], 3)
+        self.client.head_object.assert_called_with(Bucket="my-bucket", Key="config/later.json")
+
+    def test_no_bucket(self):
+        self.goal.get_plan(self.bucket).object = {}
+        self.assertEqual(self.get_file_plan("config/0.json").describe_object(), {})
+        self.assertFalse(self.client.list_objects.called)
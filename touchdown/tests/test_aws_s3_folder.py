@@ -0,0 +1,176 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+from touchdown.aws.s3.compress import gzip_file
+from touchdown.aws.s3.manifest import get_md5
+
+from . import aws
+
+
+def etag(contents):
+    return '"{}"'.format(hashlib.md5(contents).hexdigest())
+
+
+class TestFolderSync(aws.MockClientTestCase):
+
+    def setUp(self):
+        super(TestFolderSync, self).setUp()
+
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+
+        self.bucket = self.aws.add_bucket(name="my-bucket")
+        self.folder = self.bucket.add_folder(name="site", source=self.base)
+
+        self.get_plan(self.bucket, {"Name": "my-bucket"})
+        self.plan = self.get_plan(self.folder)
+
+    def write(self, path, contents):
+        with open(os.path.join(self.base, path), "wb") as fp:
+            fp.write(contents)
+
+    def set_remote(self, **objects):
+        self.client.get_paginator.return_value.paginate.return_value = [{"Contents": [
+            {"Key": "site/" + key, "ETag": etag(contents), "Size": len(contents), "LastModified": None}
+            for key, contents in objects.items()
+        ]}]
+
+    def get_descriptions(self):
+        return [list(action.description) for action in self.plan.get_actions()]
+
+    def test_sync(self):
+        self.write("index.html", b"hello")
+        self.write("new.html", b"new")
+        self.write("changed.html", b"changed")
+        self.set_remote(**{"index.html": b"hello", "changed.html": b"original", "old.html": b"old"})
+
+        self.assertEqual(self.get_descriptions(), [[
+            "Sync {} to s3://my-bucket/site".format(self.base),
+            "Add 1 file(s) (3 bytes)",
+            "Update 1 file(s) (7 bytes)",
+            "Remove 1 file(s)",
+        ]])
+
+    def test_sync_verbose(self):
+        self.goal.ui.verbose = True
+        self.write("new.html", b"new")
+        self.set_remote(**{"old.html": b"old"})
+
+        self.assertEqual(self.get_descriptions()[0][-2:], [
+            "Add new.html",
+            "Remove old.html",
+        ])
+
+    def test_sync_run(self):
+        self.write("index.html", b"hello")
+        self.write("new.html", b"new")
+        self.set_remote(**{"index.html": b"hello", "old.html": b"old"})
+        self.client.delete_objects.return_value = {}
+
+        action, = self.plan.get_actions()
+        action.run()
+
+        self.assertEqual(self.client.put_object.call_args[1]["Key"], "site/new.html")
+        self.assertEqual(self.client.put_object.call_args[1]["CacheControl"], "max-age=0")
+        self.client.delete_objects.assert_called_with(
+            Bucket="my-bucket",
+            Delete={"Objects": [{"Key": "site/old.html"}], "Quiet": True},
+        )
+
+    def test_nothing_changed(self):
+        self.write("index.html", b"hello")
+        self.set_remote(**{"index.html": b"hello"})
+        self.assertEqual(self.get_descriptions(), [])
+
+    def test_header_changes(self):
+        self.write("index.html", b"hello")
+        self.write("style.css", b"body {}")
+        self.set_remote(**{"index.html": b"hello", "style.css": b"body {}"})
+        self.assertEqual(self.get_descriptions(), [])
+
+        plan = self.get_plan(self.bucket.add_folder(
+            name="site",
+            source=self.base,
+            cache_control={"*.css": "max-age=3600"},
+        ))
+        action, = plan.get_actions()
+        self.assertEqual(action.retags, ["style.css"])
+        self.assertIn("Update headers of 1 file(s)", list(action.description))
+
+        action.run()
+        kwargs = self.client.copy_object.call_args[1]
+        self.assertEqual(kwargs["CopySource"], {"Bucket": "my-bucket", "Key": "site/style.css"})
+        self.assertEqual(kwargs["Key"], "site/style.css")
+        self.assertEqual(kwargs["CacheControl"], "max-age=3600")
+        self.assertEqual(kwargs["MetadataDirective"], "REPLACE")
+        self.assertFalse(self.client.put_object.called)
+
+        # The new headers are remembered, so there is nothing left to do
+        plan = self.get_plan(self.bucket.add_folder(
+            name="site",
+            source=self.base,
+            cache_control={"*.css": "max-age=3600"},
+        ))
+        self.assertEqual(list(plan.get_actions()), [])
+
+    def test_copy_existing_contents(self):
+        self.write("app.abc123.js", b"app")
+        self.write("app.def456.js", b"app")
+        self.set_remote(**{"app.abc123.js": b"app", "app.000000.js": b"app"})
+
+        action, = self.plan.get_actions()
+        self.assertEqual(action.adds, ["app.def456.js"])
+        self.assertIn(action.copies["app.def456.js"], ("app.abc123.js", "app.000000.js"))
+        self.assertIn("Copy 1 file(s) from existing objects", list(action.description))
+
+    def test_compression(self):
+        self.write("style.css", b"body {}" * 100)
+        self.write("logo.png", b"png")
+        self.set_remote()
+
+        plan = self.get_plan(self.bucket.add_folder(
+            name="site",
+            source=self.base,
+            compression="gzip",
+            cache_control={"*": "max-age=60", "*.css": "max-age=3600"},
+        ))
+        action, = plan.get_actions()
+        uploads = {path: plan.get_upload(path, action.local[path]) for path in action.adds}
+
+        self.assertEqual(uploads["logo.png"].params["CacheControl"], "max-age=60")
+        self.assertNotIn("ContentEncoding", uploads["logo.png"].params)
+
+        css = uploads["style.css"]
+        self.assertEqual(css.params["CacheControl"], "max-age=3600")
+        self.assertEqual(css.params["ContentEncoding"], "gzip")
+        self.assertTrue(css.path.startswith(self.cache_directory))
+        self.assertTrue(css.size < 700)
+
+    def test_compressed_unchanged(self):
+        self.write("style.css", b"body {}" * 100)
+        gzip_file(os.path.join(self.base, "style.css"), os.path.join(self.cache_directory, "style.css.gz"))
+        self.client.get_paginator.return_value.paginate.return_value = [{"Contents": [{
+            "Key": "site/style.css",
+            "ETag": '"{}"'.format(get_md5(os.path.join(self.cache_directory, "style.css.gz"))),
+            "Size": os.path.getsize(os.path.join(self.cache_directory, "style.css.gz")),
+            "LastModified": None,
+        }]}]
+
+        plan = self.get_plan(self.bucket.add_folder(name="site", source=self.base, compression="gzip"))
+        self.assertEqual(list(plan.get_actions()), [])
@@ -0,0 +1,130 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from touchdown.aws.s3.manifest import Manifest, get_multipart_etag
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+        os.makedirs(os.path.join(self.base, "css"))
+        self.write("index.html", b"hello")
+        self.write("css/site.css", b"body {}")
+        self.cache = {}
+
+    def write(self, path, contents):
+        with open(os.path.join(self.base, path), "wb") as fp:
+            fp.write(contents)
+
+    def scan(self, granularity=-10):
+        manifest = Manifest(self.cache, self.base)
+        manifest.granularity = granularity
+        local = manifest.scan()
+        manifest.save()
+        return manifest, local
+
+    def test_scan(self):
+        manifest, local = self.scan()
+        self.assertEqual(local["index.html"], {"Size": 5, "Md5": "5d41402abc4b2a76b9719d911017c592"})
+        self.assertEqual(sorted(local), [os.path.join("css", "site.css"), "index.html"])
+        self.assertEqual(manifest.hashed, 2)
+
+    def test_unchanged_not_hashed(self):
+        self.scan()
+        manifest, local = self.scan()
+        self.assertEqual(manifest.hashed, 0)
+        self.assertEqual(local["index.html"]["Md5"], "5d41402abc4b2a76b9719d911017c592")
+
+    def test_changed_hashed(self):
+        self.scan()
+        self.write("index.html", b"goodbye")
+        manifest, local = self.scan()
+        self.assertEqual(manifest.hashed, 1)
+        self.assertEqual(local["index.html"]["Size"], 7)
+
+    def test_deleted_dropped(self):
+        self.scan()
+        os.unlink(os.path.join(self.base, "index.html"))
+        manifest, local = self.scan()
+        self.assertEqual(list(local), [os.path.join("css", "site.css")])
+        self.assertEqual(list(manifest.entries), [os.path.join("css", "site.css")])
+
+    def test_unchanged_dirs_not_listed(self):
+        manifest, local = self.scan()
+        self.assertEqual(manifest.listed, 2)
+        manifest, local = self.scan()
+        self.assertEqual(manifest.listed, 0)
+        self.assertEqual(sorted(local), [os.path.join("css", "site.css"), "index.html"])
+
+    def test_changed_dir_listed(self):
+        self.scan()
+        self.write("css/print.css", b"")
+        manifest, local = self.scan()
+        self.assertEqual(manifest.listed, 1)
+        self.assertEqual(local[os.path.join("css", "print.css")]["Size"], 0)
+
+    def test_edit_in_unchanged_dir_hashed(self):
+        self.scan()
+        # Rewriting an existing file doesn't change its directory's mtime
+        self.write("css/site.css", b"body { margin: 0 }")
+        manifest, local = self.scan()
+        self.assertEqual(manifest.listed, 0)
+        self.assertEqual(manifest.hashed, 1)
+        self.assertEqual(local[os.path.join("css", "site.css")]["Size"], 18)
+
+    def test_recently_modified_not_trusted(self):
+        self.scan(granularity=2)
+        manifest, local = self.scan(granularity=2)
+        self.assertEqual(manifest.hashed, 2)
+        self.assertEqual(manifest.listed, 2)
+
+    def test_multipart_etag_remembered(self):
+        manifest, local = self.scan()
+        etag = manifest.get_multipart_etag("index.html", 2)
+        manifest.save()
+        self.assertEqual(etag, get_multipart_etag(os.path.join(self.base, "index.html"), 2))
+
+        manifest, local = self.scan()
+        self.assertEqual(manifest.get_multipart_etag("index.html", 2), etag)
+        self.assertEqual(manifest.hashed, 0)
+
+
+class TestMultipartEtag(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        self.addCleanup(os.unlink, self.path)
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(b"0123456789")
+
+    def get_etag(self, *parts):
+        digests = b"".join(hashlib.md5(part).digest() for part in parts)
+        return "{}-{}".format(hashlib.md5(digests).hexdigest(), len(parts))
+
+    def test_uneven_parts(self):
+        self.assertEqual(get_multipart_etag(self.path, 4), self.get_etag(b"0123", b"4567", b"89"))
+
+    def test_exact_parts(self):
+        self.assertEqual(get_multipart_etag(self.path, 5), self.get_etag(b"01234", b"56789"))
+
+    def test_single_part(self):
+        self.assertEqual(get_multipart_etag(self.path, 100, chunk_size=3), self.get_etag(b"0123456789"))
@@ -0,0 +1,181 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from touchdown.aws.s3.transfer import FileSlice, Transfer, Upload
+from touchdown.core import errors
+
+
+class TestTransfer(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+
+        self.client = mock.Mock()
+        self.client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        self.client.upload_part.side_effect = lambda PartNumber, **kwargs: {"ETag": "etag-{}".format(PartNumber)}
+
+        self.transfer = Transfer(self.client, mock.Mock(), workers=4)
+        self.transfer.multipart_threshold = 10
+        self.transfer.part_size = 4
+
+    def get_upload(self, name, contents):
+        path = os.path.join(self.base, name)
+        with open(path, "wb") as fp:
+            fp.write(contents)
+        return Upload(path, len(contents), {"Bucket": "bucket", "Key": name})
+
+    def test_small_files(self):
+        self.transfer.upload([self.get_upload("file{}".format(i), b"hello") for i in range(20)])
+        self.assertEqual(self.client.put_object.call_count, 20)
+        self.assertEqual(self.transfer.objects, 20)
+        self.assertEqual(self.transfer.bytes, 100)
+
+    def test_multipart(self):
+        self.transfer.upload([self.get_upload("large", b"0123456789ab")])
+        self.assertEqual(self.client.upload_part.call_count, 3)
+        self.client.complete_multipart_upload.assert_called_with(
+            Bucket="bucket",
+            Key="large",
+            UploadId="upload-1",
+            MultipartUpload={"Parts": [
+                {"ETag": "etag-1", "PartNumber": 1},
+                {"ETag": "etag-2", "PartNumber": 2},
+                {"ETag": "etag-3", "PartNumber": 3},
+            ]},
+        )
+
+    def test_retry(self):
+        self.client.put_object.side_effect = [Exception("Connection reset"), None]
+        with mock.patch("time.sleep"):
+            self.transfer.upload([self.get_upload("file", b"hello")])
+        self.assertEqual(self.client.put_object.call_count, 2)
+
+    def test_failure_doesnt_stop_others(self):
+        def put_object(Key, **kwargs):
+            if Key == "file0":
+                raise Exception("Access denied")
+        self.client.put_object.side_effect = put_object
+
+        with mock.patch("time.sleep"):
+            self.assertRaises(
+                errors.Error,
+                self.transfer.upload,
+                [self.get_upload("file{}".format(i), b"hello") for i in range(5)],
+            )
+        self.assertEqual(self.transfer.objects, 4)
+        self.assertEqual([k for k, e in self.transfer.failed], ["file0"])
+
+    def test_failed_part_aborts(self):
+        self.client.upload_part.side_effect = Exception("Connection reset")
+        with mock.patch("time.sleep"):
+            self.assertRaises(errors.Error, self.transfer.upload, [self.get_upload("large", b"0123456789ab")])
+        self.assertEqual(self.client.complete_multipart_upload.call_count, 0)
+        self.assertEqual(self.client.abort_multipart_upload.call_count, 1)
+
+    def test_copy(self):
+        upload = self.get_upload("file", b"hello")
+        upload.copy_source = "other"
+        self.transfer.upload([upload])
+        self.client.copy_object.assert_called_with(
+            CopySource={"Bucket": "bucket", "Key": "other"},
+            MetadataDirective="REPLACE",
+            Bucket="bucket",
+            Key="file",
+        )
+        self.assertEqual(self.client.put_object.call_count, 0)
+        self.assertEqual(self.transfer.copied, 1)
+
+    def test_failed_copy_uploads(self):
+        self.client.copy_object.side_effect = Exception("Access denied")
+        upload = self.get_upload("file", b"hello")
+        upload.copy_source = "other"
+        with mock.patch("time.sleep"):
+            self.transfer.upload([upload])
+        self.assertEqual(self.client.put_object.call_count, 1)
+        self.assertEqual(self.transfer.copied, 0)
+
+    def test_delete_chunked(self):
+        self.transfer.delete_chunk_size = 10
+        self.client.delete_objects.return_value = {}
+        self.transfer.delete("bucket", ["file{}".format(i) for i in range(25)])
+        self.assertEqual(self.client.delete_objects.call_count, 3)
+        self.assertEqual(self.transfer.objects, 25)
+
+    def test_delete_errors_reported(self):
+        self.client.delete_objects.return_value = {"Errors": [
+            {"Key": "file1", "Code": "AccessDenied", "Message": "Access Denied"},
+        ]}
+        self.assertRaises(errors.Error, self.transfer.delete, "bucket", ["file0", "file1", "file2"])
+        self.assertEqual(self.transfer.objects, 2)
+        self.assertEqual([k for k, e in self.transfer.failed], ["file1"])
+
+    def test_delete_pages(self):
+        self.transfer.delete_chunk_size = 10
+        self.client.delete_objects.return_value = {}
+        listed = []
+
+        def get_pages():
+            for i in range(0, 100, 20):
+                listed.append(i)
+                yield [{"Key": "file{}".format(j), "VersionId": "v1"} for j in range(i, i + 20)]
+
+        self.transfer.delete_pages("bucket", get_pages())
+        self.assertEqual(self.client.delete_objects.call_count, 10)
+        self.assertEqual(self.transfer.objects, 100)
+        self.assertEqual(self.transfer.total, 100)
+        self.assertEqual(
+            self.client.delete_objects.call_args_list[0][1]["Delete"]["Objects"][0],
+            {"Key": "file0", "VersionId": "v1"},
+        )
+
+    def test_delete_pages_listing_fails(self):
+        self.client.delete_objects.return_value = {}
+
+        def get_pages():
+            yield [{"Key": "file0", "VersionId": "v1"}]
+            raise ValueError("listing failed")
+
+        self.assertRaises(ValueError, self.transfer.delete_pages, "bucket", get_pages())
+        self.assertEqual(self.client.delete_objects.call_count, 1)
+
+
+class TestFileSlice(unittest.TestCase):
+
+    def setUp(self):
+        self.fp = tempfile.TemporaryFile()
+        self.addCleanup(self.fp.close)
+        self.fp.write(b"0123456789")
+        self.slice = FileSlice(self.fp, 2, 5)
+
+    def test_read(self):
+        self.assertEqual(len(self.slice), 5)
+        self.assertEqual(self.slice.read(3), b"234")
+        self.assertEqual(self.slice.read(), b"56")
+        self.assertEqual(self.slice.read(), b"")
+
+    def test_seek(self):
+        self.slice.read()
+        self.slice.seek(0)
+        self.assertEqual(self.slice.tell(), 0)
+        self.assertEqual(self.slice.read(), b"23456")
+        self.slice.seek(0, 2)
+        self.assertEqual(self.slice.tell(), 5)
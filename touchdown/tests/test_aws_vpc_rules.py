@@ -0,0 +1,132 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from touchdown.aws.vpc.rules import RuleDiff, RuleIndex, get_network, get_protocol
+from touchdown.aws.vpc.security_group import get_permission_keys
+
+from . import aws
+
+
+class TestRuleDiff(unittest.TestCase):
+
+    def test_diff(self):
+        local = RuleIndex([("a", 1), ("b", 2), ("c", 3)], lambda rule: (rule[0], ))
+        remote = RuleIndex([("b", 2), ("c", 4), ("d", 5)], lambda rule: (rule[0], ))
+        diff = RuleDiff(local, remote)
+        self.assertEqual(diff.added, ["a"])
+        self.assertEqual(diff.changed, ["c"])
+        self.assertEqual(diff.removed, ["d"])
+
+    def test_no_changes(self):
+        local = RuleIndex([("a", 1)], lambda rule: (rule[0], ))
+        self.assertFalse(RuleDiff(local, local))
+
+    def test_canonical(self):
+        self.assertEqual(get_protocol("6"), "tcp")
+        self.assertEqual(get_protocol("TCP"), "tcp")
+        self.assertEqual(get_network("10.0.0.0/8"), get_network(u"10.0.0.0/8"))
+
+    def test_permission_keys(self):
+        keys = list(get_permission_keys({
+            "IpProtocol": "tcp",
+            "FromPort": 80,
+            "ToPort": 80,
+            "IpRanges": [{"CidrIp": "0.0.0.0/0"}, {"CidrIp": "10.0.0.0/8"}],
+            "UserIdGroupPairs": [{"UserId": "1234", "GroupId": "sg-1"}],
+        }))
+        self.assertEqual(keys, [
+            ("tcp", 80, 80, "cidr", "0.0.0.0/0"),
+            ("tcp", 80, 80, "cidr", "10.0.0.0/8"),
+            ("tcp", 80, 80, "group", "sg-1"),
+        ])
+
+
+class TestVpcRules(aws.MockClientTestCase):
+
+    def setUp(self):
+        super(TestVpcRules, self).setUp()
+        self.vpc = self.aws.add_vpc(name='test-vpc', cidr_block='10.0.0.0/16')
+
+    def test_security_group_authorizes_once(self):
+        sg = self.vpc.add_security_group(
+            name="test",
+            description="test",
+            ingress=[{"port": port, "network": "0.0.0.0/0"} for port in (22, 80, 443)],
+        )
+        plan = self.get_plan(sg, {"GroupId": "sg-1", "OwnerId": "1234", "IpPermissions": [{
+            "IpProtocol": "tcp",
+            "FromPort": 80,
+            "ToPort": 80,
+            "IpRanges": [{"CidrIp": "0.0.0.0/0"}],
+        }]})
+
+        action, = plan.update_object()
+        action.run()
+
+        permissions = self.client.authorize_security_group_ingress.call_args[1]["IpPermissions"]
+        self.assertEqual([p["FromPort"] for p in permissions], [22, 443])
+        self.assertEqual(permissions[0]["IpRanges"], [{"CidrIp": "0.0.0.0/0"}])
+
+    def test_network_acl_replaces(self):
+        acl = self.vpc.add_network_acl(
+            name="test",
+            inbound=[{"network": "10.0.0.0/8", "port": 80}, {"network": "10.0.0.0/8", "port": 443}],
+        )
+        plan = self.get_plan(acl, {"NetworkAclId": "acl-1", "Entries": [{
+            "RuleNumber": 1,
+            "Protocol": "6",
+            "RuleAction": "allow",
+            "Egress": False,
+            "CidrBlock": "10.0.0.0/8",
+            "PortRange": {"From": 8080, "To": 8080},
+        }, {
+            "RuleNumber": 3,
+            "Protocol": "6",
+            "RuleAction": "allow",
+            "Egress": True,
+            "CidrBlock": "10.0.0.0/8",
+            "PortRange": {"From": 80, "To": 80},
+        }]})
+
+        descriptions = [action.description[0] for action in plan.update_object()]
+        self.assertEqual(descriptions, [
+            "Remove rule 3 (egress)",
+            "Replace rule: allow ingress from 10.0.0.0/8, TCP port 80 to 80",
+            "Add rule: allow ingress from 10.0.0.0/8, TCP port 443 to 443",
+        ])
+
+    def test_route_table_replaces(self):
+        igw = self.vpc.add_internet_gateway(name="test")
+        self.get_plan(igw, {"InternetGatewayId": "igw-2"})
+        route_table = self.vpc.add_route_table(
+            name="test",
+            routes=[
+                {"destination_cidr": "0.0.0.0/0", "internet_gateway": igw},
+                {"destination_cidr": "10.1.0.0/16", "internet_gateway": igw},
+            ],
+        )
+        plan = self.get_plan(route_table, {"RouteTableId": "rtb-1", "Routes": [
+            {"DestinationCidrBlock": "10.0.0.0/16", "GatewayId": "local", "Origin": "CreateRouteTable"},
+            {"DestinationCidrBlock": "0.0.0.0/0", "GatewayId": "igw-1", "Origin": "CreateRoute"},
+            {"DestinationCidrBlock": "10.2.0.0/16", "GatewayId": "igw-1", "Origin": "CreateRoute"},
+        ]})
+
+        descriptions = [action.description[0] for action in plan.update_routes()]
+        self.assertEqual(descriptions, [
+            "Remove route for 10.2.0.0/16",
+            "Replacing route for 0.0.0.0/0",
+            "Adding route for 10.1.0.0/16",
+        ])
@@ -15,7 +15,7 @@
 import unittest
 
 from touchdown.aws.vpc import SecurityGroup
-from touchdown.core import dependencies
+from touchdown.core import dependencies, errors
 
 
 class TestDependencies(unittest.TestCase):
@@ -43,3 +43,58 @@ class TestDependencies(unittest.TestCase):
 
         dw = dependencies.DependencyMap(d, tips_first=True)
         self.assertEqual(list(dw.all()), [d, c, b, a])
+
+    def test_diamond(self):
+        a = SecurityGroup(None, name="a", description="test")
+        b = SecurityGroup(None, name="b", description="test")
+        b.add_dependency(a)
+        c = SecurityGroup(None, name="c", description="test")
+        c.add_dependency(a)
+        d = SecurityGroup(None, name="d", description="test")
+        d.add_dependency(b)
+        d.add_dependency(c)
+
+        dw = dependencies.DependencyMap(d)
+        self.assertEqual(list(dw.all()), [a, b, c, d])
+        self.assertEqual(dw.empty(), True)
+
+    def test_complete_releases_dependents(self):
+        a = SecurityGroup(None, name="a", description="test")
+        b = SecurityGroup(None, name="b", description="test")
+        b.add_dependency(a)
+        c = SecurityGroup(None, name="c", description="test")
+        c.add_dependency(a)
+        c.add_dependency(b)
+
+        dw = dependencies.DependencyMap(c)
+        self.assertEqual(list(dw.get_ready()), [a])
+        self.assertEqual(dw.complete(a), [b])
+        self.assertEqual(list(dw.get_ready()), [b])
+        self.assertEqual(dw.complete(b), [c])
+        self.assertEqual(dw.complete(c), [])
+        self.assertEqual(dw.empty(), True)
+
+    def test_cycle(self):
+        a = SecurityGroup(None, name="a", description="test")
+        b = SecurityGroup(None, name="b", description="test")
+        c = SecurityGroup(None, name="c", description="test")
+        a.add_dependency(c)
+        b.add_dependency(a)
+        c.add_dependency(b)
+
+        self.assertRaises(errors.CycleError, dependencies.DependencyMap, c)
+
+    def test_prioritise_longest_chain_first(self):
+        root = SecurityGroup(None, name="root", description="test")
+        slow = SecurityGroup(None, name="slow", description="test")
+        slow.add_dependency(root)
+        fast = SecurityGroup(None, name="fast", description="test")
+        fast.add_dependency(root)
+        tip = SecurityGroup(None, name="tip", description="test")
+        tip.add_dependency(slow)
+        tip.add_dependency(fast)
+
+        dw = dependencies.DependencyMap(tip)
+        durations = {root: 1, slow: 10, fast: 2, tip: 1}
+        self.assertEqual(dw.prioritise(durations.get), 12)
+        self.assertEqual(sorted([fast, slow], key=dw.priority), [slow, fast])
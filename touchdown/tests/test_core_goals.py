@@ -0,0 +1,123 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import mock
+
+from touchdown.core import errors, goals, plan, workspace
+from touchdown.core.cache import JSONFileCache
+from touchdown.core.map import ParallelMap, SerialMap
+from touchdown.frontends import NonInteractiveFrontend
+
+
+class SlowPlan(plan.NullPlan):
+
+    resource = None
+    built = 0
+
+    def __init__(self, runner, resource):
+        super(SlowPlan, self).__init__(runner, resource)
+        SlowPlan.built += 1
+        time.sleep(0.1)
+
+
+class BrokenPlan(plan.NullPlan):
+
+    resource = None
+
+    def validate(self):
+        raise errors.NonConformingPolicy("broken")
+
+
+class SlowGoal(goals.Goal):
+
+    name = "slow"
+    plan_class = SlowPlan
+
+    def get_plan_class(self, resource):
+        return self.plan_class
+
+
+class TestGetPlan(unittest.TestCase):
+
+    def setUp(self):
+        SlowPlan.built = 0
+        self.workspace = workspace.Workspace()
+        self.goal = SlowGoal(self.workspace, NonInteractiveFrontend())
+
+    def test_concurrent_callers_share_plan(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.goal.get_plan(self.workspace)))
+            for i in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(SlowPlan.built, 1)
+        self.assertEqual(len(set(id(r) for r in results)), 1)
+        self.assertEqual(self.goal.duplicate_plans_avoided, 4)
+
+    def test_failed_build_is_retried(self):
+        self.goal.plan_class = BrokenPlan
+        self.assertRaises(errors.NonConformingPolicy, self.goal.get_plan, self.workspace)
+        self.goal.plan_class = SlowPlan
+        self.assertTrue(isinstance(self.goal.get_plan(self.workspace), SlowPlan))
+
+
+class TestVisit(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+
+        self.workspace = workspace.Workspace()
+        self.ui = mock.MagicMock()
+        self.goal = SlowGoal(self.workspace, self.ui, map=SerialMap, cache=JSONFileCache(self.cache_directory))
+        self.goal.plan_class = plan.NullPlan
+
+    def test_timings_not_echoed(self):
+        self.goal.visit("Testing...", self.goal.get_plan_order(), lambda resource: None)
+        self.assertFalse(self.ui.echo.called)
+
+    def test_timings_echoed_by_mutators(self):
+        self.goal.mutator = True
+        self.goal.visit("Testing...", self.goal.get_plan_order(), lambda resource: None)
+        self.ui.echo.assert_called_with(mock.ANY)
+        self.assertTrue(self.ui.echo.call_args[0][0].startswith("Testing... took"))
+
+
+class TestPoolSize(unittest.TestCase):
+
+    def setUp(self):
+        self.workspace = workspace.Workspace()
+        self.workspace.concurrency = {"ec2": 4}
+        self.goal = SlowGoal(self.workspace, NonInteractiveFrontend(), map=functools.partial(ParallelMap, workers=16))
+
+    def test_concurrency_merged_with_defaults(self):
+        self.assertEqual(self.workspace.concurrency["ec2"], 4)
+        self.assertEqual(self.workspace.concurrency["iam"], 2)
+
+    def test_pool_size(self):
+        self.assertEqual(self.goal.get_pool_size("ec2"), 4)
+        self.assertEqual(self.goal.get_pool_size("iam"), 2)
+        self.assertEqual(self.goal.get_pool_size("sqs"), 16)
@@ -0,0 +1,34 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from touchdown.core.history import History
+
+
+class TestHistory(unittest.TestCase):
+
+    def test_round_trip(self):
+        cache = {}
+        history = History(cache)
+        history.get_phase("apply", "plan").record("vpc 'foo'", 5)
+        history.save()
+
+        phase = History(cache).get_phase("apply", "plan")
+        self.assertEqual(phase.estimate("vpc 'foo'"), 5)
+        self.assertEqual(phase.estimate("vpc 'bar'"), 5)
+
+    def test_no_history(self):
+        phase = History({}).get_phase("apply", "apply")
+        self.assertEqual(phase.estimate("vpc 'foo'"), phase.default_duration)
@@ -0,0 +1,122 @@
+# Copyright 2015 Isotoma Limited
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+
+import mock
+
+from touchdown.aws.vpc import SecurityGroup
+from touchdown.core import dependencies, errors, map
+
+
+def chain(length):
+    nodes = [SecurityGroup(None, name="sg{}".format(i), description="test") for i in range(length)]
+    for dep, node in zip(nodes, nodes[1:]):
+        node.add_dependency(dep)
+    return nodes
+
+
+class TestParallelMap(unittest.TestCase):
+
+    def test_respects_dependencies(self):
+        nodes = chain(20)
+        visited = []
+        lock = threading.Lock()
+
+        def visit(node):
+            with lock:
+                for dep in node.dependencies:
+                    self.assertIn(dep, visited)
+                visited.append(node)
+
+        map.ParallelMap(mock.Mock(), dependencies.DependencyMap(nodes[-1]), visit)()
+        self.assertEqual(visited, nodes)
+
+    def test_long_chain_has_no_polling_delay(self):
+        nodes = chain(30)
+        start = time.time()
+        map.ParallelMap(mock.Mock(), dependencies.DependencyMap(nodes[-1]), lambda node: None)()
+        self.assertLess(time.time() - start, 5)
+
+    def test_error_stops_scheduling(self):
+        nodes = chain(5)
+        visited = []
+
+        def visit(node):
+            visited.append(node)
+            if node is nodes[1]:
+                raise errors.Error("failed")
+
+        m = map.ParallelMap(mock.Mock(), dependencies.DependencyMap(nodes[-1]), visit)
+        self.assertRaises(errors.Error, m)
+        self.assertEqual(visited, nodes[:2])
+        self.assertEqual(m.stats.dispatched, 2)
+
+    def test_concurrency_limit(self):
+        root = SecurityGroup(None, name="root", description="test")
+        for i in range(10):
+            root.add_dependency(SecurityGroup(None, name="sg{}".format(i), description="test"))
+
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def visit(node):
+            with lock:
+                running.append(node)
+                peak.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.remove(node)
+
+        concurrency = map.Concurrency({"sg": 2}, lambda node: "sg")
+        map.ParallelMap(mock.Mock(), dependencies.DependencyMap(root), visit, concurrency=concurrency)()
+        self.assertEqual(max(peak), 2)
+
+    def test_needs_a_worker(self):
+        resources = dependencies.DependencyMap(SecurityGroup(None, name="sg", description="test"))
+        self.assertRaises(errors.InvalidParameter, map.ParallelMap, mock.Mock(), resources, lambda node: None, workers=0)
+
+    def test_concurrency_limit_must_be_positive(self):
+        self.assertRaises(errors.InvalidParameter, map.Concurrency, {"sg": 0})
+
+
+class TestAdaptiveLimit(unittest.TestCase):
+
+    def test_throttling_halves_limit(self):
+        feedback = map.Feedback()
+        limit = map.AdaptiveLimit(8, feedback)
+        self.assertEqual(limit.limit, 4)
+        feedback.record_call(0.1, throttled=True)
+        limit.update()
+        self.assertEqual(limit.limit, 2)
+
+    def test_grows_after_a_round(self):
+        feedback = map.Feedback()
+        limit = map.AdaptiveLimit(8, feedback)
+        for i in range(4):
+            feedback.record_call(0.1)
+            limit.update()
+        self.assertEqual(limit.limit, 5)
+
+    def test_shrinks_when_latency_rises(self):
+        feedback = map.Feedback()
+        limit = map.AdaptiveLimit(8, feedback)
+        for latency in (0.1, 1.0):
+            for i in range(limit.limit):
+                feedback.record_call(latency)
+                limit.update()
+        self.assertEqual(limit.limit, 4)
@@ -13,10 +13,12 @@
 # limitations under the License.
 
 import os
+import shutil
 import unittest
 import tempfile
 
 from touchdown.core import workspace, errors, serializers, goals
+from touchdown.core.cache import JSONFileCache
 from touchdown.core.map import SerialMap
 from touchdown.frontends import ConsoleFrontend
 
@@ -25,13 +27,16 @@ class TestCase(unittest.TestCase):
 
     def setUp(self):
         self.workspace = workspace.Workspace()
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
 
     def apply(self):
         self.apply_runner = goals.create(
             "apply",
             self.workspace,
             ConsoleFrontend(interactive=False),
-            map=SerialMap
+            map=SerialMap,
+            cache=JSONFileCache(self.cache_directory),
         )
         self.apply_runner.execute()
 
@@ -40,7 +45,8 @@ class TestCase(unittest.TestCase):
             "destroy",
             self.workspace,
             ConsoleFrontend(interactive=False),
-            map=SerialMap
+            map=SerialMap,
+            cache=JSONFileCache(self.cache_directory),
         )
         self.assertRaises(errors.NothingChanged, self.destroy_runner.execute)
 